@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: slash-command autocomplete with growing numbers of topics.
+
+Usage:
+    python benchmarks/bench_autocomplete.py [--sizes 0 1000 10000 50000] [--repeat 500]
+
+For each size, that many synthetic topics with two-word names are added to
+the knowledge base, the prefix indexes are built, and the same partly typed
+names are completed against them.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.content import ContentPack, content_store  # noqa: E402
+from utils.autocomplete import TopicAutocomplete  # noqa: E402
+
+PREFIXES = ['', 'd', 'dra', 'cầu r', 'cau rong', 'my', 'ho', 'bridge', 'ẩm', 'zzzz', 'a', 'mar']
+
+def synthetic_pack(size, rng):
+    """Copy of the current content pack with `size` extra topics named by two random words."""
+    pack = content_store.pack
+    info = dict(pack.info)
+    extra = {}
+    for i in range(size):
+        name = ' '.join(
+            ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 8))) for _ in range(2)
+        )
+        extra[f'{name.replace(" ", "_")}_{i}'] = {'en': name, 'vi': name}
+    info['synthetic'] = extra
+    return ContentPack(pack.version, info, pack.aliases, pack.place_labels)
+
+def suggest_times(index, repeat):
+    """Per-lookup latencies in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        for prefix in PREFIXES:
+            started = time.perf_counter()
+            index.topics['vi'].suggest(prefix)
+            samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'extra topics':>12} {'keys':>8} {'build ms':>9} {'p50 us':>8} {'p99 us':>8}")
+    for size in args.sizes:
+        pack = synthetic_pack(size, rng)
+        started = time.perf_counter()
+        index = TopicAutocomplete(pack)
+        build_ms = (time.perf_counter() - started) * 1e3
+        samples = sorted(suggest_times(index, args.repeat))
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        keys = len(index.topics['vi'].name_keys) + len(index.topics['vi'].word_keys)
+        print(
+            f"{size:>12} {keys:>8} {build_ms:>9.1f} "
+            f"{statistics.median(samples):>8.1f} {p99:>8.1f}"
+        )
+
+if __name__ == '__main__':
+    main()
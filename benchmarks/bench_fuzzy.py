@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: fuzzy topic name resolution with growing numbers of names.
+
+Usage:
+    python benchmarks/bench_fuzzy.py [--sizes 0 1000 5000 20000] [--repeat 200]
+
+For each size, that many synthetic topics with two-word names are added to
+the knowledge base, the resolver is built, and the same misspelled queries
+are resolved against it.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.content import ContentPack, content_store  # noqa: E402
+from utils.fuzzy import FuzzyResolver  # noqa: E402
+
+QUERIES = [
+    'marbel mountain',
+    'tell me about the marbel mountains',
+    'my ke beach',
+    'hoian',
+    'dragn bridge at night',
+    'lady budha',
+    'lol that was a great match yesterday, see you all tomorrow',
+    'where is the nearest pharmacy',
+]
+
+def synthetic_pack(size, rng):
+    """Copy of the current content pack with `size` extra topics named by two random words."""
+    pack = content_store.pack
+    info = dict(pack.info)
+    extra = {}
+    for i in range(size):
+        name = ' '.join(
+            ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 8))) for _ in range(2)
+        )
+        extra[f'{name.replace(" ", "_")}_{i}'] = {'en': name, 'vi': name}
+    info['synthetic'] = extra
+    return ContentPack(pack.version, info, pack.aliases, pack.place_labels)
+
+def query_times(resolver, repeat):
+    """Per-query latencies in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            resolver.resolve(query)
+            samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'extra topics':>12} {'names':>7} {'build ms':>9} {'p50 us':>8} {'p99 us':>8}")
+    for size in args.sizes:
+        pack = synthetic_pack(size, rng)
+        started = time.perf_counter()
+        resolver = FuzzyResolver(pack)
+        build_ms = (time.perf_counter() - started) * 1e3
+        samples = sorted(query_times(resolver, args.repeat))
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{size:>12} {len(resolver):>7} {build_ms:>9.1f} {statistics.median(samples):>8.1f} {p99:>8.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark: nearest-attraction queries with growing numbers of points.
+
+Usage:
+    python benchmarks/bench_geo.py [--sizes 8 1000 5000 20000] [--repeat 500]
+
+For each size, that many synthetic attractions are scattered around Da Nang
+(denser near the centre, like real POIs) on top of the content pack's and a
+few are moved, as Places results would. "k nearest" and radius queries are
+timed against the k-d tree and against a linear scan over every point, and
+the results of both are checked to agree.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.content import content_store  # noqa: E402
+from utils.geo import PointIndex, haversine_km  # noqa: E402
+
+CENTRE = (16.0544, 108.2022)
+
+def synthetic_points(size, rng):
+    """Content pack locations plus `size` points, most within ~20 km of the centre."""
+    points = dict(content_store.pack.locations)
+    for i in range(size):
+        spread = 0.15 if rng.random() < 0.8 else 1.0
+        points[f'poi_{i}'] = (rng.gauss(CENTRE[0], spread), rng.gauss(CENTRE[1], spread))
+    return points
+
+def linear_nearest(points, lat, lng, k, radius_km):
+    distances = sorted(
+        (haversine_km(lat, lng, *location), key) for key, location in points.items()
+    )
+    if radius_km is not None:
+        distances = [item for item in distances if item[0] <= radius_km]
+    return [(key, distance) for distance, key in distances[:k]]
+
+def timed(call, queries):
+    """Per-query latencies in microseconds."""
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        call(*query)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return sorted(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--radius', type=float, default=2.0, help='km, for the radius queries')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(
+        f"{'points':>7} {'build ms':>9} {'knn p50 us':>11} {'knn p99 us':>11} "
+        f"{'radius p50 us':>14} {'linear p50 us':>14}"
+    )
+    for size in args.sizes:
+        points = synthetic_points(size, rng)
+        started = time.perf_counter()
+        index = PointIndex((key, lat, lng) for key, (lat, lng) in points.items())
+        build_ms = (time.perf_counter() - started) * 1e3
+
+        # Places results move a few points after the tree is built
+        for key in rng.sample(sorted(points), min(10, len(points))):
+            points[key] = (rng.gauss(CENTRE[0], 0.1), rng.gauss(CENTRE[1], 0.1))
+            index.add(key, *points[key])
+
+        queries = [(rng.gauss(CENTRE[0], 0.2), rng.gauss(CENTRE[1], 0.2)) for _ in range(args.repeat)]
+        for lat, lng in queries[:50]:
+            for radius_km in (None, args.radius):
+                expected = linear_nearest(points, lat, lng, args.k, radius_km)
+                found = index.nearest(lat, lng, k=args.k, radius_km=radius_km)
+                assert len(found) == len(expected) and all(
+                    abs(got - want) < 1e-6 for (_, got), (_, want) in zip(found, expected)
+                ), (lat, lng)
+
+        knn = timed(lambda lat, lng: index.nearest(lat, lng, k=args.k), queries)
+        radius = timed(lambda lat, lng: index.nearest(lat, lng, radius_km=args.radius), queries)
+        linear = timed(lambda lat, lng: linear_nearest(points, lat, lng, args.k, None), queries[:50])
+        p99 = knn[min(len(knn) - 1, int(len(knn) * 0.99))]
+        print(
+            f"{len(points):>7} {build_ms:>9.1f} {statistics.median(knn):>11.1f} {p99:>11.1f} "
+            f"{statistics.median(radius):>14.1f} {statistics.median(linear):>14.1f}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: itinerary planning and incremental distance matrix updates.
+
+Usage:
+    python benchmarks/bench_itinerary.py [--stops 5 10 20 50] [--repeat 20] [--places 1000]
+
+Planning: for each size, random sets of synthetic places around Da Nang are
+planned with nearest-neighbour + 2-opt, with and without time windows, and
+routes of up to 8 stops are compared with the exact optimum. Matrix: a
+persisted matrix of --places places is built, reopened from disk, and
+updated after one place is added.
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.geo import haversine_km  # noqa: E402
+from utils.itinerary import DistanceMatrix, Stop, plan_route, solve_route  # noqa: E402
+
+CENTRE = (16.0544, 108.2022)
+
+def random_places(count, rng):
+    return {
+        f'poi_{i}': (rng.gauss(CENTRE[0], 0.15), rng.gauss(CENTRE[1], 0.15)) for i in range(count)
+    }
+
+def matrix_for(points):
+    keys = list(points)
+    return [[haversine_km(*points[a], *points[b]) for b in keys] for a in keys]
+
+def path_length(d, order):
+    return sum(d[a][b] for a, b in zip(order, order[1:]))
+
+def optimum(d):
+    """Shortest open path by brute force (symmetric, so each path is tried once)."""
+    return min(
+        path_length(d, order) for order in itertools.permutations(range(len(d))) if order[0] < order[-1]
+    )
+
+def random_stops(count, rng):
+    """Stops with 30-120 minute visits; about one in five only open in an afternoon or evening window."""
+    stops = []
+    for i in range(count):
+        windows = []
+        if rng.random() < 0.2:
+            opens = rng.choice((13 * 60, 17 * 60, 21 * 60))
+            windows = [(opens, opens + 60)]
+        stops.append(Stop(f'poi_{i}', rng.choice((30, 60, 90, 120)), windows))
+    return stops
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stops', type=int, nargs='+', default=[5, 10, 20, 50])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--places', type=int, default=1000, help='places in the persisted matrix')
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'stops':>5} {'route p50 ms':>13} {'route max ms':>13} {'windows p50 ms':>15} {'windows max ms':>15} {'vs optimum':>11}")
+    for count in args.stops:
+        route_times, window_times, ratios = [], [], []
+        for _ in range(args.repeat):
+            d = matrix_for(random_places(count, rng))
+            started = time.perf_counter()
+            order = solve_route(d)
+            route_times.append((time.perf_counter() - started) * 1e3)
+            if count <= 8:
+                best = optimum(d)
+                ratios.append(path_length(d, order) / best if best else 1.0)
+            stops = random_stops(count, rng)
+            started = time.perf_counter()
+            plan_route(stops, d, 8 * 60)
+            window_times.append((time.perf_counter() - started) * 1e3)
+        ratio = f"{max(ratios):.3f}x" if ratios else '-'
+        print(
+            f"{count:>5} {statistics.median(route_times):>13.2f} {max(route_times):>13.2f} "
+            f"{statistics.median(window_times):>15.2f} {max(window_times):>15.2f} {ratio:>11}"
+        )
+
+    path = os.path.join(tempfile.mkdtemp(prefix='danang-bench-'), 'distances.sqlite3')
+    places = random_places(args.places, rng)
+    matrix = DistanceMatrix(path)
+    started = time.perf_counter()
+    matrix.update_sync(places)
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    reopened = DistanceMatrix(path)
+    started = time.perf_counter()
+    unchanged = reopened.update_sync(places)
+    reopen_ms = (time.perf_counter() - started) * 1e3
+
+    places['poi_new'] = (CENTRE[0] + 0.01, CENTRE[1] + 0.01)
+    started = time.perf_counter()
+    added = reopened.update_sync(places)
+    add_ms = (time.perf_counter() - started) * 1e3
+    print(
+        f"\nmatrix of {args.places} places: full build {build_ms:.0f} ms, reopen from disk {reopen_ms:.0f} ms "
+        f"({unchanged} recomputed), add one place {add_ms:.1f} ms ({added} recomputed)"
+    )
+
+if __name__ == '__main__':
+    main()
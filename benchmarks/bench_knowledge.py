@@ -0,0 +1,161 @@
+"""
+Micro-benchmark: knowledge base object model vs. the render table and nested-dict lookups it replaced.
+
+Usage:
+    python benchmarks/bench_knowledge.py [--cities 1 5 20] [--repeat 20000]
+
+For each size, a multi-city catalog is generated: every city adds places,
+traditions and surroundings (two languages, aliases and menu labels) to the
+shared categories, as merging several city packs would. Both models are built
+from the same pack; the per-message lookups a reply makes (category of the
+last topic, title and description, a message) and follow-up suggestions are
+timed, and the memory each model adds on top of the pack is measured with
+tracemalloc.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE  # noqa: E402
+from utils.content import ContentPack, content_store  # noqa: E402
+from utils.knowledge import FOLLOW_UP_TEMPLATES, KnowledgeBase, first_sentence  # noqa: E402
+
+# Topics each city adds per category
+CITY_TOPICS = {'places': 25, 'traditions': 8, 'surroundings': 4}
+
+def words(rng, count):
+    return ' '.join(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(count))
+
+def synthetic_pack(cities, rng):
+    """The current pack plus `cities` synthetic cities' topics in the shared categories."""
+    pack = content_store.pack
+    info = {category: dict(items) for category, items in pack.info.items()}
+    aliases = dict(pack.aliases)
+    place_labels = dict(pack.place_labels)
+    for city in range(cities):
+        for category, count in CITY_TOPICS.items():
+            for i in range(count):
+                key = f'city{city}_{category}_{i}'
+                info[category][key] = {
+                    lang: '. '.join(words(rng, 8).capitalize() for _ in range(3)) + '.' for lang in SUPPORTED_LANGUAGES
+                }
+                aliases[key] = [words(rng, 2), words(rng, 2)]
+                place_labels[key] = {lang: words(rng, 2).title() for lang in SUPPORTED_LANGUAGES}
+    return ContentPack(pack.version, info, aliases, place_labels)
+
+# The render table and lookups the knowledge base replaced, kept for comparison
+
+def _legacy_localized(entry, lang):
+    if lang in entry:
+        return entry[lang]
+    return entry.get(DEFAULT_LANGUAGE)
+
+def _legacy_follow_up(info, category, key, lang):
+    templates = FOLLOW_UP_TEMPLATES.get(category)
+    if templates is None:
+        return None
+    siblings_template, closing_template = templates
+    messages = info.get('messages', {})
+    parts = []
+    if siblings_template and siblings_template in messages:
+        siblings = [
+            first_sentence(_legacy_localized(text, lang) or 'n/a')
+            for sibling, text in info[category].items() if sibling != key
+        ]
+        if siblings:
+            parts.append(_legacy_localized(messages[siblings_template], lang).format(items=', '.join(siblings)))
+    if closing_template in messages:
+        parts.append(_legacy_localized(messages[closing_template], lang))
+    return ".\n\n".join(parts) if parts else None
+
+def legacy_render_table(info):
+    table = {}
+    for category, items in info.items():
+        entries = {category: items} if all(isinstance(value, str) for value in items.values()) else items
+        for key, texts in entries.items():
+            for lang in SUPPORTED_LANGUAGES:
+                description = _legacy_localized(texts, lang)
+                if category == 'messages':
+                    table[(category, key, lang)] = (key, description, None)
+                    continue
+                table[(category, key, lang)] = (
+                    first_sentence(description), description, _legacy_follow_up(info, category, key, lang)
+                )
+    return table
+
+def legacy_category(info, key):
+    for category, items in info.items():
+        if key in items or key == category:
+            return category
+    return None
+
+def legacy_entry(table, key, category, lang):
+    entry = table.get((category, key, lang))
+    if entry is None and lang != DEFAULT_LANGUAGE:
+        entry = table.get((category, key, DEFAULT_LANGUAGE))
+    return entry
+
+def traced(build):
+    """(result, MB allocated and still held by build())."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size / 1e6
+
+def per_call_us(func, samples):
+    started = time.perf_counter()
+    for sample in samples:
+        func(*sample)
+    return (time.perf_counter() - started) / len(samples) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--repeat', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(
+        f"{'cities':>6} {'topics':>7} {'table MB':>9} {'kb MB':>7} {'table us/msg':>13} {'kb us/msg':>10} "
+        f"{'table us/follow-up':>19} {'kb us/follow-up':>16}"
+    )
+    for cities in args.cities:
+        pack = synthetic_pack(cities, rng)
+        info = pack.info
+        table, table_mb = traced(lambda: legacy_render_table(info))
+        knowledge, kb_mb = traced(lambda: KnowledgeBase(pack))
+
+        keys = list(knowledge.topics)
+        samples = [(rng.choice(keys), rng.choice(SUPPORTED_LANGUAGES)) for _ in range(args.repeat)]
+
+        def legacy_message(key, lang):
+            category = legacy_category(info, key)
+            title, description, _ = legacy_entry(table, key, category, lang)
+            return title, description, legacy_entry(table, 'generic_error', 'messages', lang)[1]
+
+        def knowledge_message(key, lang):
+            topic = knowledge.topic(key)
+            category = knowledge.category_of(key)
+            return topic.title(lang), topic.text(lang), category, knowledge.message('generic_error', lang)
+
+        def legacy_follow_up(key, lang):
+            return legacy_entry(table, key, legacy_category(info, key), lang)[2]
+
+        table_us = per_call_us(legacy_message, samples)
+        kb_us = per_call_us(knowledge_message, samples)
+        table_follow_up_us = per_call_us(legacy_follow_up, samples)
+        kb_follow_up_us = per_call_us(knowledge.follow_up, samples)
+        print(
+            f"{cities:>6} {len(keys):>7} {table_mb:>9.2f} {kb_mb:>7.2f} {table_us:>13.2f} {kb_us:>10.2f} "
+            f"{table_follow_up_us:>19.2f} {kb_follow_up_us:>16.2f}"
+        )
+
+if __name__ == '__main__':
+    main()
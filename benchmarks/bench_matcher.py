@@ -0,0 +1,102 @@
+"""
+Micro-benchmark: compiled MessageMatcher vs. the per-list substring scans it replaced.
+
+Usage:
+    python benchmarks/bench_matcher.py [--sizes 0 100 1000 5000] [--repeat 2000]
+
+For each size, that many synthetic topic keywords are added to the knowledge
+base and alias tables, and both classifiers process the same query corpus.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (  # noqa: E402
+    GREETING_PHRASES,
+    THANK_YOU_PHRASES,
+    DANANG_KEYWORDS,
+    FOLLOW_UP_PHRASES
+)
+from utils.content import ContentPack, content_store  # noqa: E402
+from utils.knowledge import KnowledgeBase  # noqa: E402
+from utils.matcher import MessageMatcher  # noqa: E402
+
+QUERIES = [
+    'tell me about dragon bridge',
+    'what is there to see around hoi an',
+    'where can i eat mi quang near my khe beach',
+    'cầu rồng phun lửa lúc mấy giờ',
+    'anything else you can tell me?',
+    'lol that was a great match yesterday, see you all tomorrow',
+    'thanks so much, have a nice day',
+    'hello bot',
+]
+
+def synthetic_info(size, rng):
+    """Copy of the knowledge base with `size` extra topics in a synthetic category."""
+    info = dict(content_store.pack.info)
+    extra = {}
+    for i in range(size):
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        extra[f'{word}_{i}'] = {'en': word, 'vi': word}
+    info['synthetic'] = extra
+    return info
+
+def naive_classify(query, info):
+    """The original on_message/find_topic_in_query logic, kept for comparison."""
+    greeting = any(query.startswith(phrase) for phrase in GREETING_PHRASES)
+    thanks = any(phrase in query for phrase in THANK_YOU_PHRASES)
+    danang = any(keyword in query for keyword in DANANG_KEYWORDS)
+    follow_up = any(phrase in query for phrase in FOLLOW_UP_PHRASES)
+    topic = None
+    query_words = query.split()
+    for category, items in info.items():
+        if category == 'messages':
+            continue
+        for key in items.keys():
+            if key in query_words or key.replace('_', ' ') in query:
+                topic = (key, category)
+                break
+            if any(alias in query for alias in content_store.pack.aliases.get(key, ())):
+                topic = (key, category)
+                break
+        if topic:
+            break
+    return greeting, thanks, danang, follow_up, topic
+
+def time_per_call(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            func(query)
+    return (time.perf_counter() - started) / (repeat * len(QUERIES)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'extra topics':>12} {'patterns':>9} {'build ms':>9} {'naive us/msg':>13} {'matcher us/msg':>15} {'speedup':>8}")
+    for size in args.sizes:
+        info = synthetic_info(size, rng)
+        started = time.perf_counter()
+        pack = content_store.pack
+        matcher = MessageMatcher(KnowledgeBase(ContentPack(pack.version, info, pack.aliases, pack.place_labels)))
+        build_ms = (time.perf_counter() - started) * 1e3
+
+        naive_us = time_per_call(lambda q: naive_classify(q, info), args.repeat)
+        matcher_us = time_per_call(matcher.scan, args.repeat)
+        print(
+            f"{size:>12} {matcher.automaton.pattern_count:>9} {build_ms:>9.1f} "
+            f"{naive_us:>13.2f} {matcher_us:>15.2f} {naive_us / matcher_us:>7.1f}x"
+        )
+
+if __name__ == '__main__':
+    main()
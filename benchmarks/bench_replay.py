@@ -0,0 +1,234 @@
+"""
+Offline load test: replay a message corpus through the bot's handlers.
+
+Drives on_message (free-text path), !askdanang and the place select menu with
+fake Discord objects against a local stub of the Places API, and reports
+throughput, per-handler latency percentiles and event-loop lag.
+
+Usage:
+    python benchmarks/bench_replay.py [--messages 5000] [--concurrency 200]
+        [--places-latency 0.05] [--places-error-rate 0.0] [--discord-latency 0.0]
+        [--cold] [--load-shedding] [--json results.json]
+
+Everything runs in one process on localhost with fixed seeds, so results are
+comparable between runs on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# Keep the bot's state files out of the working tree; must be set before config is imported
+_state_dir = tempfile.mkdtemp(prefix='danang-bench-')
+os.environ.setdefault('PLACE_CACHE_DB_PATH', os.path.join(_state_dir, 'place_cache.sqlite3'))
+os.environ.setdefault('USER_STORE_DB_PATH', os.path.join(_state_dir, 'users.sqlite3'))
+os.environ.setdefault('PHOTO_CACHE_DIR', os.path.join(_state_dir, 'photos'))
+os.environ.setdefault('COMMAND_SYNC_STATE_PATH', os.path.join(_state_dir, 'command_tree.sha256'))
+os.environ.setdefault('LOG_ASYNC', '1')
+
+import logging  # noqa: E402
+
+from discord.ui.select import selected_values  # noqa: E402
+
+import bot as bot_module  # noqa: E402
+import utils.places as places  # noqa: E402
+import utils.photo_cache as photo_cache  # noqa: E402
+from utils.place_store import PlaceStore  # noqa: E402
+from utils.rate_limit import LoadShedder  # noqa: E402
+from views.place_view import PlaceMenus  # noqa: E402
+from corpus import build_message_corpus, build_ask_corpus, build_select_corpus, PLACES  # noqa: E402
+from fakes import FakeUser, FakeChannel, FakeGuild, FakeMessage, FakeContext, FakeInteraction  # noqa: E402
+from stub_places import StubPlacesServer  # noqa: E402
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def summarize(name, latencies, elapsed):
+    values = sorted(latencies)
+    return {
+        'handler': name,
+        'count': len(values),
+        'throughput_per_s': len(values) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(values, 0.50) * 1e3,
+        'p95_ms': percentile(values, 0.95) * 1e3,
+        'p99_ms': percentile(values, 0.99) * 1e3,
+        'max_ms': (values[-1] if values else 0.0) * 1e3,
+    }
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task sleeping for `interval`."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - started - self.interval, 0.0))
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+async def run_phase(name, items, concurrency, make_call):
+    """Run make_call(item) for every item with bounded concurrency; return latencies and wall time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(item):
+        async with semaphore:
+            started = time.perf_counter()
+            await make_call(item)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(item) for item in items))
+    return latencies, time.perf_counter() - started
+
+async def reset_caches(cold):
+    if cold:
+        places.place_cache.clear()
+        places.negative_cache.clear()
+        places.place_store.close()
+        places.place_store = PlaceStore(os.path.join(tempfile.mkdtemp(prefix='danang-bench-'), 'place_cache.sqlite3'))
+    else:
+        for place in PLACES:
+            await places.get_place_info(place)
+
+async def main(args):
+    for name in ('danang_bot', 'utils', 'views'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    stub = await StubPlacesServer(latency=args.places_latency, error_rate=args.places_error_rate).start()
+    places.GOOGLE_PLACES_API_URL = f"{stub.url}/textsearch/json"
+    places.GOOGLE_PLACES_DETAILS_URL = f"{stub.url}/details/json"
+    places.GOOGLE_API_KEY = 'benchmark'
+    photo_cache.GOOGLE_API_KEY = 'benchmark'
+    photo_cache.GOOGLE_PLACES_PHOTO_URL = f"{stub.url}/photo"
+    await places.start_session()
+    bot_module.user_store.start()
+    if not args.load_shedding:
+        # A few hundred fake users in a handful of channels would otherwise be mostly rate limited
+        unlimited = (float('inf'), 1.0)
+        bot_module.free_text_shedder = LoadShedder(unlimited, unlimited, unlimited, duplicate_window=0)
+
+    users = [FakeUser() for _ in range(args.users)]
+    guild = FakeGuild()
+    channels = [FakeChannel(latency=args.discord_latency) for _ in range(args.channels)]
+
+    def actor(index):
+        return users[index % len(users)], channels[index % len(channels)]
+
+    async def free_text(item):
+        index, content = item
+        user, channel = actor(index)
+        await bot_module.handle_free_text(FakeMessage(content, user, channel, guild))
+
+    async def ask(item):
+        index, query = item
+        user, channel = actor(index)
+        await bot_module.user_store.ensure_loaded(user.id)
+        await bot_module.ask_danang.callback(FakeContext(user, channel, guild), query=query)
+
+    select = PlaceMenus(bot_module.user_store).registered['en'].children[0]
+
+    async def choose(item):
+        index, place = item
+        user, channel = actor(index)
+        selected_values.set({select.custom_id: [place]})
+        await select.callback(FakeInteraction(user, channel, guild))
+
+    phases = [
+        ('on_message', list(enumerate(build_message_corpus(args.messages))), free_text),
+        ('askdanang', list(enumerate(build_ask_corpus(args.messages // 2))), ask),
+        ('place_select', list(enumerate(build_select_corpus(args.messages // 2))), choose),
+    ]
+
+    results = []
+    lag = LoopLagMonitor()
+    lag.start()
+    try:
+        for name, items, call in phases:
+            await reset_caches(args.cold)
+            latencies, elapsed = await run_phase(name, items, args.concurrency, call)
+            results.append(summarize(name, latencies, elapsed))
+    finally:
+        await lag.stop()
+        await bot_module.outbound_scheduler.close()
+        await bot_module.user_store.close()
+        await places.close_session()
+        places.place_store.close()
+        photo_cache.photo_cache.close()
+        await stub.stop()
+
+    lag_values = sorted(lag.samples)
+    report = {
+        'config': vars(args),
+        'handlers': results,
+        'loop_lag': {
+            'p50_ms': percentile(lag_values, 0.50) * 1e3,
+            'p99_ms': percentile(lag_values, 0.99) * 1e3,
+            'max_ms': (lag_values[-1] if lag_values else 0.0) * 1e3,
+        },
+        'progressive_edits': sum(message.edits for channel in channels for message in channel.sent),
+        'stub_places': {
+            'requests': stub.requests,
+            'details_requests': stub.details_requests,
+            'errors': stub.errors,
+            'photo_requests': stub.photo_requests
+        },
+    }
+
+    print(f"{'handler':<14} {'count':>7} {'msg/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for row in results:
+        print(
+            f"{row['handler']:<14} {row['count']:>7} {row['throughput_per_s']:>9.0f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}"
+        )
+    loop_lag = report['loop_lag']
+    print(f"event loop lag: p50 {loop_lag['p50_ms']:.2f} ms, p99 {loop_lag['p99_ms']:.2f} ms, max {loop_lag['max_ms']:.2f} ms")
+    print(
+        f"stub Places API: {stub.requests} text searches, {stub.details_requests} details requests, "
+        f"{stub.errors} injected errors, {stub.photo_requests} photo downloads"
+    )
+    print(f"place replies completed by an edit: {report['progressive_edits']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=5000, help='free-text messages to replay')
+    parser.add_argument('--concurrency', type=int, default=200, help='messages in flight at once')
+    parser.add_argument('--users', type=int, default=500, help='distinct fake users')
+    parser.add_argument('--channels', type=int, default=20, help='distinct fake channels')
+    parser.add_argument('--places-latency', type=float, default=0.05, help='stub Places API latency (s)')
+    parser.add_argument('--places-error-rate', type=float, default=0.0, help='fraction of stub Places errors')
+    parser.add_argument('--discord-latency', type=float, default=0.0, help='simulated Discord REST latency (s)')
+    parser.add_argument('--cold', action='store_true', help='start every phase with empty place caches')
+    parser.add_argument('--load-shedding', action='store_true', help='keep the free-text rate limits enabled')
+    parser.add_argument('--json', help='also write results to this JSON file')
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
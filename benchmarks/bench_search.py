@@ -0,0 +1,125 @@
+"""
+Micro-benchmark: BM25 topic search index build and query times.
+
+Usage:
+    python benchmarks/bench_search.py [--sizes 0 1000 10000 50000] [--repeat 200]
+
+For each size, that many synthetic bilingual entries are added to the
+knowledge base's topic documents, the index is built, and the same query
+corpus is run against it. The README's example questions and a few chatter
+lines are first checked against the live content pack; mismatches are printed.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SEARCH_TOP_K, SEARCH_MIN_SCORE, SEARCH_MIN_IDF_SHARE  # noqa: E402
+from utils.content import content_store  # noqa: E402
+from utils.search import SearchIndex, search_topics, topic_documents  # noqa: E402
+
+QUERIES = [
+    'where can i eat noodles',
+    'cầu nào phun lửa',
+    'when is the best time to go',
+    'ancient town with lanterns',
+    'stone carving village',
+    'bãi biển đẹp nhất đà nẵng',
+    'lol that was a great match yesterday, see you all tomorrow',
+    'temple on the mountain',
+]
+
+# (question, expected best topic key or None for no answer) against the shipped content pack
+CHECKS = [
+    ('Tell me about Dragon Bridge', 'dragon_bridge'),
+    ("What's the best time to visit Da Nang?", 'best_time_to_visit'),
+    ('What are the local traditions?', 'cuisine'),
+    ("What's near Da Nang?", 'hue'),
+    ('Where can I eat noodles?', 'cuisine'),
+    ('i want to eat noodles', 'cuisine'),
+    ('where to eat', 'cuisine'),
+    ('Cầu nào phun lửa?', 'dragon_bridge'),
+    ('cau nao phun lua', 'dragon_bridge'),
+    ('ăn mì ở đâu', 'cuisine'),
+    ('bãi biển mỹ khê ở đâu', 'my_khe_beach'),
+    ('that movie was great', None),
+    ('lady gaga', None),
+    ('what is the weather in paris', None),
+    ('lol that was a great match yesterday, see you all tomorrow', None),
+]
+
+# Common words for synthetic entries, mixing English and Vietnamese (with diacritics)
+COMMON_WORDS = (
+    'beach bridge market temple pagoda mountain island river village museum park street food coffee noodle '
+    'seafood night lantern festival craft silk pottery boat cave waterfall tower church garden'
+).split() + (
+    'biển cầu chợ chùa núi đảo sông làng bảo tàng công viên phố ăn cà phê mì hải sản đêm đèn lồng lễ hội '
+    'nghề lụa gốm thuyền hang thác tháp nhà thờ vườn'
+).split()
+
+def vocabulary(rng, size=20000):
+    """Common words followed by random rarer ones; drawn with Zipf-like weights, like real text."""
+    words = list(COMMON_WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))))
+    return words, [1 / rank for rank in range(1, len(words) + 1)]
+
+def synthetic_documents(size, rng):
+    """The knowledge base's topic documents plus `size` synthetic entries of 20-60 words."""
+    documents = topic_documents(content_store.pack)
+    words, weights = vocabulary(rng)
+    for i in range(size):
+        text = ' '.join(rng.choices(words, weights, k=rng.randint(20, 60)))
+        documents.append(((f'synthetic_{i}', 'synthetic'), text))
+    return documents
+
+def query_times(index, repeat):
+    """Per-query latencies in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            index.search(query, SEARCH_TOP_K, SEARCH_MIN_SCORE, SEARCH_MIN_IDF_SHARE)
+            samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+def check_answers():
+    """Print every CHECKS question whose best topic differs from the expected one; returns the mismatch count."""
+    mismatches = 0
+    for question, expected in CHECKS:
+        results = search_topics(question)
+        found = results[0][0][0] if results else None
+        if found != expected:
+            mismatches += 1
+            print(f"MISMATCH {question!r}: expected {expected}, got {found}")
+    print(f"{len(CHECKS) - mismatches}/{len(CHECKS)} questions answered as expected")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    check_answers()
+    rng = random.Random(42)
+    print(f"{'extra docs':>10} {'documents':>10} {'terms':>7} {'build ms':>9} {'p50 us':>8} {'p99 us':>8}")
+    for size in args.sizes:
+        documents = synthetic_documents(size, rng)
+        started = time.perf_counter()
+        index = SearchIndex(documents)
+        build_ms = (time.perf_counter() - started) * 1e3
+        samples = sorted(query_times(index, args.repeat))
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(
+            f"{size:>10} {len(index):>10} {len(index.postings):>7} {build_ms:>9.1f} "
+            f"{statistics.median(samples):>8.1f} {p99:>8.1f}"
+        )
+
+if __name__ == '__main__':
+    main()
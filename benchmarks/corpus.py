@@ -0,0 +1,99 @@
+"""
+Replay corpus of realistic English and Vietnamese messages.
+
+Weights approximate a busy guild: most messages are unrelated chatter, the
+rest are greetings, place and topic questions, follow-ups and thanks.
+"""
+import random
+
+CHATTER = [
+    "lol did anyone see the match last night",
+    "brb getting coffee",
+    "can someone review my PR",
+    "ok see you tomorrow",
+    "that's a great idea, let's do it",
+    "what time is the meeting",
+    "haha nice",
+    "mai đi làm sớm nha",
+    "trời hôm nay nóng quá",
+]
+
+GREETINGS = [
+    "hi bot",
+    "hello there",
+    "hey, can you help me",
+    "xin chào",
+]
+
+QUESTIONS = [
+    "tell me about dragon bridge",
+    "what is the dragon bridge",
+    "where is my khe beach",
+    "show me the marble mountains",
+    "info about lady buddha",
+    "what can i buy at han market",
+    "tell me about hoi an",
+    "what is hue famous for",
+    "tell me about my son sanctuary",
+    "what festivals are there in da nang",
+    "what should i eat in danang, cuisine?",
+    "what traditional crafts are there",
+    "when is the best time to visit",
+    "give me an overview of da nang",
+    "cầu rồng ở đâu",
+    "kể cho tôi về ngũ hành sơn",
+    "biển mỹ khê có đẹp không",
+    "phố cổ hội an cách bao xa",
+    "chợ hàn bán gì",
+    "what places are around da nang",
+]
+
+FOLLOW_UPS = [
+    "tell me more",
+    "anything else?",
+    "what other places are there",
+]
+
+THANKS = [
+    "thanks!",
+    "thank you so much",
+    "cheers, have a nice day",
+]
+
+ASK_QUERIES = [
+    "Tell me about Dragon Bridge",
+    "marble mountains",
+    "what is my khe beach like",
+    "hoi an",
+    "best time to visit",
+    "cuisine",
+    "cầu rồng",
+    "where can I eat noodles",
+]
+
+PLACES = ['marble_mountains', 'dragon_bridge', 'my_khe_beach', 'lady_buddha', 'han_market']
+
+MESSAGE_MIX = [
+    (CHATTER, 0.45),
+    (GREETINGS, 0.05),
+    (QUESTIONS, 0.35),
+    (FOLLOW_UPS, 0.10),
+    (THANKS, 0.05),
+]
+
+def build_message_corpus(count, seed=42):
+    """Return `count` free-text messages drawn from MESSAGE_MIX with a fixed seed."""
+    rng = random.Random(seed)
+    pools = [pool for pool, _ in MESSAGE_MIX]
+    weights = [weight for _, weight in MESSAGE_MIX]
+    return [rng.choice(rng.choices(pools, weights)[0]) for _ in range(count)]
+
+def build_ask_corpus(count, seed=42):
+    """Return `count` !askdanang queries with a fixed seed."""
+    rng = random.Random(seed)
+    return [rng.choice(ASK_QUERIES) for _ in range(count)]
+
+def build_select_corpus(count, seed=42):
+    """Return `count` place selections, skewed towards the most popular places."""
+    rng = random.Random(seed)
+    return rng.choices(PLACES, weights=[3, 5, 3, 1, 2], k=count)
@@ -0,0 +1,144 @@
+"""
+Minimal stand-ins for the Discord objects the bot's handlers touch.
+
+They record what would have been sent and can simulate Discord REST latency,
+so handlers can be driven offline without a gateway connection.
+"""
+import asyncio
+import itertools
+import time
+
+_ids = itertools.count(1)
+
+class FakeUser:
+    def __init__(self, user_id=None, name=None):
+        self.id = user_id if user_id is not None else next(_ids)
+        self.name = name or f"user{self.id}"
+        self.mention = f"<@{self.id}>"
+        self.bot = False
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+class FakeSentMessage:
+    """A message the bot sent; supports the follow-up calls handlers make on it."""
+
+    def __init__(self, channel, content=None, embed=None, **kwargs):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.files = kwargs.get('files') or []
+        self._set_embed(embed)
+        self.reactions = []
+        self.edits = 0
+
+    def _set_embed(self, embed):
+        if embed is not None and embed.image.url and embed.image.url.startswith('attachment://'):
+            # Discord rewrites attachment:// images to a signed CDN URL that expires in a day
+            filename = embed.image.url[len('attachment://'):]
+            expires = format(int(time.time()) + 86400, 'x')
+            embed.set_image(url=f"https://cdn.discordapp.com/attachments/{self.channel.id}/{self.id}/{filename}?ex={expires}")
+        self.embed = embed
+        self.embeds = [embed] if embed is not None else []
+
+    async def add_reaction(self, emoji):
+        await self.channel.simulate_latency()
+        self.reactions.append(emoji)
+
+    async def edit(self, content=None, embed=None, **kwargs):
+        await self.channel.simulate_latency()
+        self.content = content if content is not None else self.content
+        if 'attachments' in kwargs:
+            self.files = kwargs['attachments']
+        if embed is not None:
+            self._set_embed(embed)
+        self.edits += 1
+        return self
+
+class FakeChannel:
+    def __init__(self, latency=0.0, channel_id=None):
+        self.id = channel_id if channel_id is not None else next(_ids)
+        self.latency = latency
+        self.sent = []
+
+    async def simulate_latency(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        await self.simulate_latency()
+        message = FakeSentMessage(self, content=content, embed=embed, **kwargs)
+        self.sent.append(message)
+        return message
+
+class FakeGuild:
+    def __init__(self, guild_id=None):
+        self.id = guild_id if guild_id is not None else next(_ids)
+
+class FakeMessage:
+    def __init__(self, content, author, channel, guild=None):
+        self.id = next(_ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+
+class FakeContext:
+    """Enough of commands.Context for the bot's command callbacks."""
+
+    def __init__(self, author, channel, guild=None):
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+    async def defer(self, **kwargs):
+        # Prefix-command contexts have nothing to acknowledge
+        pass
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self._interaction._original = await self._interaction.channel.send(content, **kwargs)
+
+    async def defer(self, **kwargs):
+        self._done = True
+        await self._interaction.channel.simulate_latency()
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        message = await self._interaction.channel.send(content, **kwargs)
+        if self._interaction._original is None:
+            self._interaction._original = message
+        return message
+
+class FakeInteraction:
+    """Enough of discord.Interaction for select-menu callbacks."""
+
+    def __init__(self, user, channel, guild=None):
+        self.user = user
+        self.channel = channel
+        self.guild = guild
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self._original = None
+
+    async def original_response(self):
+        await self.channel.simulate_latency()
+        return self._original
@@ -0,0 +1,113 @@
+"""
+Local stand-in for the Google Places Text Search, Place Details and photo endpoints.
+
+Serves deterministic results with configurable latency and error rate, so the
+bot's HTTP path can be exercised without a Google API key.
+"""
+import asyncio
+import hashlib
+import random
+from aiohttp import web
+
+class StubPlacesServer:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, error_rate=0.0, seed=42):
+        """
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind, 0 for any free port
+            latency (float): Seconds to wait before answering each request
+            error_rate (float): Fraction of requests answered with HTTP 500
+            seed (int): Seed for the error-injection RNG
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.details_requests = 0
+        self.photo_requests = 0
+        self._rng = random.Random(seed)
+        self._names = {}
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def _text_search(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500, text='injected error')
+        query = request.query.get('query', '')
+        place_id = hashlib.sha1(query.encode('utf-8')).hexdigest()[:16]
+        self._names[place_id] = query.replace(' Da Nang Vietnam', '').replace('_', ' ').title()
+        return web.json_response({'status': 'OK', 'results': [self._place(place_id)]})
+
+    def _place(self, place_id):
+        digest = hashlib.sha1(place_id.encode('utf-8')).digest()
+        return {
+            'name': self._names.get(place_id, place_id),
+            'formatted_address': 'Da Nang, Vietnam',
+            'place_id': place_id,
+            'geometry': {'location': {'lat': 16.0 + digest[0] / 1000, 'lng': 108.2 + digest[1] / 1000}},
+            'photos': [{'photo_reference': f'photo-{place_id}'}],
+            'rating': 4.6,
+            'user_ratings_total': 1234
+        }
+
+    async def _details(self, request):
+        self.details_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500, text='injected error')
+        place_id = request.query.get('place_id', '')
+        if place_id not in self._names:
+            return web.json_response({'status': 'NOT_FOUND'})
+        place = self._place(place_id)
+        place.update({
+            'formatted_phone_number': '0236 3 123 456',
+            'website': f'https://example.com/{place_id}',
+            'opening_hours': {'weekday_text': [f'{day}: 7:00 AM – 10:00 PM' for day in (
+                'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')]}
+        })
+        # Honour the field mask like the real endpoint
+        fields = request.query.get('fields')
+        if fields:
+            wanted = {field.split('/')[0] for field in fields.split(',')}
+            if 'photo' in wanted:
+                wanted.add('photos')
+            place = {key: value for key, value in place.items() if key in wanted}
+        return web.json_response({'status': 'OK', 'result': place})
+
+    async def _photo(self, request):
+        self.photo_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        reference = request.query.get('photoreference', '')
+        # Deterministic fake JPEG body, roughly the size of a 400px photo
+        body = b'\xff\xd8\xff\xe0' + hashlib.sha256(reference.encode('utf-8')).digest() * 1000
+        return web.Response(body=body, content_type='image/jpeg')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/textsearch/json', self._text_search)
+        app.router.add_get('/details/json', self._details)
+        app.router.add_get('/photo', self._photo)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the port when an ephemeral one was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
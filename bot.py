@@ -1,176 +1,293 @@
-import os
+from utils.startup import startup_timer # Imported first so the startup clock covers every other import
+import asyncio
 import discord
+from discord import app_commands
 from discord.ext import commands
-from dotenv import load_dotenv
-import requests
-from discord import ui
-import json
 import logging
-from config import TOKEN, COMMAND_PREFIX, DA_NANG_INFO
-from views.place_view import PlaceView
-from utils.logger import setup_logger
-from utils.places import get_place_info
+from typing import Optional
+from config import (
+    TOKEN,
+    COMMAND_PREFIX,
+    COMMAND_SYNC_STATE_PATH,
+    SUPPORTED_LANGUAGES,
+    DEFAULT_LANGUAGE,
+    USER_STORE_DB_PATH,
+    USER_STORE_MAX_USERS,
+    USER_STORE_IDLE_TTL,
+    USER_STORE_FLUSH_INTERVAL,
+    METRICS_HOST,
+    METRICS_PORT,
+    FREE_TEXT_USER_RATE,
+    FREE_TEXT_CHANNEL_RATE,
+    FREE_TEXT_GUILD_RATE,
+    FREE_TEXT_DUPLICATE_WINDOW,
+    FREE_TEXT_CHANNEL_ALLOWLIST,
+    MESSAGE_CONTENT_INTENT,
+    PLACE_REPLY_BUDGET,
+    NEARBY_RESULTS,
+    NEARBY_MAX_RADIUS_KM,
+    ITINERARY_MAX_STOPS
+)
+from views.place_view import PlaceMenus, add_place_fields
+from utils.logger import setup_logger, dropped_records
+from utils.places import get_place_info, start_session, close_session, place_store
+from utils.photo_cache import photo_cache
+from utils.warmup import PlaceWarmer
+from utils.content import ContentPackError, content_store
+from utils.matcher import message_matcher
+from utils.search import search_topics
+from utils.fuzzy import resolve_topic
+from utils.autocomplete import suggest_places, suggest_topics
+from utils.geo import find_nearby, topic_location, parse_coordinates, current_locations
+from utils.itinerary import distance_matrix, plan_itinerary, parse_schedule, format_clock, travel_minutes
+from utils.knowledge import knowledge_base, NOT_AVAILABLE
+from utils.user_store import UserStore
+from utils.outbound import outbound_scheduler
+from utils.rate_limit import LoadShedder
+from utils.command_sync import sync_if_changed
+from utils.metrics import registry, MetricsServer, STAGE_SECONDS, DISCORD_SEND_SECONDS
 import random # Import random for thank you responses
+import re
 
-# Load environment variables
-load_dotenv()
-TOKEN = os.getenv('DISCORD_TOKEN')
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-
-# Set up logging
+# Set up logging (the utils and views module loggers share the same handlers)
 logger = setup_logger('danang_bot')
+setup_logger('utils')
+setup_logger('views')
+
+class DaNangBot(commands.Bot):
+    """Bot subclass that owns the lifecycle of shared resources."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.place_warmer = PlaceWarmer(content_store.pack.info['places'].keys())
+        content_store.subscribe(lambda pack: list(pack.info['places']), self.place_warmer.update_places)
+        self.metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+
+    async def setup_hook(self):
+        """
+        Called once after login and before connecting to the gateway; reconnects never run it again.
+        Opens the pooled Places HTTP session, starts background work, registers the persistent
+        place menus and syncs application commands.
+        """
+        startup_timer.mark('login')
+        await start_session()
+        self.place_warmer.start()
+        user_store.start()
+        content_store.start()
+        distance_matrix.schedule_update(current_locations())
+        self.place_menus = PlaceMenus(user_store)
+        self.place_menus.register(self)
+        if self.metrics_server:
+            await self.metrics_server.start()
+        startup_timer.mark('setup_hook')
+        try:
+            await sync_if_changed(self.tree, COMMAND_SYNC_STATE_PATH, self.application_id)
+        except Exception as e:
+            logger.error("Failed to sync commands: %s", e)
+        startup_timer.mark('command_sync')
+
+    async def close(self):
+        """Drain queued Discord actions, close the gateway connection, then release the HTTP session and cache store."""
+        await self.place_warmer.stop()
+        await content_store.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        # Queued reactions, sends and edits need the Discord client, so they finish before it closes
+        await outbound_scheduler.close()
+        await super().close()
+        await user_store.close()
+        await distance_matrix.close()
+        await close_session()
+        place_store.close()
+        photo_cache.close()
 
 # Bot setup
 intents = discord.Intents.default()
-intents.message_content = True
-bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents)
-
-# Da Nang information
-da_nang_info = {
-    'places': {
-        'marble_mountains': 'The Marble Mountains (Ngu Hanh Son) are five limestone hills named after the five elements. They feature caves, temples, and panoramic views of Da Nang.',
-        'dragon_bridge': 'The Dragon Bridge is a modern architectural marvel that spans the Han River. It breathes fire and water every weekend night.',
-        'my_khe_beach': 'My Khe Beach is known as one of the most beautiful beaches in Vietnam, famous for its white sand and clear water.',
-        'lady_buddha': 'The Lady Buddha statue at Linh Ung Pagoda is the tallest Buddha statue in Vietnam, standing at 67 meters.',
-        'han_market': 'Han Market is a traditional market offering local food, souvenirs, and a glimpse into daily life in Da Nang.'
-    },
-    'traditions': {
-        'festivals': 'Da Nang hosts several festivals including the International Fireworks Festival and the Quan The Am Festival.',
-        'cuisine': 'Famous local dishes include Mi Quang (turmeric noodles), Banh Xeo (savory pancakes), and fresh seafood.',
-        'crafts': 'Traditional crafts include stone carving in Non Nuoc village and fishing net making.'
-    }
-}
-
-class PlaceSelect(ui.Select):
-    def __init__(self):
-        options = [
-            discord.SelectOption(label="Marble Mountains", value="marble_mountains", description="Five limestone hills with caves and temples"),
-            discord.SelectOption(label="Dragon Bridge", value="dragon_bridge", description="Modern architectural marvel"),
-            discord.SelectOption(label="My Khe Beach", value="my_khe_beach", description="One of Vietnam's most beautiful beaches"),
-            discord.SelectOption(label="Lady Buddha", value="lady_buddha", description="Tallest Buddha statue in Vietnam"),
-            discord.SelectOption(label="Han Market", value="han_market", description="Traditional market in Da Nang")
-        ]
-        super().__init__(placeholder="Choose a place in Da Nang...", options=options)
-
-    async def callback(self, interaction: discord.Interaction):
-        place_name = self.values[0]
-        place_info = await get_place_info(place_name)
-        
-        embed = discord.Embed(
-            title=place_info['name'],
-            description=place_info['description'],
-            color=discord.Color.blue()
-        )
-        
-        if 'photo_url' in place_info:
-            embed.set_image(url=place_info['photo_url'])
-        
-        if 'maps_url' in place_info:
-            embed.add_field(name="Location", value=f"[View on Google Maps]({place_info['maps_url']})")
-        
-        await interaction.response.send_message(embed=embed)
-        
-        # Add reactions
-        message = await interaction.original_response()
-        for emoji in ["🔥", "❤️", "😋"]:
-            await message.add_reaction(emoji)
-
-class PlaceView(ui.View):
-    def __init__(self):
-        super().__init__()
-        self.add_item(PlaceSelect())
-
-async def get_place_info(place_name):
-    # Google Places API endpoint
-    url = f"https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        'query': f"{place_name} Da Nang Vietnam",
-        'key': GOOGLE_API_KEY
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        data = response.json()
-        
-        if data['status'] == 'OK' and data['results']:
-            place = data['results'][0]
-            
-            # Get photo if available
-            photo_url = None
-            if 'photos' in place:
-                photo_reference = place['photos'][0]['photo_reference']
-                photo_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={photo_reference}&key={GOOGLE_API_KEY}"
-            
-            return {
-                'name': place['name'],
-                'description': place.get('formatted_address', 'No description available'),
-                'maps_url': f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
-                'photo_url': photo_url
-            }
-    except Exception as e:
-        print(f"Error fetching place info: {e}")
-    
-    # Fallback to static data if API fails
-    return {
-        'name': place_name.replace('_', ' ').title(),
-        'description': da_nang_info['places'].get(place_name, 'No description available'),
-        'maps_url': None,
-        'photo_url': None
-    }
-
-# Dictionary to store last topic per user and their preferred language
-user_last_topic = {}
-user_language = {}
+# Without it, guild messages arrive without content: prefix commands and free-text replies only
+# work in DMs and mentions, while slash commands keep working everywhere
+intents.message_content = MESSAGE_CONTENT_INTENT
+bot = DaNangBot(command_prefix=COMMAND_PREFIX, intents=intents)
+
+# Bounded store for each user's last topic and (persisted) preferred language
+user_store = UserStore(
+    USER_STORE_DB_PATH,
+    max_users=USER_STORE_MAX_USERS,
+    idle_ttl=USER_STORE_IDLE_TTL,
+    flush_interval=USER_STORE_FLUSH_INTERVAL
+)
+
+# Rate limits for unsolicited (non-command) replies
+free_text_shedder = LoadShedder(
+    user_rate=FREE_TEXT_USER_RATE,
+    channel_rate=FREE_TEXT_CHANNEL_RATE,
+    guild_rate=FREE_TEXT_GUILD_RATE,
+    duplicate_window=FREE_TEXT_DUPLICATE_WINDOW
+)
+PLACE_REPLIES = registry.counter(
+    'danang_bot_place_replies_total',
+    'Place replies sent complete, or sent static and completed by an edit (progressive)',
+    ('handler', 'mode')
+)
+FREE_TEXT_SHED = registry.counter(
+    'danang_bot_free_text_shed_total',
+    'Free-text messages skipped by load shedding',
+    ('reason',)
+)
+
+# Process-level gauges
+registry.gauge('danang_bot_users_in_memory', 'Users currently held in the user store', lambda: len(user_store))
+registry.gauge(
+    'danang_bot_warmup_seconds',
+    'Duration of the last place cache warm-up',
+    lambda: bot.place_warmer.warmup_duration or 0
+)
+registry.gauge('danang_bot_log_records_dropped', 'Log records dropped because the queue was full', dropped_records)
+registry.gauge(
+    'danang_bot_startup_ready_seconds',
+    'Seconds from process start to the first ready event',
+    lambda: startup_timer.get('ready') or 0
+)
+registry.gauge(
+    'danang_bot_startup_first_reply_seconds',
+    'Seconds from process start to the first reply sent',
+    lambda: startup_timer.get('first_reply') or 0
+)
 
 # Helper function to find topic in query
 def find_topic_in_query(query):
-    """Helper to find a matching topic key and category in the query."""
-    query_words = query.split()
-    for category, items in DA_NANG_INFO.items():
-        for key in items.keys():
-            # Check for exact key match or key with underscores replaced by spaces (English)
-            if key in query_words or key.replace('_', ' ') in query:
-                return key, category
-            # Add checks for Vietnamese keywords if needed in the future
-            # For now, rely on English keyword matching
-    return None, None
+    """Helper to find a matching topic key and category in the query; an exact name or alias needs no scan."""
+    topic = knowledge_base.lookup(query.strip())
+    if topic:
+        return topic.ref
+    topic = message_matcher.scan(query).topic
+    return topic if topic else (None, None)
+
+# Helper function to get a user's language
+def get_user_language(user_id):
+    """Returns the user's preferred language code, defaulting to English."""
+    return user_store.get_language(user_id, DEFAULT_LANGUAGE)
 
 # Helper function to get localized text
-def get_localized_text(user_id, key, category=None, default_text="Information not available."):
+def get_localized_text(user_id, key, category=None, default_text=NOT_AVAILABLE):
     """
     Retrieves localized text for a given key, category, and user ID.
     Defaults to English if user preference is not set or translation is missing.
+    Backed by the knowledge base in utils.knowledge.
     """
-    lang = user_language.get(user_id, 'en') # Default to English
-    
-    if category and category in DA_NANG_INFO and key in DA_NANG_INFO[category]:
-        if lang in DA_NANG_INFO[category][key]:
-            return DA_NANG_INFO[category][key][lang]
-        elif 'en' in DA_NANG_INFO[category][key]:
-            return DA_NANG_INFO[category][key]['en'] # Fallback to English if preferred lang missing
-            
-    elif category is None and key in DA_NANG_INFO:
-         if lang in DA_NANG_INFO[key]:
-             return DA_NANG_INFO[key][lang]
-         elif 'en' in DA_NANG_INFO[key]:
-            return DA_NANG_INFO[key]['en'] # Fallback to English for overview etc.
-
-    return default_text # Return default if key or category not found
+    text = knowledge_base.text(key, category, get_user_language(user_id))
+    return text if text is not None else default_text
+
+async def send_reply(handler, destination, *args, **kwargs):
+    """Sends a message to a channel or context, recording the Discord send latency."""
+    with DISCORD_SEND_SECONDS.time(handler=handler):
+        message = await destination.send(*args, **kwargs)
+    if startup_timer.mark('first_reply'):
+        logger.info("First reply sent; startup timings: %s", startup_timer.report())
+    return message
+
+async def send_place_reply(handler, destination, user_id, topic):
+    """
+    Sends a place reply without letting the Places API set the response time.
+
+    If the place data and photo are ready within PLACE_REPLY_BUDGET seconds, the complete
+    embed is sent. Otherwise the localized description is sent straight away and that
+    message is edited in place once the rating, maps link and photo arrive.
+    Returns the sent message; raises if the data was ready in time but the lookup failed.
+    """
+    lang = get_user_language(user_id)
+    topic_key = topic.key
+
+    def static_embed():
+        return discord.Embed(title=topic.title(lang), description=topic.text(lang), color=discord.Color.green())
+
+    async def prepare():
+        with STAGE_SECONDS.time(handler=handler, stage='place_lookup'):
+            place_info = await get_place_info(topic_key)
+        embed = static_embed()
+        files = await photo_cache.attach(embed, place_info)
+        add_place_fields(embed, place_info, lang)
+        return place_info, embed, files
+
+    prepared = asyncio.ensure_future(prepare())
+    done, _ = await asyncio.wait((prepared,), timeout=PLACE_REPLY_BUDGET)
+    if prepared in done:
+        place_info, embed, files = prepared.result()
+        sent = await send_reply(handler, destination, embed=embed, files=files)
+        photo_cache.remember_upload(place_info, sent)
+        PLACE_REPLIES.inc(handler=handler, mode='complete')
+        return sent
+
+    sent = await send_reply(handler, destination, embed=static_embed())
+    PLACE_REPLIES.inc(handler=handler, mode='progressive')
+
+    def complete(task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # The static description already sent stays as the answer
+            logger.error("Error completing reply for '%s': %s", topic_key, task.exception())
+            return
+        place_info, embed, files = task.result()
+        outbound_scheduler.schedule_edit(
+            sent,
+            on_edited=lambda edited: photo_cache.remember_upload(place_info, edited),
+            embed=embed,
+            attachments=files
+        )
+
+    prepared.add_done_callback(complete)
+    return sent
+
+def topic_label(key, lang):
+    """Returns the display name of a topic, as shown in the place menu and autocomplete."""
+    topic = knowledge_base.topic(key)
+    return topic.label(lang) if topic else key.replace('_', ' ').title()
+
+def format_distance(km):
+    """Formats a distance for display, e.g. '850 m' or '2.4 km'."""
+    return f"{km * 1000:.0f} m" if km < 1 else f"{km:.1f} km"
+
+async def send_nearby_reply(handler, destination, user_id, origin, location, radius_km=None, exclude=()):
+    """
+    Sends the NEARBY_RESULTS attractions closest to a location, with their distances.
+    origin is the place name or coordinates shown in the title; exclude leaves out the place itself.
+    """
+    lang = get_user_language(user_id)
+    radius_km = min(radius_km or NEARBY_MAX_RADIUS_KM, NEARBY_MAX_RADIUS_KM)
+    with STAGE_SECONDS.time(handler=handler, stage='nearby'):
+        results = find_nearby(*location, k=NEARBY_RESULTS, radius_km=radius_km, exclude=exclude)
+    if not results:
+        text = get_localized_text(user_id, 'nearby_none', 'messages').format(radius=f"{radius_km:g}", place=origin)
+        return await send_reply(handler, destination, text)
+    lines = [
+        f"**{rank}.** {topic_label(key, lang)} — {format_distance(distance)}"
+        for rank, (key, distance) in enumerate(results, 1)
+    ]
+    embed = discord.Embed(
+        title=get_localized_text(user_id, 'nearby_title', 'messages').format(place=origin),
+        description='\n'.join(lines),
+        color=discord.Color.blue()
+    )
+    return await send_reply(handler, destination, embed=embed)
+
+@bot.before_invoke
+async def load_user_state(ctx):
+    """Loads the invoking user's stored preferences before any command runs."""
+    await user_store.ensure_loaded(ctx.author.id)
 
 @bot.event
 async def on_ready():
-    """Called when the bot is ready and connected to Discord."""
-    logger.info(f'{bot.user} has connected to Discord!')
-    try:
-        synced = await bot.tree.sync()
-        logger.info(f"Synced {len(synced)} command(s)")
-    except Exception as e:
-        logger.error(f"Failed to sync commands: {str(e)}")
+    """Called when the bot is ready; fires again after every reconnect, so it does no setup work."""
+    if startup_timer.mark('ready'):
+        logger.info('%s has connected to Discord!', bot.user)
+        logger.info("Startup timings: %s", startup_timer.report())
+    else:
+        logger.info('%s reconnected to Discord', bot.user)
 
 @bot.event
 async def on_error(event, *args, **kwargs):
     """Global error handler for the bot."""
-    logger.error(f"Error in {event}: {str(args[0])}")
+    logger.error("Error in %s: %s", event, args[0])
 
 @bot.event
 async def on_message(message):
@@ -186,309 +303,285 @@ async def on_message(message):
     
     # Process messages that don't start with the command prefix
     if not message.content.startswith(COMMAND_PREFIX):
-        user_id = message.author.id
-        query = message.content.lower()
-        
-        # --- Handle Greetings ---
-        greeting_phrases = ['hi', 'hello', 'hey', 'yo', 'sup', '안녕', 'xin chào'] 
-        if any(query.startswith(phrase) for phrase in greeting_phrases):
-            await message.channel.send(f"Hello {message.author.mention}! How can I help you explore Da Nang today? You can ask me about places, traditions, or use `!danang` for a menu!")
-            logger.info(f"Responded to greeting from {message.author.name}")
-            return # Stop processing if it's a greeting
-
-        # --- Handle Thanks and Well Wishes ---
-        thank_you_phrases = ['thank you', 'thanks', 'have a nice day', 'good day', 'cheers', 'you can take a rest now'] # Added more phrases
-        if any(phrase in query for phrase in thank_you_phrases):
-            responses = [
-                f"You're welcome, {message.author.mention}! Happy to help you discover Da Nang!",
-                "Anytime! Enjoy your day!",
-                "Glad I could help! Have a wonderful day!",
-                "Thank you! Wishing you a great day as well!",
-                "Thanks for the kind words! I'm always here if you need anything else about Da Nang!"
-            ]
-            await message.channel.send(random.choice(responses))
-            logger.info(f"Responded to thank you/well wish from {message.author.name}")
-            return # Stop processing after responding
+        with STAGE_SECONDS.time(handler='on_message', stage='total'):
+            await handle_free_text(message)
+
+async def handle_free_text(message):
+    """
+    Responds to a non-command message: greetings, thanks, follow-ups and Da Nang questions.
+    """
+    # Only listen where it is wanted
+    if FREE_TEXT_CHANNEL_ALLOWLIST and message.channel.id not in FREE_TEXT_CHANNEL_ALLOWLIST:
+        return
+
+    user_id = message.author.id
+    query = message.content.lower()
+    # Classify the message (intents and topic) in a single pass
+    with STAGE_SECONDS.time(handler='on_message', stage='classify'):
+        scan = message_matcher.scan(query)
+
+    # Nothing to reply to
+    if not (scan.greeting or scan.thanks or scan.danang_keyword or scan.follow_up or scan.topic):
+        return
+
+    # Shed load from chatty users, channels and guilds before any heavy work
+    guild_id = message.guild.id if message.guild else None
+    decision = free_text_shedder.check(user_id, message.channel.id, guild_id, query)
+    if decision != 'allowed':
+        FREE_TEXT_SHED.inc(reason=decision)
+        logger.debug("Skipped message from %s (%s)", message.author.name, decision)
+        return
+
+    # Typo-tolerant fallback when no topic name matched exactly, only for messages that look like questions
+    if scan.topic is None and (scan.danang_keyword or scan.follow_up):
+        with STAGE_SECONDS.time(handler='on_message', stage='resolve'):
+            match = resolve_topic(query)
+        if match:
+            scan.topic = match[0]
+            logger.debug("Resolved '%s' to %s (confidence %.2f)", query, match[0][0], match[1])
+    
+    # --- Handle Greetings ---
+    if scan.greeting:
+        await send_reply('on_message', message.channel, f"Hello {message.author.mention}! How can I help you explore Da Nang today? You can ask me about places, traditions, or use `!danang` for a menu!")
+        logger.info("Responded to greeting from %s", message.author.name)
+        return # Stop processing if it's a greeting
+
+    # --- Handle Thanks and Well Wishes ---
+    if scan.thanks:
+        responses = [
+            f"You're welcome, {message.author.mention}! Happy to help you discover Da Nang!",
+            "Anytime! Enjoy your day!",
+            "Glad I could help! Have a wonderful day!",
+            "Thank you! Wishing you a great day as well!",
+            "Thanks for the kind words! I'm always here if you need anything else about Da Nang!"
+        ]
+        await send_reply('on_message', message.channel, random.choice(responses))
+        logger.info("Responded to thank you/well wish from %s", message.author.name)
+        return # Stop processing after responding
+
+    
+    # --- Handle Da Nang Queries ---
+    # Simple check if the message is likely a question about Da Nang or general info
+    is_potential_danang_query = scan.danang_keyword or scan.topic is not None
+
+    # Only proceed if it seems like a potential Da Nang query or if it's a likely follow-up
+    is_follow_up = scan.follow_up
+    
+    if is_potential_danang_query or is_follow_up:
+        await user_store.ensure_loaded(user_id)
 
+    if is_potential_danang_query or (is_follow_up and user_store.get_last_topic(user_id)):
+
+        logger.info("Attempting to respond to non-command message: %s", query)
         
-        # --- Handle Da Nang Queries ---
-        # Simple check if the message is likely a question about Da Nang or general info
-        danang_keywords = ['da nang', 'danang', 'place', 'tradition', 'cuisine', 'festival', 'beach', 'bridge', 'mountain', 'market', 'buddha', 'thing', 'what', 'where', 'tell', 'show', 'info', 'about', 'know', 'visit', 'see', 'eat', 'around', 'nearby', 'surrounding', 'time to visit', 'season', 'weather', 'when to go', 'overview', 'general info', 'information'] 
-        is_potential_danang_query = any(keyword in query for keyword in danang_keywords)
-
-        # Only proceed if it seems like a potential Da Nang query or if it's a likely follow-up
-        follow_up_phrases = ["anything else", "tell me more", "more info", "other", "next"]
-        is_follow_up = any(phrase in query for phrase in follow_up_phrases)
+        found_info_key = None
+        found_info_category = None
+        response_text = None
         
-        if is_potential_danang_query or (is_follow_up and user_id in user_last_topic and user_last_topic[user_id]):
-
-            logger.info(f"Attempting to respond to non-command message: {query}")
-            
-            found_info_key = None
-            found_info_category = None
-            response_text = None
-            
-            if is_follow_up:
-                # Handle follow-up based on last topic
-                 if user_id in user_last_topic and user_last_topic[user_id]:
-                    last_topic_key = user_last_topic[user_id]
-                    last_topic_category = None
-                    # Find the category of the last topic
-                    for cat, items in DA_NANG_INFO.items():
-                         if last_topic_key in items or last_topic_key == cat: # Check if last topic was a category itself (like overview)
-                            last_topic_category = cat
-                            break
-
-                    if last_topic_category:
-                         logger.info(f"Handling follow-up for last topic: {last_topic_key} ({last_topic_category})\n")
-                         
-                         # Get translated topic name for the response
-                         last_topic_name = get_localized_text(user_id, last_topic_key, last_topic_category) # This might return the description, need just the name
-                         # Simple way to get a name - try to look up in places/traditions or use the key
-                         display_topic_name = last_topic_key.replace('_', ' ').title()
-                         if last_topic_category in ['places', 'traditions', 'surroundings'] and last_topic_key in DA_NANG_INFO[last_topic_category]:
-                              # Use English name from config for consistency in suggestions for now
-                             if 'en' in DA_NANG_INFO[last_topic_category][last_topic_key]:
-                                display_topic_name = DA_NANG_INFO[last_topic_category][last_topic_key]['en'].split('.')[0] # Get first sentence as a name proxy
-                             else:
-                                 display_topic_name = last_topic_key.replace('_', ' ').title()
-                         elif last_topic_category == 'overview':
-                              display_topic_name = get_localized_text(user_id, 'overview').split('.')[0] # Use first sentence of overview
-                         elif last_topic_category == 'visiting_info':
-                              display_topic_name = get_localized_text(user_id, 'best_time_to_visit').split('.')[0] # Use first sentence of visiting info
-
-
-                         follow_up_response_parts = []
-
-                         if last_topic_category in ['places', 'surroundings']:
-                             # Suggest other places/surroundings and traditions/visiting info
-                             other_places_surroundings = [get_localized_text(user_id, k, last_topic_category).split('.')[0] for k in DA_NANG_INFO[last_topic_category].keys() if k != last_topic_key]
-                             if other_places_surroundings:
-                                 follow_up_response_parts.append(get_localized_text(user_id, 'other_related_places_surroundings', 'messages').format(topic=display_topic_name, items=', '.join(other_places_surroundings)))
-                             follow_up_response_parts.append(get_localized_text(user_id, 'ask_about_traditions_visiting', 'messages'))
-
-                         elif last_topic_category == 'traditions':
-                              # Suggest other traditions and places/surroundings/visiting info
-                             other_traditions = [get_localized_text(user_id, k, last_topic_category).split('.')[0] for k in DA_NANG_INFO[last_topic_category].keys() if k != last_topic_key]
-                             if other_traditions:
-                                 follow_up_response_parts.append(get_localized_text(user_id, 'other_related_traditions', 'messages').format(topic=display_topic_name, items=', '.join(other_traditions)))
-                             follow_up_response_parts.append(get_localized_text(user_id, 'ask_about_places_surroundings_visiting', 'messages'))
-
-                         elif last_topic_category == 'visiting_info':
-                             # Suggest places, traditions, surroundings
-                              follow_up_response_parts.append(get_localized_text(user_id, 'ask_about_places_traditions_surroundings_after_visiting', 'messages').format(topic=display_topic_name))
-
-                         elif last_topic_category == 'overview':
-                              # Suggest asking about places, traditions, surroundings, visiting info
-                               follow_up_response_parts.append(get_localized_text(user_id, 'ask_about_details_after_overview', 'messages').format(topic=display_topic_name))
-
-                         # Combine parts into a response
-                         if follow_up_response_parts:
-                             response_text = ".\n\n".join(follow_up_response_parts)
-                             # Embeds are not ideal for purely text responses, send as plain message
-                             await message.channel.send(response_text)
-                             logger.info(f"Responded to follow-up for {last_topic_key} with suggestions.")
-                             # Don't update last topic for generic follow-up suggestions
-                             return
-                         else:
-                              await message.channel.send(get_localized_text(user_id, 'generic_follow_up_fail', 'messages'))
-                              user_last_topic[user_id] = None # Clear last topic if follow-up failed
-                              return
-
-                    if not response_text:
-                        # Fallback if last topic category not found (shouldn't happen with current logic)
-                        await message.channel.send(get_localized_text(user_id, 'generic_follow_up_fail', 'messages'))
-                        user_last_topic[user_id] = None # Clear last topic
-                        return
-
-                 else:
-                    await message.channel.send(get_localized_text(user_id, 'no_last_topic_follow_up', 'messages'))
-                    user_last_topic[user_id] = None # Clear last topic
+        if is_follow_up:
+            # Handle follow-up based on last topic
+             last_topic_key = user_store.get_last_topic(user_id)
+             if last_topic_key:
+                # Top-level topics such as the overview are their own category
+                last_topic_category = knowledge_base.category_of(last_topic_key)
+
+                if last_topic_category:
+                     logger.info("Handling follow-up for last topic: %s (%s)", last_topic_key, last_topic_category)
+                     # Suggestions list the topic's first siblings in its category, in the user's language
+                     follow_up = knowledge_base.follow_up(last_topic_key, get_user_language(user_id))
+                     if follow_up:
+                         response_text = follow_up
+                         # Embeds are not ideal for purely text responses, send as plain message
+                         await send_reply('on_message', message.channel, response_text)
+                         logger.info("Responded to follow-up for %s with suggestions.", last_topic_key)
+                         # Don't update last topic for generic follow-up suggestions
+                         return
+                     else:
+                          await send_reply('on_message', message.channel, get_localized_text(user_id, 'generic_follow_up_fail', 'messages'))
+                          user_store.set_last_topic(user_id, None) # Clear last topic if follow-up failed
+                          return
+
+                if not response_text:
+                    # Fallback if last topic category not found (shouldn't happen with current logic)
+                    await send_reply('on_message', message.channel, get_localized_text(user_id, 'generic_follow_up_fail', 'messages'))
+                    user_store.set_last_topic(user_id, None) # Clear last topic
                     return
 
-            else:
-                # Process the new query for a specific topic or general info
-                topic_key, category = find_topic_in_query(query)
-
-                if topic_key:
-                    if category == 'places':
-                        try:
-                            place_info = await get_place_info(topic_key)
-                             # Use localized name for the embed title if available, otherwise fallback to English key title
-                            embed_title = get_localized_text(user_id, topic_key, category).split('.')[0] if get_localized_text(user_id, topic_key, category) != "Information not available." else topic_key.replace('_', ' ').title()
-
-                            embed = discord.Embed(
-                                title=embed_title,
-                                description=get_localized_text(user_id, topic_key, category),
-                                color=discord.Color.green()
-                            )
-                            if place_info and place_info['photo_url']:
-                                embed.set_image(url=place_info['photo_url'])
-                            if place_info and place_info['maps_url']:
-                                embed.add_field(
-                                    name=get_localized_text(user_id, 'location_field', 'messages'),
-                                    value=f"[View on Google Maps]({place_info['maps_url']})",
-                                    inline=False
-                                )
-                            
-                            # Safely add rating field if available from API
-                            if place_info and 'rating' in place_info and place_info['rating'] is not None:
-                                 rating_value = place_info['rating']
-                                 user_ratings_total = place_info.get('user_ratings_total')
-                                 rating_field_value = f"⭐ {rating_value}"
-                                 if user_ratings_total is not None:
-                                      rating_field_value += f" ({user_ratings_total} {get_localized_text(user_id, 'reviews_text', 'messages')})"
-                                 
-                                 embed.add_field(
-                                    name=get_localized_text(user_id, 'rating_field', 'messages'),
-                                    value=rating_field_value,
-                                    inline=True
-                                )
-
-                            await message.channel.send(embed=embed)
-                            logger.info(f"Responded to message '{query}' with place info for '{topic_key}'")
-                            user_last_topic[user_id] = topic_key # Store the last topic
-                            return # Stop processing after responding
-                        except Exception as e:
-                            logger.error(f"Error fetching place info for '{topic_key}' in on_message: {str(e)}")
-                            # Fallback to static data if API call fails
-                            response_text = get_localized_text(user_id, topic_key, category)
-                            title = get_localized_text(user_id, topic_key, category).split('.')[0] if response_text != "Information not available." else topic_key.replace('_', ' ').title()
-                            # Don't return here, proceed to send static info embed
-                    # Handle other categories
-                    elif category in ['traditions', 'surroundings', 'visiting_info', 'overview']:
-                         response_text = get_localized_text(user_id, topic_key, category)
-                         title = get_localized_text(user_id, topic_key, category).split('.')[0] if response_text != "Information not available." else topic_key.replace('_', ' ').title()
-                         # Don't return here, proceed to send info embed
-
-            # Send the embed for static/fallback info if response_text is set but hasn't been sent
-            if response_text:
-                 embed = discord.Embed(
-                    title=title,
-                    description=response_text,
-                    color=discord.Color.orange()
-                 )
-                 await message.channel.send(embed=embed)
-                 logger.info(f"Responded to message '{query}' with info for '{topic_key or title}'")
-                 if topic_key: user_last_topic[user_id] = topic_key # Store the last topic if a specific topic was found
-                 return # Stop processing after responding
-
-            else:
-                # No specific topic found, provide a general hint or fallback
-                # Avoid being too chatty with generic responses for now, unless it's a follow-up that couldn't be handled
-                if not is_follow_up:
-                    # Optional: Add a fallback response for general Da Nang mentions not matching a specific topic
-                    general_response = ( get_localized_text(user_id, 'general_intro', 'messages').format(mention=message.author.mention) +
-                        "\n\n" + get_localized_text(user_id, 'general_topics', 'messages') +
-                        "\n\n" + get_localized_text(user_id, 'use_danang_command_hint', 'messages')
-                    )
-                    await message.channel.send(general_response)
-                    logger.info(f"Responded to general Da Nang query: {query}")
-                    return # Stop processing after responding
-
-        # If not a potential Da Nang query, a handled follow-up, or a greeting/thank you, do nothing.
-
-@bot.command(name='language')
-async def set_language(ctx, lang_code=None):
+             else:
+                await send_reply('on_message', message.channel, get_localized_text(user_id, 'no_last_topic_follow_up', 'messages'))
+                user_store.set_last_topic(user_id, None) # Clear last topic
+                return
+
+        else:
+            # Process the new query for a specific topic or general info
+            topic_key, category = scan.topic if scan.topic else (None, None)
+
+            # "What's near My Khe Beach?": list the closest attractions instead of describing the place
+            if topic_key and scan.nearby and topic_location(topic_key):
+                await send_nearby_reply(
+                    'on_message', message.channel, user_id, topic_label(topic_key, get_user_language(user_id)),
+                    topic_location(topic_key), exclude=(topic_key,)
+                )
+                logger.info("Responded to message '%s' with attractions near '%s'", query, topic_key)
+                user_store.set_last_topic(user_id, topic_key)
+                return
+
+            if topic_key:
+                lang = get_user_language(user_id)
+                topic = knowledge_base.topic(topic_key)
+                if category == 'places':
+                    try:
+                        await send_place_reply('on_message', message.channel, user_id, topic)
+                        logger.info("Responded to message '%s' with place info for '%s'", query, topic_key)
+                        user_store.set_last_topic(user_id, topic_key) # Store the last topic
+                        return # Stop processing after responding
+                    except Exception as e:
+                        logger.error("Error fetching place info for '%s' in on_message: %s", topic_key, e)
+                        # Fallback to static data if API call fails
+                        response_text = topic.text(lang)
+                        title = topic.title(lang)
+                        # Don't return here, proceed to send static info embed
+                # Handle other categories
+                elif category in ['traditions', 'surroundings', 'visiting_info', 'overview']:
+                     response_text = topic.text(lang)
+                     title = topic.title(lang)
+                     # Don't return here, proceed to send info embed
+
+        # Send the embed for static/fallback info if response_text is set but hasn't been sent
+        if response_text:
+             embed = discord.Embed(
+                title=title,
+                description=response_text,
+                color=discord.Color.orange()
+             )
+             await send_reply('on_message', message.channel, embed=embed)
+             logger.info("Responded to message '%s' with info for '%s'", query, topic_key or title)
+             if topic_key: user_store.set_last_topic(user_id, topic_key) # Store the last topic if a specific topic was found
+             return # Stop processing after responding
+
+        else:
+            # No specific topic found, provide a general hint or fallback
+            # Avoid being too chatty with generic responses for now, unless it's a follow-up that couldn't be handled
+            if not is_follow_up:
+                # Optional: Add a fallback response for general Da Nang mentions not matching a specific topic
+                general_response = get_localized_text(user_id, 'general_response', 'messages').format(mention=message.author.mention)
+                await send_reply('on_message', message.channel, general_response)
+                logger.info("Responded to general Da Nang query: %s", query)
+                return # Stop processing after responding
+
+    # If not a potential Da Nang query, a handled follow-up, or a greeting/thank you, do nothing.
+
+@bot.hybrid_command(name='language')
+@app_commands.describe(lang_code='Language code')
+@app_commands.choices(lang_code=[
+    app_commands.Choice(name='English', value='en'),
+    app_commands.Choice(name='Tiếng Việt', value='vi')
+])
+async def set_language(ctx, lang_code: Optional[str] = None):
     """Sets the preferred language for bot responses (e.g., !language vi)."""
     user_id = ctx.author.id
-    supported_languages = ['en', 'vi'] # Define supported languages
+    supported_languages = SUPPORTED_LANGUAGES
 
     if lang_code is None:
-        current_lang = user_language.get(user_id, 'en')
+        current_lang = get_user_language(user_id)
         await ctx.send(f"Your current language preference is: {current_lang}. Supported languages are: {', '.join(supported_languages)}.")
         return
 
     if lang_code.lower() in supported_languages:
-        user_language[user_id] = lang_code.lower()
+        user_store.set_language(user_id, lang_code.lower())
         confirmation_message = {
             'en': f"Language set to English.",
             'vi': f"Đã đặt ngôn ngữ sang Tiếng Việt."
         }
         await ctx.send(confirmation_message.get(lang_code.lower(), confirmation_message['en']))
-        logger.info(f"User {ctx.author.name} set language to {lang_code.lower()}")
+        logger.info("User %s set language to %s", ctx.author.name, lang_code.lower())
     else:
         await ctx.send(f"Invalid language code. Supported languages are: {', '.join(supported_languages)}.")
 
 
-@bot.command(name='danang')
-async def da_nang(ctx):
-    """Show the Da Nang places dropdown menu"""
+@bot.hybrid_command(name='danang')
+@app_commands.describe(place='Show this place directly instead of the menu')
+async def da_nang(ctx, *, place: Optional[str] = None):
+    """Show the Da Nang places dropdown menu, or one place"""
+    if place:
+        await ctx.defer()
+        await answer_query(ctx, place, 'danang')
+        return
     try:
-        view = PlaceView()
+        view = bot.place_menus.view(get_user_language(ctx.author.id))
         await ctx.send(get_localized_text(ctx.author.id, 'select_place_prompt', 'messages'), view=view)
     except Exception as e:
-        logger.error(f"Error in da_nang command: {str(e)}")
+        logger.error("Error in da_nang command: %s", e)
         await ctx.send(get_localized_text(ctx.author.id, 'generic_error', 'messages'))
 
-@bot.command(name='askdanang')
-async def ask_danang(ctx, *args):
+@bot.hybrid_command(name='askdanang')
+@app_commands.rename(query='question')
+@app_commands.describe(query='Your question, or pick a topic')
+async def ask_danang(ctx, *, query: str = ''):
     """
     Ask a question about Da Nang.
     Example: !askdanang Tell me about Dragon Bridge
     """
-    user_id = ctx.author.id
-    query = " ".join(args).lower()
-    
+    query = query.lower()
     if not query:
-        await ctx.send(get_localized_text(user_id, 'ask_command_no_query', 'messages'))
+        await send_reply('askdanang', ctx, get_localized_text(ctx.author.id, 'ask_command_no_query', 'messages'))
         return
+    # Slash commands must be acknowledged within 3 seconds; a place lookup can take longer
+    await ctx.defer()
+    await answer_query(ctx, query, 'askdanang')
 
-    # Simple keyword matching for this command
+async def answer_query(ctx, query, handler):
+    """
+    Replies to a question with the best matching topic, or a hint if nothing matches.
+    Shared by !askdanang and !danang with a place.
+    """
+    user_id = ctx.author.id
+    query = query.lower()
+
+    # Exact topic names and aliases first, then misspelled names, then full-text search for free-form questions
     topic_key, category = find_topic_in_query(query)
+    if not topic_key:
+        match = resolve_topic(query)
+        if match:
+            (topic_key, category), confidence = match
+            logger.info("Resolved '%s' to %s (confidence %.2f)", query, topic_key, confidence)
+    if not topic_key:
+        with STAGE_SECONDS.time(handler=handler, stage='search'):
+            results = search_topics(query)
+        if results:
+            (topic_key, category), score = results[0]
+            logger.info("Search matched '%s' to %s (score %.2f)", query, topic_key, score)
     found_info = None
     title = None
 
+    if topic_key and topic_location(topic_key) and message_matcher.scan(query).nearby:
+        await send_nearby_reply(
+            handler, ctx, user_id, topic_label(topic_key, get_user_language(user_id)),
+            topic_location(topic_key), exclude=(topic_key,)
+        )
+        logger.info("Responded to !%s '%s' with attractions near '%s'", handler, query, topic_key)
+        user_store.set_last_topic(user_id, topic_key)
+        return
+
     if topic_key:
+        lang = get_user_language(user_id)
+        topic = knowledge_base.topic(topic_key)
         if category == 'places':
             try:
-                place_info = await get_place_info(topic_key)
-                 # Use localized name for the embed title if available, otherwise fallback to English key title
-                embed_title = get_localized_text(user_id, topic_key, category).split('.')[0] if get_localized_text(user_id, topic_key, category) != "Information not available." else topic_key.replace('_', ' ').title()
-
-                embed = discord.Embed(
-                    title=embed_title,
-                    description=get_localized_text(user_id, topic_key, category),
-                    color=discord.Color.green() 
-                )
-                if place_info and place_info['photo_url']:
-                    embed.set_image(url=place_info['photo_url'])
-                if place_info and place_info['maps_url']:
-                    embed.add_field(
-                        name=get_localized_text(user_id, 'location_field', 'messages'),
-                        value=f"[View on Google Maps]({place_info['maps_url']})",
-                        inline=False
-                    )
-                
-                rating = place_info.get('rating')
-                user_ratings_total = place_info.get('user_ratings_total')
-                if rating is not None and user_ratings_total is not None:
-                                 embed.add_field(
-                                    name=get_localized_text(user_id, 'rating_field', 'messages'),
-                                    value=f"⭐ {rating} ({user_ratings_total} {get_localized_text(user_id, 'reviews_text', 'messages')})",
-                                    inline=True
-                                )
-                elif rating is not None:
-                                 embed.add_field(
-                                    name=get_localized_text(user_id, 'rating_field', 'messages'),
-                                    value=f"⭐ {rating}",
-                                    inline=True
-                                )
-
-                await ctx.send(embed=embed)
-                logger.info(f"Responded to !askdanang '{query}' with place info for '{topic_key}'")
-                user_last_topic[user_id] = topic_key # Store the last topic
+                await send_place_reply(handler, ctx, user_id, topic)
+                logger.info("Responded to !%s '%s' with place info for '%s'", handler, query, topic_key)
+                user_store.set_last_topic(user_id, topic_key) # Store the last topic
                 return
             except Exception as e:
-                logger.error(f"Error fetching place info for '{topic_key}' in askdanang command: {str(e)}")
+                logger.error("Error fetching place info for '%s' in %s command: %s", topic_key, handler, e)
                 # Fallback to static data if API call fails
-                found_info = get_localized_text(user_id, topic_key, category)
-                title = get_localized_text(user_id, topic_key, category).split('.')[0] if found_info != "Information not available." else topic_key.replace('_', ' ').title()
+                found_info = topic.text(lang)
+                title = topic.title(lang)
 
-        # Handle other categories for askdanang command
+        # Handle other categories
         elif category in ['traditions', 'surroundings', 'visiting_info', 'overview']:
-             found_info = get_localized_text(user_id, topic_key, category)
-             title = get_localized_text(user_id, topic_key, category).split('.')[0] if found_info != "Information not available." else topic_key.replace('_', ' ').title()
+             found_info = topic.text(lang)
+             title = topic.title(lang)
 
     if found_info:
         embed = discord.Embed(
@@ -496,13 +589,157 @@ async def ask_danang(ctx, *args):
             description=found_info,
             color=discord.Color.orange() 
         )
-        await ctx.send(embed=embed)
-        logger.info(f"Responded to !askdanang '{query}' with info for '{topic_key or title}'")
-        if topic_key: user_last_topic[user_id] = topic_key # Store the last topic if a specific topic was found
+        await send_reply(handler, ctx, embed=embed)
+        logger.info("Responded to !%s '%s' with info for '%s'", handler, query, topic_key or title)
+        if topic_key: user_store.set_last_topic(user_id, topic_key) # Store the last topic if a specific topic was found
     else:
-        await ctx.send(get_localized_text(user_id, 'ask_command_no_info', 'messages').format(command='`!danang`'))
-        logger.warning(f"No info found for !askdanang query: '{query}'")
-        user_last_topic[user_id] = None # Clear last topic if query wasn't understood
+        await send_reply(handler, ctx, get_localized_text(user_id, 'ask_command_no_info', 'messages').format(command='`!danang`'))
+        logger.warning("No info found for !%s query: '%s'", handler, query)
+        user_store.set_last_topic(user_id, None) # Clear last topic if query wasn't understood
+
+# Optional radius in a !nearby query, e.g. '2km' or '1.5 km'
+RADIUS_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*km\b')
+
+@bot.hybrid_command(name='nearby')
+@app_commands.describe(place='A place, or coordinates like 16.06, 108.22; add e.g. 2km to limit the distance')
+async def nearby(ctx, *, place: str = ''):
+    """
+    List the attractions closest to a place or to coordinates.
+    Example: !nearby my khe beach 3km
+    """
+    user_id = ctx.author.id
+    query = place.lower()
+    radius_km = None
+    match = RADIUS_PATTERN.search(query)
+    if match:
+        radius_km = float(match.group(1))
+        query = query[:match.start()] + query[match.end():]
+
+    coordinates = parse_coordinates(query)
+    if coordinates:
+        origin, location, exclude = f"{coordinates[0]:.4f}, {coordinates[1]:.4f}", coordinates, ()
+    else:
+        topic_key, _ = find_topic_in_query(query)
+        if not topic_key:
+            resolved = resolve_topic(query)
+            topic_key = resolved[0][0] if resolved else None
+        location = topic_location(topic_key) if topic_key else None
+        if location is None:
+            # "Near me" needs coordinates: Discord does not share the user's location
+            await send_reply('nearby', ctx, get_localized_text(user_id, 'nearby_needs_place', 'messages'))
+            return
+        origin, exclude = topic_label(topic_key, get_user_language(user_id)), (topic_key,)
+
+    await send_nearby_reply('nearby', ctx, user_id, origin, location, radius_km=radius_km, exclude=exclude)
+    logger.info("Responded to !nearby '%s' with attractions near %s", query, origin)
+
+# Separators between the places of an itinerary
+STOP_SEPARATOR = re.compile(r'[,;\n]|\s(?:and|then|và|->|→)\s')
+
+def itinerary_stops(query):
+    """
+    Resolves the places named in an itinerary query, in the order given.
+    Returns (keys with coordinates, labels of topics without coordinates).
+    """
+    keys = []
+    for part in STOP_SEPARATOR.split(query):
+        found = message_matcher.scan(part).topics
+        if not found:
+            resolved = resolve_topic(part)
+            found = [resolved[0]] if resolved else []
+        keys.extend(key for key, _ in found if key not in keys)
+    located = [key for key in keys if topic_location(key)]
+    return located[:ITINERARY_MAX_STOPS], [key for key in keys if key not in located]
+
+def format_minutes(minutes):
+    """Formats a duration for display, e.g. '25 min', '3 h' or '1 h 10 min'."""
+    hours, minutes = divmod(int(round(minutes)), 60)
+    if not hours:
+        return f"{minutes} min"
+    return f"{hours} h {minutes} min" if minutes else f"{hours} h"
+
+@bot.hybrid_command(name='itinerary')
+@app_commands.describe(places='Places separated by commas; add a day (saturday, weekend) or a start time (from 9:00)')
+async def itinerary(ctx, *, places: str = ''):
+    """
+    Plan the shortest visiting order for several places.
+    Example: !itinerary marble mountains, hoi an, dragon bridge, han market on the weekend
+    """
+    user_id = ctx.author.id
+    query = places.lower()
+    keys, skipped = itinerary_stops(query)
+    if len(keys) < 2:
+        await send_reply('itinerary', ctx, get_localized_text(user_id, 'itinerary_needs_places', 'messages'))
+        return
+
+    lang = get_user_language(user_id)
+    day, start = parse_schedule(query)
+    with STAGE_SECONDS.time(handler='itinerary', stage='plan'):
+        plan = plan_itinerary(keys, day, start)
+
+    lines = []
+    for rank, (stop, km, begin, wait, late) in enumerate(
+        zip(plan.stops, plan.legs, plan.starts, plan.waits, plan.late), 1
+    ):
+        line = f"**{rank}.** {format_clock(begin)} · {topic_label(stop.key, lang)} ({format_minutes(stop.minutes)})"
+        notes = []
+        if km:
+            notes.append(format_distance(km))
+        if wait >= 1:
+            notes.append(get_localized_text(user_id, 'itinerary_wait', 'messages').format(duration=format_minutes(wait)))
+        if late is not None:
+            notes.append('⚠️ ' + get_localized_text(user_id, 'itinerary_late', 'messages').format(time=format_clock(late)))
+        if notes:
+            line += ' — ' + ', '.join(notes)
+        lines.append(line)
+    lines.append('')
+    lines.append(get_localized_text(user_id, 'itinerary_total', 'messages').format(
+        distance=format_distance(plan.total_km),
+        duration=format_minutes(travel_minutes(plan.total_km)),
+        finish=format_clock(plan.finish)
+    ))
+    if skipped:
+        lines.append(get_localized_text(user_id, 'itinerary_skipped', 'messages').format(
+            places=', '.join(topic_label(key, lang) for key in skipped)
+        ))
+    day_name = get_localized_text(user_id, 'weekdays', 'messages').split(', ')[day]
+    embed = discord.Embed(
+        title=get_localized_text(user_id, 'itinerary_title', 'messages').format(day=day_name),
+        description='\n'.join(lines),
+        color=discord.Color.blue()
+    )
+    await send_reply('itinerary', ctx, embed=embed)
+    logger.info("Responded to !itinerary '%s' with a %d-stop plan (%.1f km)", query, len(keys), plan.total_km)
+
+async def interaction_language(interaction):
+    """Returns the preferred language of the user behind an interaction."""
+    await user_store.ensure_loaded(interaction.user.id)
+    return get_user_language(interaction.user.id)
+
+@da_nang.autocomplete('place')
+async def place_autocomplete(interaction, current):
+    """Suggests places matching what the user has typed so far."""
+    lang = await interaction_language(interaction)
+    with STAGE_SECONDS.time(handler='autocomplete', stage='suggest'):
+        suggestions = suggest_places(current, lang)
+    return [app_commands.Choice(name=label, value=key) for label, key in suggestions]
+
+@ask_danang.autocomplete('query')
+async def topic_autocomplete(interaction, current):
+    """Suggests topics matching what the user has typed so far; free-form questions are still accepted."""
+    lang = await interaction_language(interaction)
+    with STAGE_SECONDS.time(handler='autocomplete', stage='suggest'):
+        suggestions = suggest_topics(current, lang)
+    return [app_commands.Choice(name=label, value=key) for label, key in suggestions]
+
+@nearby.autocomplete('place')
+async def nearby_autocomplete(interaction, current):
+    """Suggests topics with a known location matching what the user has typed so far."""
+    lang = await interaction_language(interaction)
+    with STAGE_SECONDS.time(handler='autocomplete', stage='suggest'):
+        # Filtered inside the index, so topics without a location do not use up the 25 choices
+        suggestions = suggest_topics(current, lang, topic_location)
+    return [app_commands.Choice(name=label, value=key) for label, key in suggestions]
 
 @bot.command(name='help_danang')
 async def help_danang(ctx):
@@ -511,20 +748,37 @@ async def help_danang(ctx):
     help_text = get_localized_text(user_id, 'help_message', 'messages').format(
         command_danang = '`!danang`',
         command_askdanang = '`!askdanang [your question]`',
+        command_nearby = '`!nearby [place]`',
+        command_itinerary = '`!itinerary [place, place, ...]`',
         command_language = '`!language [en|vi]`'
     )
     try:
         await ctx.send(help_text)
     except Exception as e:
-        logger.error(f"Error in help_danang command: {str(e)}")
+        logger.error("Error in help_danang command: %s", e)
         await ctx.send(get_localized_text(user_id, 'generic_error', 'messages'))
 
+@bot.command(name='reload_content', hidden=True)
+@commands.is_owner()
+async def reload_content(ctx):
+    """Reload the knowledge base content pack now (bot owner only)."""
+    try:
+        await content_store.reload(force=True)
+    except ContentPackError as e:
+        logger.error("%s", e)
+        await ctx.send(f"Content pack rejected, still serving version {content_store.pack.version}:\n" + '\n'.join(f"- {error}" for error in e.errors[:10]))
+        return
+    await ctx.send(f"Content pack version {content_store.pack.version} loaded.")
+    logger.info("User %s reloaded content pack version %s", ctx.author.name, content_store.pack.version)
+
+startup_timer.mark('imports')
+
 def main():
     """Main function to run the bot."""
     try:
         bot.run(TOKEN) 
     except Exception as e:
-        logger.error(f"Failed to start bot: {str(e)}")
+        logger.error("Failed to start bot: %s", e)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
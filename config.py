@@ -8,162 +8,149 @@ load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 COMMAND_PREFIX = '!'
+# Privileged intent needed for prefix commands and free-text replies in guilds; slash commands work without it
+MESSAGE_CONTENT_INTENT = os.getenv('MESSAGE_CONTENT_INTENT', '1') == '1'
+# Hash of the last synced application commands; the tree is only re-synced when it changes
+COMMAND_SYNC_STATE_PATH = os.getenv('COMMAND_SYNC_STATE_PATH', os.path.join('data', 'command_tree.sha256'))
+
+# Logging Configuration
+LOG_FILE = 'bot.log'
+LOG_ASYNC = os.getenv('LOG_ASYNC', '1') == '1'  # write logs from a background thread
+LOG_QUEUE_SIZE = 10000  # records buffered for the background writer
+LOG_QUEUE_POLICY = 'drop'  # 'drop' or 'block' when the buffer is full
+LOG_JSON = os.getenv('LOG_JSON', '0') == '1'  # one JSON object per line
+LOG_SAMPLE_RATES = {'utils.places': 0.1}  # logger name -> fraction of INFO records kept
+LOKI_URL = os.getenv('LOKI_URL')  # optional Grafana Loki push endpoint
+
+# Free-text Listener Configuration (replies to messages that are not commands)
+# (replies, per seconds) allowed for each user, channel and guild
+FREE_TEXT_USER_RATE = (3, 10.0)
+FREE_TEXT_CHANNEL_RATE = (10, 10.0)
+FREE_TEXT_GUILD_RATE = (30, 10.0)
+FREE_TEXT_DUPLICATE_WINDOW = 5  # seconds during which identical messages in a channel get one reply
+# Comma-separated channel IDs; when set, free-text replies only happen in these channels
+FREE_TEXT_CHANNEL_ALLOWLIST = {
+    int(channel_id) for channel_id in os.getenv('FREE_TEXT_CHANNEL_ALLOWLIST', '').split(',') if channel_id.strip()
+}
+
+# Photo Cache Configuration (place photos are downloaded once and uploaded to Discord)
+PHOTO_CACHE_DIR = os.getenv('PHOTO_CACHE_DIR', os.path.join('data', 'photos'))
+PHOTO_CACHE_MAX_BYTES = 200 * 1024 * 1024  # least recently used photos are deleted beyond this
+PHOTO_MAX_WIDTH = 400  # pixels, requested from the Places photo endpoint
+PHOTO_MAX_DOWNLOAD_BYTES = 8 * 1024 * 1024  # larger photos are skipped (Discord upload limits)
+PHOTO_CDN_URL_MARGIN = 3600  # seconds before a Discord CDN URL expires that it stops being reused
+
+# Place Reply Configuration
+# Seconds to wait for Places data before sending the static description and editing the details in later
+PLACE_REPLY_BUDGET = float(os.getenv('PLACE_REPLY_BUDGET', '0.15'))
+
+# Reactions added to place replies
+REACTION_EMOJIS = ["🔥", "❤️", "😋"]
+
+# Outbound Scheduler Configuration (deferred reactions, secondary sends and edits)
+# Route -> (requests, per seconds), matching Discord's per-channel route limits
+OUTBOUND_RATE_LIMITS = {
+    'reaction': (1, 0.25),
+    'send': (5, 5.0),
+    'edit': (5, 5.0)
+}
+OUTBOUND_MAX_QUEUE = 100  # queued actions per route and channel before new ones are dropped
+
+# Metrics Configuration (Prometheus /metrics endpoint, disabled unless METRICS_PORT is set)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Language Configuration
+SUPPORTED_LANGUAGES = ['en', 'vi']
+DEFAULT_LANGUAGE = 'en'
 
 # API Configuration
 GOOGLE_PLACES_API_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
 GOOGLE_PLACES_PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo"
+GOOGLE_PLACES_DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
+# Field mask for Place Details: only what the embeds show (Contact/Atmosphere fields are billed extra)
+PLACE_DETAILS_FIELDS = [
+    'place_id', 'name', 'formatted_address', 'geometry/location', 'photo',
+    'rating', 'user_ratings_total', 'formatted_phone_number', 'website', 'opening_hours'
+]
+DETAILS_CONCURRENCY = 4  # concurrent Place Details requests when enriching several places
+ENRICHMENT_MAX_ATTEMPTS = 3  # Place Details enrichments queued per place before giving up until CACHE_TTL passes
+
+# HTTP Client Configuration (shared pooled session for the Places API)
+HTTP_CONNECTION_LIMIT = 20  # total open connections
+HTTP_CONNECTION_LIMIT_PER_HOST = 10
+HTTP_DNS_CACHE_TTL = 300  # seconds
+HTTP_KEEPALIVE_TIMEOUT = 30  # seconds an idle connection is kept open
+HTTP_CONNECT_TIMEOUT = 3  # seconds
+HTTP_REQUEST_TIMEOUT = 8  # total seconds per request
 
 # Cache Configuration
-CACHE_TTL = 3600  # 1 hour in seconds
-
-# Da Nang Information (Supports English and Vietnamese)
-DA_NANG_INFO = {
-    'overview': {
-        'en': (
-            'Da Nang is the fourth largest city in Vietnam, located on the coast of the East Sea at the mouth of the Han River.'
-            ' It is a major port city in Central Vietnam and one of five centrally-governed municipalities.'
-            ' Da Nang is situated almost equidistant from Hanoi and Ho Chi Minh City and serves as the hub for three UNESCO World Heritage sites:'
-            ' the Complex of Hue Monuments, Hoi An Ancient Town, and My Son Sanctuary.'
-        ),
-        'vi': (
-            'Đà Nẵng là thành phố lớn thứ 4 ở Việt Nam, nằm trên bờ Biển Đông có cửa sông Hàn.'
-            ' Đây là một trong những thành phố cảng có vị trí chiến lược của miền Trung Việt Nam và là một trong 5 thành phố trực thuộc Trung ương.'
-            ' Đà Nẵng nằm ở trung độ đất nước, trên trục giao thông Bắc – Nam và là trung tâm của 3 di sản văn hóa thế giới:'
-            ' Cố đô Huế, phố cổ Hội An và thánh địa Mỹ Sơn.'
-        )
-    },
-    'places': {
-        'marble_mountains': {
-            'en': 'The Marble Mountains (Ngu Hanh Son) are five limestone hills named after the five elements. They feature caves, temples, and panoramic views of Da Nang.',
-            'vi': 'Ngũ Hành Sơn (hay Núi Non Nước) là quần thể gồm 5 ngọn núi đá vôi được đặt tên theo ngũ hành. Nơi đây có nhiều hang động, chùa chiền và tầm nhìn toàn cảnh Đà Nẵng.'
-        },
-        'dragon_bridge': {
-            'en': 'The Dragon Bridge is a modern architectural marvel that spans the Han River. It breathes fire and water every weekend night.',
-            'vi': 'Cầu Rồng là một biểu tượng kiến trúc hiện đại bắc qua sông Hàn. Cầu phun lửa và phun nước vào các tối cuối tuần.'
-        },
-        'my_khe_beach': {
-            'en': 'My Khe Beach is known as one of the most beautiful beaches in Vietnam, famous for its white sand and clear water.',
-            'vi': 'Biển Mỹ Khê được mệnh danh là một trong những bãi biển đẹp nhất Việt Nam, nổi tiếng với bờ cát trắng mịn và làn nước trong xanh.'
-        },
-        'lady_buddha': {
-            'en': 'The Lady Buddha statue at Linh Ung Pagoda is the tallest Buddha statue in Vietnam, standing at 67 meters.',
-            'vi': 'Tượng Phật Bà Quan Âm tại Chùa Linh Ứng là tượng Phật cao nhất Việt Nam, cao 67 mét.'
-        },
-        'han_market': {
-            'en': 'Han Market is a traditional market offering local food, souvenirs, and a glimpse into daily life in Da Nang.',
-            'vi': 'Chợ Hàn là một khu chợ truyền thống bày bán các món ăn địa phương, quà lưu niệm và mang đến cái nhìn về đời sống hàng ngày tại Đà Nẵng.'
-        }
-    },
-    'traditions': {
-        'festivals': {
-            'en': 'Da Nang hosts several festivals including the International Fireworks Festival and the Quan The Am Festival.',
-            'vi': 'Đà Nẵng tổ chức nhiều lễ hội như Lễ hội Pháo hoa Quốc tế và Lễ hội Quán Thế Âm.'
-        },
-        'cuisine': {
-            'en': 'Famous local dishes include Mi Quang (turmeric noodles), Banh Xeo (savory pancakes), and fresh seafood.',
-            'vi': 'Các món ăn địa phương nổi tiếng gồm Mì Quảng, Bánh Xèo và hải sản tươi sống.'
-        },
-        'crafts': {
-            'en': 'Traditional crafts include stone carving in Non Nuoc village and fishing net making.',
-            'vi': 'Các nghề thủ công truyền thống gồm điêu khắc đá Non Nước và làm lưới đánh cá.'
-        }
-    },
-    'surroundings': {
-        'hoi_an': {
-            'en': 'Hoi An Ancient Town is a UNESCO World Heritage site known for its well-preserved architecture, custom tailoring, and lantern-lit streets. It\'s about 30 km south of Da Nang.',
-            'vi': 'Phố cổ Hội An là Di sản Văn hóa Thế giới được UNESCO công nhận, nổi tiếng với kiến trúc cổ kính được bảo tồn tốt, nghề may đo truyền thống và những con phố đèn lồng lung linh. Nơi đây cách Đà Nẵng khoảng 30 km về phía Nam.'
-        },
-        'hue': {
-            'en': 'Hue is the former imperial capital of Vietnam, located about 100 km north of Da Nang. It\'s famous for its historic citadel, palaces, and tombs.',
-            'vi': 'Huế là cố đô xưa của Việt Nam, cách Đà Nẵng khoảng 100 km về phía Bắc. Huế nổi tiếng với Kinh thành, cung điện và lăng tẩm mang đậm dấu ấn lịch sử.'
-        },
-        'my_son': {
-            'en': 'My Son Sanctuary is a complex of ancient Hindu temples constructed by the Champa Kingdom. It\'s a UNESCO World Heritage site located about 70 km southwest of Da Nang.',
-            'vi': 'Thánh địa Mỹ Sơn là một quần thể kiến trúc đền thờ Ấn Độ giáo cổ xưa của Vương quốc Chăm Pa. Đây là Di sản Văn hóa Thế giới được UNESCO công nhận, nằm cách Đà Nẵng khoảng 70 km về phía Tây Nam.'
-        }
-    },
-    'visiting_info': {
-        'best_time_to_visit': {
-            'en': 'The best time to visit Da Nang is generally from March to May and September to October. The weather is pleasant, with less rain and comfortable temperatures. The summer months (June to August) are hot and humid but popular for beach activities. The rainy season is typically from November to February.',
-            'vi': 'Thời điểm tốt nhất để du lịch Đà Nẵng thường là từ tháng 3 đến tháng 5 và từ tháng 9 đến tháng 10. Thời tiết lúc này dễ chịu, ít mưa và nhiệt độ thoải mái. Các tháng mùa hè (tháng 6 đến tháng 8) nóng và ẩm nhưng thích hợp cho các hoạt động biển. Mùa mưa thường kéo dài từ tháng 11 đến tháng 2.'
-        }
-    },
-    'messages': {
-        'select_place_prompt': {
-            'en': 'Please select a place in Da Nang to learn more about it:',
-            'vi': 'Vui lòng chọn một địa điểm ở Đà Nẵng để tìm hiểu thêm:'
-        },
-        'location_field': {
-            'en': 'Location',
-            'vi': 'Vị trí'
-        },
-        'rating_field': {
-            'en': 'Rating',
-            'vi': 'Đánh giá'
-        },
-        'reviews_text': {
-            'en': 'reviews',
-            'vi': 'đánh giá'
-        },
-        'general_intro': {
-            'en': 'Hello {mention}! I can help you explore Da Nang.',
-            'vi': 'Xin chào {mention}! Tôi có thể giúp bạn khám phá Đà Nẵng.'
-        },
-        'general_topics': {
-            'en': 'You can ask me about:\n• Places to visit\n• Local traditions\n• Best time to visit\n• Surrounding attractions',
-            'vi': 'Bạn có thể hỏi tôi về:\n• Các địa điểm tham quan\n• Truyền thống địa phương\n• Thời điểm tốt nhất để thăm\n• Các điểm tham quan lân cận'
-        },
-        'use_danang_command_hint': {
-            'en': 'Or use `!danang` to see a menu of popular places!',
-            'vi': 'Hoặc sử dụng `!danang` để xem menu các địa điểm phổ biến!'
-        },
-        'ask_command_no_query': {
-            'en': 'Please provide a question about Da Nang. For example: "Tell me about Dragon Bridge"',
-            'vi': 'Vui lòng đặt câu hỏi về Đà Nẵng. Ví dụ: "Kể cho tôi nghe về Cầu Rồng"'
-        },
-        'ask_command_no_info': {
-            'en': 'I couldn\'t find specific information about that. Try using {command} to see available places!',
-            'vi': 'Tôi không tìm thấy thông tin cụ thể về điều đó. Hãy thử sử dụng {command} để xem các địa điểm có sẵn!'
-        },
-        'generic_error': {
-            'en': 'Sorry, something went wrong. Please try again later.',
-            'vi': 'Xin lỗi, đã xảy ra lỗi. Vui lòng thử lại sau.'
-        },
-        'help_message': {
-            'en': 'Here are the available commands:\n\n{command_danang} - Show the interactive place selection menu\n{command_askdanang} - Ask a question about Da Nang\n{command_language} - Set your preferred language (English or Vietnamese)',
-            'vi': 'Đây là các lệnh có sẵn:\n\n{command_danang} - Hiển thị menu chọn địa điểm tương tác\n{command_askdanang} - Đặt câu hỏi về Đà Nẵng\n{command_language} - Đặt ngôn ngữ ưa thích của bạn (Tiếng Anh hoặc Tiếng Việt)'
-        },
-        'other_related_places_surroundings': {
-            'en': 'Other places you might be interested in: {items}',
-            'vi': 'Các địa điểm khác bạn có thể quan tâm: {items}'
-        },
-        'ask_about_traditions_visiting': {
-            'en': 'Would you like to know about local traditions or the best time to visit?',
-            'vi': 'Bạn có muốn biết về truyền thống địa phương hoặc thời điểm tốt nhất để thăm không?'
-        },
-        'other_related_traditions': {
-            'en': 'Other traditions you might be interested in: {items}',
-            'vi': 'Các truyền thống khác bạn có thể quan tâm: {items}'
-        },
-        'ask_about_places_surroundings_visiting': {
-            'en': 'Would you like to know about other places, surrounding attractions, or the best time to visit?',
-            'vi': 'Bạn có muốn biết về các địa điểm khác, các điểm tham quan lân cận hoặc thời điểm tốt nhất để thăm không?'
-        },
-        'ask_about_places_traditions_surroundings_after_visiting': {
-            'en': 'Would you like to know about specific places, traditions, or surrounding attractions?',
-            'vi': 'Bạn có muốn biết về các địa điểm cụ thể, truyền thống hoặc các điểm tham quan lân cận không?'
-        },
-        'ask_about_details_after_overview': {
-            'en': 'Would you like to know about specific places, traditions, surrounding attractions, or the best time to visit?',
-            'vi': 'Bạn có muốn biết về các địa điểm cụ thể, truyền thống, các điểm tham quan lân cận hoặc thời điểm tốt nhất để thăm không?'
-        },
-        'generic_follow_up_fail': {
-            'en': 'I\'m not sure what else to tell you about that. Try asking about something else!',
-            'vi': 'Tôi không chắc chắn còn điều gì khác để nói về điều đó. Hãy thử hỏi về điều khác!'
-        },
-        'no_last_topic_follow_up': {
-            'en': 'I\'m not sure what you\'d like to know more about. Try asking about a specific place or topic!',
-            'vi': 'Tôi không chắc chắn bạn muốn biết thêm về điều gì. Hãy thử hỏi về một địa điểm hoặc chủ đề cụ thể!'
-        }
-    }
-}
\ No newline at end of file
+CACHE_TTL = 3600  # 1 hour in seconds; entries younger than this are fresh
+CACHE_STALE_TTL = 7 * 24 * 3600  # 1 week; older-than-fresh entries are served while refreshing
+PLACE_CACHE_DB_PATH = os.getenv('PLACE_CACHE_DB_PATH', os.path.join('data', 'place_cache.sqlite3'))
+PLACE_CACHE_PURGE_INTERVAL = 24 * 3600  # seconds between deletions of on-disk records older than CACHE_STALE_TTL
+NEGATIVE_CACHE_TTL = 120  # seconds to remember "no result"/error responses
+
+# User Store Configuration (per-user language and last topic)
+USER_STORE_DB_PATH = os.getenv('USER_STORE_DB_PATH', os.path.join('data', 'users.sqlite3'))
+USER_STORE_MAX_USERS = 10000  # users kept in memory (least recently active are evicted)
+USER_STORE_IDLE_TTL = 6 * 3600  # seconds of inactivity before a user is evicted from memory
+USER_STORE_FLUSH_INTERVAL = 5  # seconds between batched writes to disk
+
+# Warm-up Configuration (prefetch known places at startup and refresh before expiry)
+WARMUP_CONCURRENCY = 4  # concurrent Places requests during warm-up/refresh
+REFRESH_MARGIN = 0.1  # refresh when this fraction of CACHE_TTL remains
+REFRESH_JITTER = 60  # seconds of random spread between refreshes
+REFRESH_RETRY_DELAY = 30  # seconds before retrying a place whose refresh failed or fell back to static data
+
+# Circuit Breaker Configuration (Places API)
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures before the breaker opens
+BREAKER_RECOVERY_TIMEOUT = 30  # seconds before a trial request is allowed
+
+# Message Classification Keywords (matched as lowercase whole words or phrases)
+GREETING_PHRASES = ['hi', 'hello', 'hey', 'yo', 'sup', '안녕', '안녕하세요', 'xin chào']  # only at the start of a message
+THANK_YOU_PHRASES = ['thank you', 'thanks', 'have a nice day', 'good day', 'cheers', 'you can take a rest now']
+DANANG_KEYWORDS = [
+    'da nang', 'danang', 'place', 'tradition', 'cuisine', 'festival', 'beach', 'bridge', 'mountain', 'market',
+    'buddha', 'thing', 'what', 'where', 'tell', 'show', 'info', 'about', 'know', 'visit', 'see', 'eat', 'around',
+    'nearby', 'surrounding', 'time to visit', 'season', 'weather', 'when to go', 'overview', 'general info',
+    'information'
+]
+FOLLOW_UP_PHRASES = ['anything else', 'tell me more', 'more info', 'other', 'next']
+NEARBY_PHRASES = ['near', 'close to', 'around', 'gần', 'quanh']  # "what's near My Khe Beach"
+
+# Knowledge Base Configuration
+# Topics, messages, aliases and place labels live in a versioned JSON content pack (see utils/content.py)
+CONTENT_PACK_PATH = os.getenv(
+    'CONTENT_PACK_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content', 'danang.json')
+)
+CONTENT_RELOAD_INTERVAL = 10  # seconds between checks of the pack's mtime; 0 disables automatic reload
+FOLLOW_UP_MAX_SIBLINGS = 10  # related topics listed in a follow-up suggestion
+
+# Full-text Search Configuration (BM25 over every topic, used when no topic name appears in a question)
+SEARCH_TOP_K = 3  # results returned per query
+SEARCH_MIN_SCORE = 1.5  # weaker matches are treated as "no answer"
+SEARCH_MIN_IDF_SHARE = 0.5  # share of a question's term weight (idf) a topic must contain to answer it
+SEARCH_MAX_POSTINGS = 250  # highest-weighted documents kept per term; bounds query time on large indexes
+
+# Fuzzy Name Matching Configuration (typo-tolerant fallback when no topic name matches exactly)
+FUZZY_MIN_CONFIDENCE = 0.8  # 1 - edit distance / name length
+FUZZY_MIN_NAME_LENGTH = 5  # shorter names and words are only matched exactly
+FUZZY_MAX_QUERY_WORDS = 12  # longer messages are not searched for misspelled names
+FUZZY_MAX_CANDIDATES = 32  # names compared by edit distance per query, most trigrams in common first
+
+# Nearby Attractions Configuration (spatial index over the content pack's locations and Places coordinates)
+GEO_LEAF_SIZE = 8  # points per k-d tree leaf
+GEO_REBUILD_AFTER = 64  # points added or moved at runtime (from Places results) before the tree is rebuilt
+NEARBY_RESULTS = 5  # attractions listed per "near X" query
+NEARBY_MAX_RADIUS_KM = 200  # largest radius a !nearby query may ask for
+
+# Itinerary Planner Configuration (!itinerary)
+DISTANCE_MATRIX_DB_PATH = os.getenv('DISTANCE_MATRIX_DB_PATH', os.path.join('data', 'distances.sqlite3'))
+ITINERARY_MAX_STOPS = 50  # places per plan
+ITINERARY_START = '08:00'  # default start time (local time); plans for today start no earlier than now
+ITINERARY_SPEED_KMH = 25  # average door-to-door speed by car or taxi
+ITINERARY_ROAD_FACTOR = 1.3  # road distance / straight-line distance
+ITINERARY_DWELL_MINUTES = 60  # visit length for topics without one in the content pack
+TIMEZONE_OFFSET_HOURS = 7  # Da Nang local time is UTC+7 all year
@@ -0,0 +1,147 @@
+import bisect
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from config import SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE
+from utils.content import ContentPack, content_store
+from utils.knowledge import knowledge_for
+from utils.search import fold
+
+# Discord shows at most 25 autocomplete choices, each at most 100 characters
+MAX_CHOICES = 25
+MAX_CHOICE_TEXT = 100
+
+class PrefixIndex:
+    """
+    Sorted prefix index for autocomplete.
+
+    Every word position of every searchable name is a key, folded like the
+    search index ('cầu rồng' -> 'cau rong', also 'rong'), so typing the start
+    of any word finds the entry. Keys starting a name and keys starting a
+    later word are kept apart, so whole-name matches can be ranked first: a
+    lookup is a binary search and a scan over the matching keys of each,
+    stopping once enough entries are found.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, Iterable[str]]]):
+        """
+        Args:
+            entries (Iterable[Tuple[str, str, Iterable[str]]]): (label, value, searchable names),
+                in the order they are suggested for an empty prefix
+        """
+        self.entries: List[Tuple[str, str]] = []
+        name_keys = set()
+        word_keys = set()
+        for entry_id, (label, value, names) in enumerate(entries):
+            self.entries.append((label[:MAX_CHOICE_TEXT], value))
+            for name in (label, *names):
+                words = fold(name).replace('_', ' ').split()
+                for start in range(len(words)):
+                    (word_keys if start else name_keys).add((' '.join(words[start:]), entry_id))
+        self.name_keys = sorted(name_keys)
+        self.word_keys = sorted(word_keys)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _scan(
+        keys: List[Tuple[str, int]],
+        prefix: str,
+        found: Set[int],
+        limit: int,
+        accept: Callable[[int], bool]
+    ) -> List[int]:
+        """Accepted entries not already in found with a key starting with prefix, at most limit - len(found)."""
+        matches: List[int] = []
+        position = bisect.bisect_left(keys, (prefix,))
+        while position < len(keys) and len(found) + len(matches) < limit:
+            key, entry_id = keys[position]
+            if not key.startswith(prefix):
+                break
+            if entry_id not in found and entry_id not in matches and accept(entry_id):
+                matches.append(entry_id)
+            position += 1
+        return matches
+
+    def suggest(
+        self,
+        prefix: str,
+        limit: int = MAX_CHOICES,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        Args:
+            prefix (str): What the user has typed so far
+            limit (int): Maximum number of suggestions
+            accept (Callable[[str], bool], optional): Only suggest entries whose value it accepts;
+                applied before the limit, so rejected entries do not take up suggestions
+
+        Returns:
+            List[Tuple[str, str]]: (label, value) pairs, whole-name matches before word matches
+        """
+        prefix = ' '.join(fold(prefix).split())
+
+        def accepted(entry_id: int) -> bool:
+            return accept is None or bool(accept(self.entries[entry_id][1]))
+
+        if not prefix:
+            if accept is None:
+                return self.entries[:limit]
+            return list(islice((entry for entry in self.entries if accept(entry[1])), limit))
+        whole = set(self._scan(self.name_keys, prefix, set(), limit, accepted))
+        word = self._scan(self.word_keys, prefix, whole, limit, accepted)
+        # Keys sort alphabetically; show each group in its original (menu) order
+        return [self.entries[entry_id] for entry_id in sorted(whole) + sorted(word)]
+
+class TopicAutocomplete:
+    """Prefix indexes over places and over all topics, one per supported language."""
+
+    def __init__(self, pack: ContentPack):
+        self.places: Dict[str, PrefixIndex] = {}
+        self.topics: Dict[str, PrefixIndex] = {}
+        topics = knowledge_for(pack).topics.values()
+        for lang in SUPPORTED_LANGUAGES:
+            place_entries = []
+            topic_entries = []
+            for topic in topics:
+                # Every alias and label is searchable in every language
+                names = [topic.key, *topic.aliases, *topic.labels.values()]
+                entry = (topic.label(lang), topic.key, names)
+                topic_entries.append(entry)
+                if topic.category == 'places':
+                    place_entries.append(entry)
+            self.places[lang] = PrefixIndex(place_entries)
+            self.topics[lang] = PrefixIndex(topic_entries)
+
+topic_autocomplete = TopicAutocomplete(content_store.pack)
+
+def install_topic_autocomplete(index: TopicAutocomplete) -> None:
+    """Swap in autocomplete indexes built from a newly loaded content pack."""
+    global topic_autocomplete
+    topic_autocomplete = index
+
+# Rebuilt off the event loop whenever the content pack is reloaded
+content_store.subscribe(TopicAutocomplete, install_topic_autocomplete)
+
+def suggest_places(prefix: str, lang: str) -> List[Tuple[str, str]]:
+    """
+    Returns:
+        List[Tuple[str, str]]: (label, place key) suggestions for a partly typed place name
+    """
+    indexes = topic_autocomplete.places
+    return (indexes.get(lang) or indexes[DEFAULT_LANGUAGE]).suggest(prefix)
+
+def suggest_topics(
+    prefix: str,
+    lang: str,
+    accept: Optional[Callable[[str], bool]] = None
+) -> List[Tuple[str, str]]:
+    """
+    Args:
+        accept (Callable[[str], bool], optional): Only suggest topics whose key it accepts
+
+    Returns:
+        List[Tuple[str, str]]: (label, topic key) suggestions for a partly typed topic name
+    """
+    indexes = topic_autocomplete.topics
+    return (indexes.get(lang) or indexes[DEFAULT_LANGUAGE]).suggest(prefix, accept=accept)
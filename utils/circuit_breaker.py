@@ -0,0 +1,88 @@
+import logging
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding an unreliable upstream service.
+
+    - closed: requests flow normally; consecutive failures are counted
+    - open: requests are rejected immediately until recovery_timeout has passed
+    - half_open: a single trial request is let through; success closes the
+      breaker, failure opens it again
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        """
+        Args:
+            name (str): Name used in log messages
+            failure_threshold (int): Consecutive failures that trip the breaker
+            recovery_timeout (float): Seconds to stay open before a trial request
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trip_count = 0
+        self.rejected_count = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit breaker '%s' %s -> %s", self.name, self.state, state)
+            self.state = state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent upstream.
+
+        Returns:
+            bool: True if the caller should make the request
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.recovery_timeout:
+                self.rejected_count += 1
+                return False
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                self.rejected_count += 1
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful upstream call."""
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a failed upstream call, tripping the breaker if needed."""
+        self._trial_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trip_count += 1
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            Dict: Current state and counters
+        """
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'trip_count': self.trip_count,
+            'rejected_count': self.rejected_count
+        }
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+from discord import app_commands
+
+logger = logging.getLogger(__name__)
+
+def command_tree_hash(tree: app_commands.CommandTree, application_id: Optional[int] = None) -> str:
+    """
+    Hash the global application command payload that a sync would upload.
+
+    Args:
+        tree (app_commands.CommandTree): Command tree to hash
+        application_id (int, optional): Included so a different application always syncs
+
+    Returns:
+        str: Hex SHA-256 digest of the payload
+    """
+    payload = sorted(
+        (command.to_dict() for command in tree.get_commands()),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    data = json.dumps({'application_id': application_id, 'commands': payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def _read_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            return handle.read().strip() or None
+    except OSError:
+        return None
+
+def _write_hash(path: str, digest: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Write then rename, so a crash never leaves a truncated hash behind
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        handle.write(digest)
+    os.replace(temp_path, path)
+
+async def sync_if_changed(tree: app_commands.CommandTree, state_path: str, application_id: Optional[int] = None) -> bool:
+    """
+    Sync global application commands only if they changed since the last successful sync.
+
+    Args:
+        tree (app_commands.CommandTree): Command tree to sync
+        state_path (str): File holding the hash of the last synced payload
+        application_id (int, optional): Application the commands belong to
+
+    Returns:
+        bool: True if a sync was performed
+    """
+    digest = command_tree_hash(tree, application_id)
+    if _read_hash(state_path) == digest:
+        logger.info("Application commands unchanged, skipping sync")
+        return False
+    synced = await tree.sync()
+    logger.info("Synced %s application command(s)", len(synced))
+    try:
+        _write_hash(state_path, digest)
+    except OSError as e:
+        logger.warning("Could not persist command tree hash to %s: %s", state_path, e)
+    return True
@@ -0,0 +1,322 @@
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import CONTENT_PACK_PATH, CONTENT_RELOAD_INTERVAL, DEFAULT_LANGUAGE
+
+logger = logging.getLogger(__name__)
+
+# Content pack layout this code understands; bump when the layout changes
+SCHEMA_VERSION = 1
+
+# Messages the bot's handlers look up by key
+REQUIRED_MESSAGES = (
+    'select_place_prompt', 'select_place_placeholder', 'location_field', 'rating_field', 'reviews_text',
+    'hours_field', 'phone_field', 'website_field', 'coordinates_field', 'general_intro', 'general_topics',
+    'use_danang_command_hint', 'ask_command_no_query', 'ask_command_no_info', 'generic_error', 'help_message',
+    'generic_follow_up_fail', 'no_last_topic_follow_up', 'nearby_title', 'nearby_none', 'nearby_needs_place',
+    'itinerary_title', 'itinerary_total', 'itinerary_needs_places', 'itinerary_skipped', 'itinerary_late',
+    'itinerary_wait', 'weekdays'
+)
+
+# Day codes used by visit windows, Monday first like datetime.weekday()
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+class ContentPackError(ValueError):
+    """Raised when a content pack cannot be read or does not match the schema."""
+
+    def __init__(self, path: str, errors: List[str]):
+        self.path = path
+        self.errors = errors
+        super().__init__(f"Invalid content pack {path}: " + '; '.join(errors))
+
+class ContentPack:
+    """
+    One loaded, validated version of the knowledge base.
+
+    Attributes:
+        version (str): Content revision declared by the pack
+        info (Dict): Topics and messages, in the category -> key -> language -> text layout
+        aliases (Dict[str, List[str]]): Extra names for topics, keyed by topic key
+        place_labels (Dict[str, Dict[str, str]]): Place menu labels, keyed by place key then language
+        locations (Dict[str, Tuple[float, float]]): (lat, lng) of topics that are places on the map
+        visits (Dict[str, Dict]): Typical visit length ('minutes') and opening or show times ('windows') per topic
+        mtime (float): Modification time of the file it was loaded from
+    """
+
+    __slots__ = ('version', 'info', 'aliases', 'place_labels', 'locations', 'visits', 'mtime')
+
+    def __init__(
+        self,
+        version: str,
+        info: Dict,
+        aliases: Dict,
+        place_labels: Dict,
+        locations: Optional[Dict] = None,
+        visits: Optional[Dict] = None,
+        mtime: float = 0.0
+    ):
+        self.version = version
+        self.info = info
+        self.aliases = aliases
+        self.place_labels = place_labels
+        self.locations = locations or {}
+        self.visits = visits or {}
+        self.mtime = mtime
+
+def _is_texts(value: Any) -> bool:
+    """True for a language -> text mapping."""
+    return isinstance(value, dict) and bool(value) and all(
+        isinstance(lang, str) and isinstance(text, str) for lang, text in value.items()
+    )
+
+def _is_clock(value: Any) -> bool:
+    """True for an 'HH:MM' time of day."""
+    if not isinstance(value, str) or len(value) != 5 or value[2] != ':':
+        return False
+    hours, minutes = value[:2], value[3:]
+    return hours.isdigit() and minutes.isdigit() and int(hours) < 24 and int(minutes) < 60
+
+def validate_content(data: Any) -> List[str]:
+    """
+    Check a decoded content pack against the schema.
+
+    Returns:
+        List[str]: Every problem found (empty if the pack is valid)
+    """
+    if not isinstance(data, dict):
+        return ['top level must be an object']
+    errors = []
+    if data.get('schema_version') != SCHEMA_VERSION:
+        errors.append(f"schema_version must be {SCHEMA_VERSION}, got {data.get('schema_version')!r}")
+    if not isinstance(data.get('version'), str) or not data.get('version'):
+        errors.append('version must be a non-empty string')
+
+    info = data.get('info')
+    if not isinstance(info, dict):
+        return errors + ['info must be an object']
+    topics = set()
+    for category, items in info.items():
+        if _is_texts(items):
+            # Top-level topic such as the overview
+            entries = {category: items}
+        elif isinstance(items, dict) and items:
+            entries = items
+        else:
+            errors.append(f"info.{category} must be a non-empty object")
+            continue
+        for key, texts in entries.items():
+            if not _is_texts(texts):
+                errors.append(f"info.{category}.{key} must map language codes to text")
+            elif DEFAULT_LANGUAGE not in texts:
+                errors.append(f"info.{category}.{key} has no '{DEFAULT_LANGUAGE}' text")
+            if category != 'messages':
+                if key in topics:
+                    errors.append(f"info.{category}.{key} reuses the key of a topic in another category")
+                topics.add(key)
+    if not isinstance(info.get('places'), dict) or not info.get('places'):
+        errors.append('info.places must list at least one place')
+    messages = info.get('messages') if isinstance(info.get('messages'), dict) else {}
+    missing = [key for key in REQUIRED_MESSAGES if key not in messages]
+    if missing:
+        errors.append(f"info.messages is missing {', '.join(missing)}")
+
+    aliases = data.get('aliases', {})
+    if not isinstance(aliases, dict):
+        errors.append('aliases must be an object')
+    else:
+        for key, names in aliases.items():
+            if key not in topics:
+                errors.append(f"aliases.{key} does not name a topic")
+            if not isinstance(names, list) or not all(isinstance(name, str) and name for name in names):
+                errors.append(f"aliases.{key} must be a list of non-empty strings")
+
+    place_labels = data.get('place_labels', {})
+    if not isinstance(place_labels, dict):
+        errors.append('place_labels must be an object')
+    else:
+        places = info.get('places') if isinstance(info.get('places'), dict) else {}
+        for key, labels in place_labels.items():
+            if key not in places:
+                errors.append(f"place_labels.{key} does not name a place")
+            if not _is_texts(labels):
+                errors.append(f"place_labels.{key} must map language codes to text")
+
+    locations = data.get('locations', {})
+    if not isinstance(locations, dict):
+        errors.append('locations must be an object')
+    else:
+        for key, location in locations.items():
+            if key not in topics:
+                errors.append(f"locations.{key} does not name a topic")
+            if (
+                not isinstance(location, list) or len(location) != 2
+                or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in location)
+                or not (-90 <= location[0] <= 90 and -180 <= location[1] <= 180)
+            ):
+                errors.append(f"locations.{key} must be [latitude, longitude]")
+
+    visits = data.get('visits', {})
+    if not isinstance(visits, dict):
+        errors.append('visits must be an object')
+    else:
+        for key, visit in visits.items():
+            if key not in topics:
+                errors.append(f"visits.{key} does not name a topic")
+            if not isinstance(visit, dict):
+                errors.append(f"visits.{key} must be an object")
+                continue
+            minutes = visit.get('minutes', 0)
+            if not isinstance(minutes, int) or isinstance(minutes, bool) or minutes < 0:
+                errors.append(f"visits.{key}.minutes must be a non-negative whole number")
+            windows = visit.get('windows', [])
+            if not isinstance(windows, list):
+                errors.append(f"visits.{key}.windows must be a list")
+                continue
+            for window in windows:
+                if (
+                    not isinstance(window, dict)
+                    or not _is_clock(window.get('open')) or not _is_clock(window.get('close'))
+                    or window['open'] > window['close']
+                ):
+                    errors.append(f"visits.{key}.windows entries need 'open' <= 'close' as HH:MM")
+                elif not isinstance(window.get('days', []), list) or not set(window.get('days', [])) <= set(WEEKDAYS):
+                    errors.append(f"visits.{key}.windows days must be among {', '.join(WEEKDAYS)}")
+    return errors
+
+def load_content_pack(path: str) -> ContentPack:
+    """
+    Read and validate a content pack.
+
+    Args:
+        path (str): Location of the JSON content pack
+
+    Returns:
+        ContentPack: The loaded pack
+
+    Raises:
+        ContentPackError: If the file cannot be read or does not match the schema
+    """
+    try:
+        mtime = os.path.getmtime(path)
+        with open(path, 'r', encoding='utf-8') as handle:
+            data = json.load(handle)
+    except (OSError, ValueError) as e:
+        raise ContentPackError(path, [str(e)]) from e
+    errors = validate_content(data)
+    if errors:
+        raise ContentPackError(path, errors)
+    return ContentPack(
+        version=data['version'],
+        info=data['info'],
+        aliases=data.get('aliases', {}),
+        place_labels=data.get('place_labels', {}),
+        locations={key: (float(lat), float(lng)) for key, (lat, lng) in data.get('locations', {}).items()},
+        visits=data.get('visits', {}),
+        mtime=mtime
+    )
+
+class ContentStore:
+    """
+    Holds the current content pack and swaps in new versions without a restart.
+
+    Modules that derive structures from the content (knowledge base, matcher,
+    select menus) subscribe with a build function and an install function.
+    On reload the pack is read, validated and every derived structure is built
+    on a background thread; the installs then run back to back on the event
+    loop, so handlers see either the old content or the new content, never a
+    mix. An invalid pack is rejected and the current one stays in place.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Location of the JSON content pack; loaded immediately
+        """
+        self.path = path
+        self.pack = load_content_pack(path)
+        self._subscribers: List[Tuple[Callable[[ContentPack], Any], Callable[[Any], None]]] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='content')
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._rejected_mtime: Optional[float] = None
+        logger.info("Loaded content pack %s (version %s)", path, self.pack.version)
+
+    def subscribe(self, build: Callable[[ContentPack], Any], install: Callable[[Any], None]) -> None:
+        """
+        Register a derived structure to rebuild on every reload.
+
+        Args:
+            build (Callable[[ContentPack], Any]): Builds the structure from a pack; runs off the event loop
+            install (Callable[[Any], None]): Swaps the built structure in; runs on the event loop and must not block
+        """
+        self._subscribers.append((build, install))
+
+    def _prepare(self, force: bool) -> Optional[Tuple[ContentPack, List[Any]]]:
+        """Load the pack and build every derived structure (background thread)."""
+        mtime = os.path.getmtime(self.path)
+        if not force and mtime in (self.pack.mtime, self._rejected_mtime):
+            return None
+        try:
+            pack = load_content_pack(self.path)
+            return pack, [build(pack) for build, _ in self._subscribers]
+        except Exception:
+            # Do not re-parse the same broken file on every check
+            self._rejected_mtime = mtime
+            raise
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Reload the pack if the file changed (or unconditionally with force).
+
+        Returns:
+            bool: True if a new pack was installed
+
+        Raises:
+            ContentPackError: If the new pack is invalid; the current pack is kept
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            prepared = await loop.run_in_executor(self._executor, self._prepare, force)
+            if prepared is None:
+                return False
+            pack, built = prepared
+            # No awaits from here on: the swap is atomic with respect to message handling
+            self.pack = pack
+            for (_, install), value in zip(self._subscribers, built):
+                install(value)
+        logger.info("Installed content pack version %s", pack.version)
+        return True
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except ContentPackError as e:
+                logger.error("%s", e)
+            except Exception as e:
+                logger.error("Error reloading content pack: %s", e)
+
+    def start(self, interval: float = CONTENT_RELOAD_INTERVAL) -> None:
+        """Start watching the pack file for changes (disabled when interval is 0)."""
+        if interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._watch(interval))
+
+    async def stop(self) -> None:
+        """Stop watching the pack file."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+# Shared content store, loaded from CONTENT_PACK_PATH on import
+content_store = ContentStore(CONTENT_PACK_PATH)
@@ -0,0 +1,214 @@
+import heapq
+import re
+from collections import Counter
+from itertools import chain, repeat
+from operator import itemgetter
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from config import FUZZY_MIN_CONFIDENCE, FUZZY_MIN_NAME_LENGTH, FUZZY_MAX_QUERY_WORDS, FUZZY_MAX_CANDIDATES
+from utils.content import ContentPack, content_store
+from utils.knowledge import knowledge_for
+from utils.search import fold
+
+_WORD = re.compile(r'\w+')
+
+def _trigrams(text: str) -> Set[str]:
+    """Character trigrams, padded so the first and last characters are in two trigrams each."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def bounded_distance(a: str, b: str, bound: int) -> Optional[int]:
+    """
+    Edit distance between a and b counting insertions, deletions, substitutions
+    and swaps of adjacent characters (optimal string alignment), giving up early.
+
+    Args:
+        a (str): First string
+        b (str): Second string
+        bound (int): Largest distance of interest
+
+    Returns:
+        Optional[int]: The distance, or None if it is larger than bound
+    """
+    if abs(len(a) - len(b)) > bound:
+        return None
+    # A shared prefix or suffix never adds to the distance; typos usually leave most of the name intact
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return max(len(a), len(b))
+    # Only cells within bound of the diagonal can lead to a distance within bound
+    outside = bound + 1
+    previous2: List[int] = []
+    previous = [j if j <= bound else outside for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [outside] * (len(b) + 1)
+        if i <= bound:
+            current[0] = i
+        low = max(1, i - bound)
+        high = min(len(b), i + bound)
+        row_min = current[0]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (a[i - 1] != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > bound:
+            return None
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= bound else None
+
+class FuzzyResolver:
+    """
+    Resolves misspelled topic names ("marbel mountain", "my ke beach", "hoian").
+
+    Every topic key, alias and menu label is folded (lowercase, no diacritics)
+    with its spaces removed, so a missing or extra space costs nothing. Names
+    are indexed by character trigram. Each edit changes the length by at most
+    one and removes at most three of a string's trigrams, so a name within
+    distance k of a run of query words shares all but 3k of its trigrams with
+    that run, and so with the query as a whole. The trigram postings are
+    counted once per query; only names that pass that count are checked
+    against the individual runs, and at most FUZZY_MAX_CANDIDATES of those are
+    compared with an edit distance that gives up past k. Confidence is
+    1 - distance / length of the longer string.
+    """
+
+    def __init__(self, pack: ContentPack, min_confidence: float = FUZZY_MIN_CONFIDENCE):
+        """
+        Args:
+            pack (ContentPack): Content to take the names from
+            min_confidence (float): Matches below this confidence are ignored
+        """
+        self.min_confidence = min_confidence
+        self.names: List[str] = []
+        self.topics: List[Tuple[str, str]] = []
+        self.grams: List[FrozenSet[str]] = []
+        # Fewest trigrams a name must share with a query to be within the allowed distance of any run in it
+        self.min_shared: List[int] = []
+        # trigram -> ids of the names containing it
+        self.postings: Dict[str, List[int]] = {}
+        self.max_words = 1
+        self.max_length = 0
+        seen = set()
+        for topic in knowledge_for(pack).topics.values():
+            variants = [topic.key.replace('_', ' ')]
+            variants.extend(topic.aliases)
+            variants.extend(topic.labels.values())
+            for variant in variants:
+                words = _WORD.findall(fold(variant))
+                name = ''.join(words)
+                if len(name) < FUZZY_MIN_NAME_LENGTH or name in seen:
+                    continue
+                seen.add(name)
+                self.max_words = max(self.max_words, len(words))
+                self.max_length = max(self.max_length, len(name))
+                grams = frozenset(_trigrams(name))
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(len(self.names))
+                # The longest run that can match has length / min_confidence characters
+                longest = int(len(name) / min_confidence + 1e-9)
+                self.names.append(name)
+                self.topics.append(topic.ref)
+                self.grams.append(grams)
+                self.min_shared.append(len(grams) - 3 * self._max_distance(longest))
+        # Lowest of those; the per-query counts are scanned from the highest down to it
+        self.threshold = max(1, min(self.min_shared, default=1))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _max_distance(self, length: int) -> int:
+        return int((1 - self.min_confidence) * length + 1e-9)
+
+    def resolve(self, query: str) -> Optional[Tuple[Tuple[str, str], float]]:
+        """
+        Find the topic whose name is closest to some run of words in the query.
+
+        Args:
+            query (str): Message text
+
+        Returns:
+            Optional[Tuple[Tuple[str, str], float]]: ((key, category), confidence) of the best
+            match at or above min_confidence, or None
+        """
+        words = _WORD.findall(fold(query))
+        if not words or len(words) > FUZZY_MAX_QUERY_WORDS:
+            return None
+        # Runs longer than this are too long to be within the allowed distance of any name
+        max_window = self.max_length + self._max_distance(self.max_length)
+        # One extra word per run so a name typed with a stray space still lines up
+        windows: Dict[str, Set[str]] = {}
+        for start in range(len(words)):
+            window = ''
+            for word in words[start:start + self.max_words + 1]:
+                window += word
+                if len(window) > max_window:
+                    break
+                if len(window) >= FUZZY_MIN_NAME_LENGTH and window not in windows:
+                    windows[window] = _trigrams(window)
+        if not windows:
+            return None
+
+        # Count every name's trigrams in the whole query in one pass; most names share none or a few
+        query_grams = set().union(*windows.values())
+        shared_counts = Counter(chain.from_iterable(map(self.postings.get, query_grams, repeat(()))))
+        # (trigrams shared, run, name id, bound) for every name and run that pass the length and count filters
+        candidates = []
+        slack = 1 - self.min_confidence
+        for name_id, count in shared_counts.most_common():
+            if count < self.threshold:
+                break
+            if count < self.min_shared[name_id]:
+                continue
+            length = len(self.names[name_id])
+            name_grams = self.grams[name_id]
+            for window, grams in windows.items():
+                bound = int(slack * max(len(window), length) + 1e-9)
+                if abs(len(window) - length) > bound:
+                    continue
+                shared = len(grams & name_grams)
+                if shared >= len(grams) - 3 * bound and shared >= len(name_grams) - 3 * bound:
+                    candidates.append((shared, window, name_id, bound))
+
+        # Compare the candidates sharing the most trigrams first, and at most FUZZY_MAX_CANDIDATES of them,
+        # so a query that passes the filters for many names still costs a bounded number of edit distances
+        if len(candidates) > FUZZY_MAX_CANDIDATES:
+            candidates = heapq.nlargest(FUZZY_MAX_CANDIDATES, candidates, key=itemgetter(0))
+        best = None
+        best_confidence = self.min_confidence
+        for _, window, name_id, bound in candidates:
+            name = self.names[name_id]
+            distance = bounded_distance(window, name, bound)
+            if distance is None:
+                continue
+            confidence = 1 - distance / max(len(window), len(name))
+            if confidence > best_confidence or (best is None and confidence >= best_confidence):
+                best, best_confidence = self.topics[name_id], confidence
+        return (best, best_confidence) if best else None
+
+topic_resolver = FuzzyResolver(content_store.pack)
+
+def install_topic_resolver(resolver: FuzzyResolver) -> None:
+    """Swap in a resolver built from a newly loaded content pack."""
+    global topic_resolver
+    topic_resolver = resolver
+
+# Rebuilt off the event loop whenever the content pack is reloaded
+content_store.subscribe(FuzzyResolver, install_topic_resolver)
+
+def resolve_topic(query: str) -> Optional[Tuple[Tuple[str, str], float]]:
+    """
+    Resolve a possibly misspelled topic name in a query; see FuzzyResolver.resolve.
+    """
+    return topic_resolver.resolve(query)
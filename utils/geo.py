@@ -0,0 +1,260 @@
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from config import GEO_LEAF_SIZE, GEO_REBUILD_AFTER
+from utils.content import ContentPack, content_store
+from utils.knowledge import knowledge_for
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _unit_vector(lat: float, lng: float) -> Tuple[float, float, float]:
+    """Position on the unit sphere; straight-line (chord) distances order points like great-circle ones."""
+    phi, lam = math.radians(lat), math.radians(lng)
+    return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+def _chord_to_km(chord_squared: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+def _km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+class PointIndex:
+    """
+    Points of interest in a k-d tree over their positions on the unit sphere.
+
+    Chord length between unit vectors grows with great-circle distance, so the
+    k nearest points by plain squared Euclidean distance are exactly the k
+    nearest on the globe, with no trigonometry per candidate and no special
+    cases at the poles or the antimeridian. A query descends to the leaf
+    containing the target and only visits subtrees whose splitting plane is
+    closer than the current k-th result (or the radius), so it touches a few
+    leaves however large the catalog is.
+
+    The tree is immutable; points added or moved afterwards go to a small
+    pending list that is scanned linearly until it grows past rebuild_after,
+    when the tree is rebuilt.
+    """
+
+    def __init__(
+        self,
+        points: Iterable[Tuple[str, float, float]] = (),
+        leaf_size: int = GEO_LEAF_SIZE,
+        rebuild_after: int = GEO_REBUILD_AFTER
+    ):
+        """
+        Args:
+            points (Iterable[Tuple[str, float, float]]): (key, lat, lng) to index
+            leaf_size (int): Points per leaf bucket
+            rebuild_after (int): Pending changes tolerated before the tree is rebuilt
+        """
+        self.leaf_size = leaf_size
+        self.rebuild_after = rebuild_after
+        self.points: Dict[str, Tuple[float, float]] = {}
+        for key, lat, lng in points:
+            self.points[key] = (lat, lng)
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.points
+
+    def _rebuild(self) -> None:
+        entries = [(*_unit_vector(lat, lng), key) for key, (lat, lng) in self.points.items()]
+        self._root = self._build(entries)
+        self._tree_keys = set(self.points)
+        # Keys whose entry in the tree is out of date, and entries not in the tree yet
+        self._stale: Set[str] = set()
+        self._pending: Dict[str, Tuple[float, float, float, str]] = {}
+
+    def _build(self, entries: List[Tuple[float, float, float, str]]):
+        """Leaves are lists of (x, y, z, key); inner nodes are (axis, split, left, right)."""
+        if len(entries) <= self.leaf_size:
+            return entries
+        # Split on the axis along which the points are most spread out
+        spreads = [
+            max(entry[axis] for entry in entries) - min(entry[axis] for entry in entries) for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        entries.sort(key=lambda entry: entry[axis])
+        middle = len(entries) // 2
+        return axis, entries[middle][axis], self._build(entries[:middle]), self._build(entries[middle:])
+
+    def add(self, key: str, lat: float, lng: float) -> None:
+        """Add a point, or move it if the key is already indexed."""
+        self.points[key] = (lat, lng)
+        if key in self._tree_keys:
+            self._stale.add(key)
+        self._pending[key] = (*_unit_vector(lat, lng), key)
+        self._maybe_rebuild()
+
+    def remove(self, key: str) -> None:
+        """Remove a point if present."""
+        if self.points.pop(key, None) is None:
+            return
+        self._pending.pop(key, None)
+        if key in self._tree_keys:
+            self._stale.add(key)
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self) -> None:
+        if len(self._pending) + len(self._stale) > self.rebuild_after:
+            self._rebuild()
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: Optional[int] = None,
+        radius_km: Optional[float] = None,
+        exclude: Sequence[str] = ()
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the points closest to a location.
+
+        Args:
+            lat (float): Latitude of the query
+            lng (float): Longitude of the query
+            k (int, optional): Maximum number of results (all within the radius if None)
+            radius_km (float, optional): Only return points at most this far away
+            exclude (Sequence[str]): Keys to leave out, e.g. the place being searched around
+
+        Returns:
+            List[Tuple[str, float]]: (key, distance in km), closest first
+        """
+        if not self.points or (k is None and radius_km is None) or k == 0:
+            return []
+        qx, qy, qz = query = _unit_vector(lat, lng)
+        limit = _km_to_chord(radius_km) ** 2 if radius_km is not None else 4.0
+        skip = self._stale.union(exclude) if exclude else self._stale
+        # Max-heap of the best k as (-squared chord, key); with no k it just collects everything in range
+        best: List[Tuple[float, str]] = []
+
+        def consider(entries) -> None:
+            nonlocal limit
+            for x, y, z, key in entries:
+                dx, dy, dz = x - qx, y - qy, z - qz
+                distance = dx * dx + dy * dy + dz * dz
+                if distance > limit or key in skip:
+                    continue
+                if k is None:
+                    best.append((-distance, key))
+                elif len(best) < k:
+                    heapq.heappush(best, (-distance, key))
+                    if len(best) == k:
+                        limit = min(limit, -best[0][0])
+                else:
+                    heapq.heapreplace(best, (-distance, key))
+                    limit = min(limit, -best[0][0])
+
+        def visit(node) -> None:
+            if type(node) is list:
+                consider(node)
+                return
+            axis, split, left, right = node
+            gap = query[axis] - split
+            near, far = (left, right) if gap < 0 else (right, left)
+            visit(near)
+            if gap * gap <= limit:
+                visit(far)
+
+        visit(self._root)
+        # Pending entries were just added or moved; exclusions still apply to them
+        skip = set(exclude)
+        consider(self._pending.values())
+        return sorted(((key, _chord_to_km(-negative)) for negative, key in best), key=lambda item: item[1])
+
+# Coordinates reported by the Places API, which take precedence over the content pack's
+_observed: Dict[str, Tuple[float, float]] = {}
+
+def pack_locations(pack: ContentPack) -> Dict[str, Tuple[float, float]]:
+    """Coordinates of every topic in the content pack, with those seen in Places results taking precedence."""
+    topics = knowledge_for(pack).topics
+    locations = dict(pack.locations)
+    # Copied first: Places results may arrive on the event loop while this runs in the background
+    locations.update((key, location) for key, location in dict(_observed).items() if key in topics)
+    return locations
+
+def build_point_index(pack: ContentPack) -> PointIndex:
+    """Index every topic with known coordinates."""
+    return PointIndex((key, lat, lng) for key, (lat, lng) in pack_locations(pack).items())
+
+point_index = build_point_index(content_store.pack)
+
+def install_point_index(index: PointIndex) -> None:
+    """Swap in a point index built from a newly loaded content pack."""
+    global point_index
+    point_index = index
+
+# Rebuilt off the event loop whenever the content pack is reloaded
+content_store.subscribe(build_point_index, install_point_index)
+
+def observe_location(key: str, location: Optional[Sequence[float]]) -> None:
+    """
+    Record the coordinates the Places API returned for a topic.
+
+    Args:
+        key (str): Topic key
+        location (Sequence[float], optional): [lat, lng], ignored if missing
+    """
+    if not location:
+        return
+    lat, lng = location
+    _observed[key] = (lat, lng)
+    if point_index.points.get(key) != (lat, lng):
+        point_index.add(key, lat, lng)
+
+def parse_coordinates(text: str) -> Optional[Tuple[float, float]]:
+    """
+    Read 'lat, lng' (e.g. '16.06, 108.22') from text.
+
+    Returns:
+        Optional[Tuple[float, float]]: The coordinates, or None if text holds none or they are out of range
+    """
+    parts = text.replace(',', ' ').split()
+    numbers = []
+    for part in parts:
+        try:
+            numbers.append(float(part))
+        except ValueError:
+            numbers = []
+            continue
+        if len(numbers) == 2:
+            lat, lng = numbers
+            if -90 <= lat <= 90 and -180 <= lng <= 180:
+                return lat, lng
+            numbers = numbers[1:]
+    return None
+
+def current_locations() -> Dict[str, Tuple[float, float]]:
+    """Returns a copy of every indexed topic's (lat, lng)."""
+    return dict(point_index.points)
+
+def topic_location(key: str) -> Optional[Tuple[float, float]]:
+    """
+    Returns:
+        Optional[Tuple[float, float]]: (lat, lng) of a topic, or None if it is not on the map
+    """
+    return point_index.points.get(key)
+
+def find_nearby(
+    lat: float,
+    lng: float,
+    k: Optional[int] = None,
+    radius_km: Optional[float] = None,
+    exclude: Sequence[str] = ()
+) -> List[Tuple[str, float]]:
+    """
+    Find the attractions closest to a location; see PointIndex.nearest.
+    """
+    return point_index.nearest(lat, lng, k=k, radius_km=radius_km, exclude=exclude)
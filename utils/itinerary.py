@@ -0,0 +1,506 @@
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+from config import (
+    DISTANCE_MATRIX_DB_PATH,
+    ITINERARY_START,
+    ITINERARY_SPEED_KMH,
+    ITINERARY_ROAD_FACTOR,
+    ITINERARY_DWELL_MINUTES,
+    TIMEZONE_OFFSET_HOURS
+)
+from utils.content import WEEKDAYS, content_store
+from utils.geo import current_locations, haversine_km, pack_locations
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TIMEZONE = timezone(timedelta(hours=TIMEZONE_OFFSET_HOURS))
+
+class DistanceMatrix:
+    """
+    Pairwise distances between every known attraction, persisted in SQLite.
+
+    Points are stored with the coordinates their distances were computed
+    from, so an update only computes the rows of places that were added or
+    moved and drops those of removed places; every other distance is read
+    back from disk after a restart. All database work runs on a single
+    background thread to keep the event loop free. A pair that is not in the
+    matrix yet (a place seen since the last update) is computed on demand.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Location of the SQLite database file
+        """
+        self.path = path
+        self.points: Dict[str, Tuple[float, float]] = {}
+        self.rows: Dict[str, Dict[str, float]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='distance-matrix')
+        self._task: Optional[asyncio.Task] = None
+        self._next: Optional[Mapping[str, Tuple[float, float]]] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use, create the schema if needed and load the stored matrix."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS points (key TEXT PRIMARY KEY, lat REAL NOT NULL, lng REAL NOT NULL)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS distances ('
+                ' a TEXT NOT NULL,'
+                ' b TEXT NOT NULL,'
+                ' km REAL NOT NULL,'
+                ' PRIMARY KEY (a, b))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS distances_b ON distances (b)')
+            conn.commit()
+            points = {key: (lat, lng) for key, lat, lng in conn.execute('SELECT key, lat, lng FROM points')}
+            rows: Dict[str, Dict[str, float]] = {key: {} for key in points}
+            for a, b, km in conn.execute('SELECT a, b, km FROM distances'):
+                if a in rows and b in rows:
+                    rows[a][b] = km
+                    rows[b][a] = km
+            self.points, self.rows = points, rows
+            self._conn = conn
+            logger.info("Opened distance matrix at %s (%d places)", self.path, len(points))
+        return self._conn
+
+    def update_sync(self, locations: Mapping[str, Tuple[float, float]]) -> int:
+        """
+        Bring the matrix in line with the current coordinates.
+
+        Args:
+            locations (Mapping[str, Tuple[float, float]]): (lat, lng) of every known place
+
+        Returns:
+            int: Number of places whose distances were (re)computed
+        """
+        with self._lock:
+            conn = self._connect()
+            points, rows = self.points, self.rows
+            removed = [key for key in points if key not in locations]
+            # A row missing entries (e.g. an interrupted write) is recomputed like a moved place
+            changed = [
+                key for key, location in locations.items()
+                if points.get(key) != tuple(location) or len(rows.get(key, ())) < len(points) - 1
+            ]
+            if not removed and not changed:
+                return 0
+            for key in removed:
+                del points[key]
+                del rows[key]
+                for row in rows.values():
+                    row.pop(key, None)
+            for key in changed:
+                points[key] = tuple(locations[key])
+                rows.setdefault(key, {})
+            records = []
+            done = set()
+            for key in changed:
+                lat, lng = points[key]
+                row = rows[key]
+                done.add(key)
+                for other, (other_lat, other_lng) in points.items():
+                    # Pairs of two changed places are computed once
+                    if other in done and (other == key or other in row):
+                        continue
+                    km = haversine_km(lat, lng, other_lat, other_lng)
+                    row[other] = km
+                    rows[other][key] = km
+                    records.append((min(key, other), max(key, other), km))
+            stale = removed + changed
+            conn.executemany('DELETE FROM points WHERE key = ?', [(key,) for key in stale])
+            conn.executemany('DELETE FROM distances WHERE a = ?', [(key,) for key in stale])
+            conn.executemany('DELETE FROM distances WHERE b = ?', [(key,) for key in stale])
+            conn.executemany(
+                'INSERT INTO points (key, lat, lng) VALUES (?, ?, ?)',
+                [(key, *points[key]) for key in changed]
+            )
+            conn.executemany('INSERT OR REPLACE INTO distances (a, b, km) VALUES (?, ?, ?)', records)
+            conn.commit()
+        logger.info("Updated distance matrix: %d places added or moved, %d removed", len(changed), len(removed))
+        return len(changed)
+
+    async def update(self, locations: Mapping[str, Tuple[float, float]]) -> int:
+        """Async wrapper around update_sync that runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.update_sync, dict(locations))
+
+    def schedule_update(self, locations: Mapping[str, Tuple[float, float]]) -> None:
+        """
+        Update the matrix in the background; requests made while one runs are merged into the next.
+
+        Args:
+            locations (Mapping[str, Tuple[float, float]]): (lat, lng) of every known place
+        """
+        self._next = locations
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run_updates())
+
+    async def _run_updates(self) -> None:
+        while self._next is not None:
+            locations, self._next = self._next, None
+            try:
+                await self.update(locations)
+            except Exception as e:
+                logger.error("Error updating distance matrix: %s", e)
+
+    def distance(self, a: str, b: str, locations: Mapping[str, Tuple[float, float]]) -> float:
+        """
+        Straight-line distance in km between two places, from the matrix when it has the pair.
+
+        Args:
+            a (str): First place key
+            b (str): Second place key
+            locations (Mapping[str, Tuple[float, float]]): Current coordinates, used for missing or moved places
+        """
+        if a == b:
+            return 0.0
+        if self.points.get(a) == locations[a] and self.points.get(b) == locations[b]:
+            km = self.rows.get(a, {}).get(b)
+            if km is not None:
+                return km
+        return haversine_km(*locations[a], *locations[b])
+
+    async def close(self) -> None:
+        """Wait for a running update, then close the database and stop the worker thread."""
+        if self._task is not None:
+            self._next = None
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._executor.shutdown(wait=False)
+
+# Shared matrix over every place with coordinates; updated at startup and on every content reload
+distance_matrix = DistanceMatrix(DISTANCE_MATRIX_DB_PATH)
+content_store.subscribe(pack_locations, distance_matrix.schedule_update)
+
+def _two_opt(tour: List[int], d: Sequence[Sequence[float]]) -> bool:
+    """Reverse every segment whose reversal shortens the round trip; True if any was."""
+    size = len(tour)
+    improved = False
+    for i in range(size - 2):
+        a, b = tour[i], tour[i + 1]
+        # The edge closing the cycle (last -> tour[0]) is only paired with edges not touching tour[0]
+        for j in range(i + 2, size if i > 0 else size - 1):
+            c, e = tour[j], tour[(j + 1) % size]
+            if d[a][c] + d[b][e] < d[a][b] + d[c][e] - 1e-9:
+                tour[i + 1:j + 1] = tour[j:i:-1]
+                b = tour[i + 1]
+                improved = True
+    return improved
+
+def _or_opt(tour: List[int], d: Sequence[Sequence[float]]) -> bool:
+    """Move runs of one to three stops (either way round) to wherever they shorten the round trip; True if any was."""
+    size = len(tour)
+    improved = False
+    for length in (1, 2, 3):
+        i = 0
+        while i + length <= size and size - length >= 3:
+            first, last = tour[i], tour[i + length - 1]
+            before, after = tour[i - 1], tour[(i + length) % size]
+            gain = d[before][first] + d[last][after] - d[before][after]
+            rest = tour[:i] + tour[i + length:]
+            best = None
+            for j in range(len(rest)):
+                c, e = rest[j], rest[(j + 1) % len(rest)]
+                if c == before:
+                    continue
+                forward = d[c][first] + d[last][e] - d[c][e]
+                backward = d[c][last] + d[first][e] - d[c][e]
+                cost, reverse = (forward, False) if forward <= backward else (backward, True)
+                if cost < gain - 1e-9 and (best is None or cost < best[0]):
+                    best = (cost, j, reverse)
+            if best is not None:
+                _, j, reverse = best
+                segment = tour[i:i + length]
+                tour[:] = rest[:j + 1] + (segment[::-1] if reverse else segment) + rest[j + 1:]
+                improved = True
+            i += 1
+    return improved
+
+def solve_route(distances: Sequence[Sequence[float]]) -> List[int]:
+    """
+    Shortest-path visiting order through every stop, free to start and end anywhere.
+
+    A dummy stop at distance 0 from all others turns the open path into a
+    round trip, which is built with the nearest-neighbour heuristic from the
+    first stop and then improved with 2-opt (reversing any segment that
+    shortens the trip) and Or-opt (moving short runs of stops elsewhere)
+    until neither helps. Removing the dummy leaves the path, with the local
+    search having chosen its endpoints too.
+
+    Args:
+        distances (Sequence[Sequence[float]]): Symmetric distance matrix
+
+    Returns:
+        List[int]: Stop indexes in visiting order
+    """
+    count = len(distances)
+    if count <= 2:
+        return list(range(count))
+    dummy = count
+    d = [list(row) + [0.0] for row in distances] + [[0.0] * (count + 1)]
+
+    tour = [dummy, 0]
+    unvisited = set(range(1, count))
+    while unvisited:
+        row = d[tour[-1]]
+        nearest = min(unvisited, key=lambda stop: (row[stop], stop))
+        unvisited.remove(nearest)
+        tour.append(nearest)
+
+    while True:
+        improved = _two_opt(tour, d)
+        if not _or_opt(tour, d) and not improved:
+            break
+    start = tour.index(dummy)
+    return tour[start + 1:] + tour[:start]
+
+def _clock(value: str) -> int:
+    """'HH:MM' to minutes after midnight."""
+    return int(value[:2]) * 60 + int(value[3:])
+
+def format_clock(minutes: float) -> str:
+    """Minutes after midnight to 'HH:MM' ('+1' marks the next day)."""
+    minutes = int(round(minutes))
+    text = f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+    return text + ' (+1)' if minutes >= 24 * 60 else text
+
+class Stop:
+    """A place to visit with its visit length and the windows in which the visit may start on the planned day."""
+
+    __slots__ = ('key', 'minutes', 'windows')
+
+    def __init__(self, key: str, minutes: int, windows: List[Tuple[int, int]]):
+        self.key = key
+        self.minutes = minutes
+        self.windows = windows
+
+def build_stops(keys: Sequence[str], day: int, visits: Optional[Mapping] = None) -> List[Stop]:
+    """
+    Args:
+        keys (Sequence[str]): Place keys
+        day (int): Day of the week to plan for (0 is Monday)
+        visits (Mapping, optional): Visit lengths and windows, defaults to the content pack's
+
+    Returns:
+        List[Stop]: One stop per key; windows for other days of the week are left out
+    """
+    if visits is None:
+        visits = content_store.pack.visits
+    stops = []
+    for key in keys:
+        visit = visits.get(key, {})
+        windows = sorted(
+            (_clock(window['open']), _clock(window['close'])) for window in visit.get('windows', ())
+            if WEEKDAYS[day] in window.get('days', WEEKDAYS)
+        )
+        stops.append(Stop(key, visit.get('minutes', ITINERARY_DWELL_MINUTES), windows))
+    return stops
+
+def travel_minutes(km: float) -> float:
+    """Estimated door-to-door travel time for a straight-line distance."""
+    return km * ITINERARY_ROAD_FACTOR / ITINERARY_SPEED_KMH * 60
+
+def _visit_start(stop: Stop, arrival: float) -> Tuple[float, Optional[int]]:
+    """When a visit can start for a given arrival time: (start, latest allowed start if missed, else None)."""
+    for opens, closes in stop.windows:
+        if arrival <= closes:
+            return max(arrival, opens), None
+    if stop.windows:
+        return arrival, stop.windows[-1][1]
+    return arrival, None
+
+# Schedule state after some stops: (minute of the day, km travelled, minutes late, last stop index)
+State = Tuple[float, float, float, Optional[int]]
+
+def _advance(stops: List[Stop], d: Sequence[Sequence[float]], order: Sequence[int], state: State) -> State:
+    """Continue a schedule through more stops, tracking only what the cost needs."""
+    now, km_total, lateness, previous = state
+    for index in order:
+        stop = stops[index]
+        if previous is not None:
+            km = d[previous][index]
+            km_total += km
+            now += travel_minutes(km)
+        begin, late = _visit_start(stop, now)
+        if late is not None:
+            lateness += now - late
+        now = begin + stop.minutes
+        previous = index
+    return now, km_total, lateness, previous
+
+def _cost(state: State) -> Tuple[float, float, float]:
+    """Minutes past closing first, then distance, then finish time."""
+    now, km_total, lateness, _ = state
+    return round(lateness, 6), round(km_total, 6), now
+
+class Plan:
+    """
+    A scheduled visiting order.
+
+    Attributes:
+        stops (List[Stop]): Stops in visiting order
+        legs (List[float]): Straight-line km from the previous stop (0 for the first)
+        starts (List[float]): Minute of the day each visit starts
+        waits (List[float]): Minutes spent waiting for a window to open before each visit
+        late (List[Optional[int]]): Latest allowed start of each visit that starts too late, else None
+        total_km (float): Straight-line distance of the whole route
+        finish (float): Minute of the day the last visit ends
+    """
+
+    __slots__ = ('stops', 'legs', 'starts', 'waits', 'late', 'total_km', 'finish')
+
+    def __init__(self, stops: List[Stop], d: Sequence[Sequence[float]], order: Sequence[int], start: int):
+        self.stops = [stops[index] for index in order]
+        self.legs: List[float] = []
+        self.starts: List[float] = []
+        self.waits: List[float] = []
+        self.late: List[Optional[int]] = []
+        now = float(start)
+        previous = None
+        for index in order:
+            km = d[previous][index] if previous is not None else 0.0
+            arrival = now + travel_minutes(km)
+            begin, late = _visit_start(stops[index], arrival)
+            self.legs.append(km)
+            self.starts.append(begin)
+            self.waits.append(begin - arrival)
+            self.late.append(late)
+            now = begin + stops[index].minutes
+            previous = index
+        self.total_km = sum(self.legs)
+        self.finish = now
+
+def plan_route(stops: List[Stop], d: Sequence[Sequence[float]], start: int) -> Plan:
+    """
+    Order stops for the shortest route, then move stops with time windows until they fit.
+
+    The distance-optimal path is tried in both directions. While a visit
+    would start after its window closes, each stop with windows is removed
+    in turn and reinserted where the schedule is least late, then shortest
+    (e.g. a weekend Dragon Bridge visit moves to the end of the day for the
+    21:00 show). Schedules are extended from the state at the insertion
+    point, so trying every position costs one pass over the rest of the
+    route each.
+
+    Args:
+        stops (List[Stop]): Places to visit
+        d (Sequence[Sequence[float]]): Distances between the stops, in km
+        start (int): Minute of the day the trip starts
+
+    Returns:
+        Plan: The best schedule found
+    """
+    initial: State = (float(start), 0.0, 0.0, None)
+    path = solve_route(d)
+    order = min((path, path[::-1]), key=lambda candidate: _cost(_advance(stops, d, candidate, initial)))
+    windowed = [index for index, stop in enumerate(stops) if stop.windows]
+    best = _cost(_advance(stops, d, order, initial))
+    for _ in range(len(windowed)):
+        if not best[0]:
+            break
+        moved = False
+        for index in windowed:
+            rest = [other for other in order if other != index]
+            state = initial
+            for position in range(len(rest) + 1):
+                if position:
+                    state = _advance(stops, d, rest[position - 1:position], state)
+                cost = _cost(_advance(stops, d, [index] + rest[position:], state))
+                if cost < best:
+                    best, order, moved = cost, rest[:position] + [index] + rest[position:], True
+        if not moved:
+            break
+    return Plan(stops, d, order, start)
+
+def plan_itinerary(keys: Sequence[str], day: int, start: int) -> Plan:
+    """
+    Plan a visit to places that have coordinates, without any network calls.
+
+    Args:
+        keys (Sequence[str]): Place keys, all with known coordinates
+        day (int): Day of the week (0 is Monday)
+        start (int): Minute of the day the trip starts
+
+    Returns:
+        Plan: The visiting order and schedule
+    """
+    locations = current_locations()
+    d = [[distance_matrix.distance(a, b, locations) for b in keys] for a in keys]
+    if any(distance_matrix.points.get(key) != locations[key] for key in keys):
+        # Places seen since the last update: add them to the stored matrix for next time
+        distance_matrix.schedule_update(locations)
+    return plan_route(build_stops(keys, day), d, start)
+
+DAY_WORDS = (
+    ('monday', 0), ('tuesday', 1), ('wednesday', 2), ('thursday', 3), ('friday', 4), ('saturday', 5),
+    ('sunday', 6), ('weekend', 5), ('thứ hai', 0), ('thứ ba', 1), ('thứ tư', 2), ('thứ năm', 3),
+    ('thứ sáu', 4), ('thứ bảy', 5), ('chủ nhật', 6), ('cuối tuần', 5)
+)
+RELATIVE_DAY_WORDS = (('today', 0), ('tomorrow', 1), ('hôm nay', 0), ('ngày mai', 1))
+START_PATTERN = re.compile(r'\b(?:from|start(?:ing)?(?: at)?|từ)\s+(\d{1,2})(?:[:h](\d{2}))?\s*(am|pm)?')
+
+def local_now() -> datetime:
+    """Current time in Da Nang."""
+    return datetime.now(LOCAL_TIMEZONE)
+
+def parse_schedule(text: str, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """
+    Read the day and start time of a trip from a query.
+
+    Understands day names and 'weekend' (Saturday), 'today' and 'tomorrow'
+    in English and Vietnamese, and start times such as 'from 9:00',
+    'from 2pm' or 'từ 14h'. Without a day the trip is planned for today;
+    without a start time it starts at ITINERARY_START, or now if that has
+    passed today.
+
+    Args:
+        text (str): Lowercase query
+        now (datetime, optional): Current local time, for tests and benchmarks
+
+    Returns:
+        Tuple[int, int]: (day of the week with 0 as Monday, start minute of the day)
+    """
+    now = now or local_now()
+    day, offset = now.weekday(), 0
+    for word, value in RELATIVE_DAY_WORDS:
+        if word in text:
+            day, offset = (now.weekday() + value) % 7, value
+    for word, value in DAY_WORDS:
+        if word in text:
+            day, offset = value, (value - now.weekday()) % 7
+            break
+    match = START_PATTERN.search(text)
+    if match:
+        hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        if meridiem == 'pm' and hours < 12:
+            hours += 12
+        elif meridiem == 'am' and hours == 12:
+            hours = 0
+        return day, min(hours, 23) * 60 + min(minutes, 59)
+    start = _clock(ITINERARY_START)
+    if offset == 0:
+        # Round the current time up to the next 5 minutes
+        start = max(start, -(-(now.hour * 60 + now.minute) // 5) * 5)
+    return day, start
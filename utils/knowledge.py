@@ -0,0 +1,269 @@
+import sys
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE, FOLLOW_UP_MAX_SIBLINGS
+from utils.content import ContentPack, content_store
+
+NOT_AVAILABLE = "Information not available."
+
+# Top-level knowledge base sections that are not topics users can ask about
+NON_TOPIC_CATEGORIES = ('messages',)
+
+# Follow-up suggestions per topic category: (template listing sibling topics, closing question)
+FOLLOW_UP_TEMPLATES = {
+    'places': ('other_related_places_surroundings', 'ask_about_traditions_visiting'),
+    'surroundings': ('other_related_places_surroundings', 'ask_about_traditions_visiting'),
+    'traditions': ('other_related_traditions', 'ask_about_places_surroundings_visiting'),
+    'visiting_info': (None, 'ask_about_places_traditions_surroundings_after_visiting'),
+    'overview': (None, 'ask_about_details_after_overview')
+}
+
+# Messages assembled from several parts; {mention} is filled per reply
+COMPOSED_MESSAGES = {
+    'general_response': ('general_intro', 'general_topics', 'use_danang_command_hint')
+}
+
+def first_sentence(text: str) -> str:
+    """Return the text up to its first period, used as a short title."""
+    return text.partition('.')[0]
+
+def _interned(texts: Dict[str, str]) -> Dict[str, str]:
+    """Copy a language -> text mapping, sharing one string object per language code."""
+    return {sys.intern(lang): text for lang, text in texts.items()}
+
+def _localized(texts: Dict[str, str], lang: str) -> str:
+    """Pick the text for lang, falling back to the default language (which validation guarantees)."""
+    text = texts.get(lang)
+    return text if text is not None else texts[DEFAULT_LANGUAGE]
+
+class Topic:
+    """
+    One topic users can ask about.
+
+    Attributes:
+        key (str): Topic key, e.g. 'dragon_bridge'
+        category (str): Category it is listed under; top-level topics such as the overview use their own key
+        ref (Tuple[str, str]): (key, category), the form matches and search results use
+        rank (int): Position in the content pack; the first-listed topic wins when a query names several
+        texts (Dict[str, str]): Description per language
+        titles (Dict[str, str]): First sentence of each description, used as the reply title
+        aliases (Tuple[str, ...]): Extra names for the topic
+        labels (Dict[str, str]): Menu label per language
+    """
+
+    __slots__ = ('key', 'category', 'ref', 'rank', 'texts', 'titles', 'aliases', 'labels')
+
+    def __init__(
+        self,
+        key: str,
+        category: str,
+        rank: int,
+        texts: Dict[str, str],
+        aliases: Tuple[str, ...] = (),
+        labels: Optional[Dict[str, str]] = None
+    ):
+        self.key = key
+        self.category = category
+        self.ref = (key, category)
+        self.rank = rank
+        self.texts = texts
+        self.titles = {lang: first_sentence(text) for lang, text in texts.items()}
+        self.aliases = aliases
+        self.labels = labels or {}
+
+    def text(self, lang: str) -> str:
+        """Description in lang, or in the default language if it has no translation."""
+        text = self.texts.get(lang)
+        return text if text is not None else self.texts[DEFAULT_LANGUAGE]
+
+    def title(self, lang: str) -> str:
+        """Title in lang, or in the default language if it has no translation."""
+        title = self.titles.get(lang)
+        return title if title is not None else self.titles[DEFAULT_LANGUAGE]
+
+    def label(self, lang: str) -> str:
+        """Display name, as shown in the place menu and autocomplete."""
+        return self.labels.get(lang) or self.labels.get(DEFAULT_LANGUAGE) or self.key.replace('_', ' ').title()
+
+    def names(self) -> List[str]:
+        """Lowercase phrases that name the topic in a message: its key, with spaces, and its aliases."""
+        names = [self.key, self.key.replace('_', ' ')]
+        names.extend(alias.lower() for alias in self.aliases)
+        return list(dict.fromkeys(names))
+
+class KnowledgeBase:
+    """
+    Topics and messages of one content pack, indexed for the lookups handlers make.
+
+    Built once per pack off the event loop. Every index answers in one dict
+    probe: key to topic (and so to its category), category to its topics in
+    content order, exact name, alias or menu label to topic, and message key to
+    its texts. Description strings are shared with the pack rather than
+    copied, and follow-up suggestions are rendered once per topic and
+    language from at most FOLLOW_UP_MAX_SIBLINGS siblings instead of with
+    every sibling, so a large multi-city catalog costs little more than the
+    pack itself.
+    """
+
+    __slots__ = ('version', 'topics', 'categories', 'messages', '_names', '_follow_ups')
+
+    def __init__(self, pack: ContentPack):
+        """
+        Args:
+            pack (ContentPack): Validated content to index
+        """
+        self.version = pack.version
+        self.topics: Dict[str, Topic] = {}
+        self.categories: Dict[str, Tuple[Topic, ...]] = {}
+        self.messages: Dict[str, Dict[str, str]] = {}
+        self._names: Dict[str, Topic] = {}
+        for category, items in pack.info.items():
+            category = sys.intern(category)
+            if category in NON_TOPIC_CATEGORIES:
+                self.messages.update((key, _interned(texts)) for key, texts in items.items())
+                continue
+            # Top-level topic such as the overview: items maps language -> text
+            entries = {category: items} if all(isinstance(value, str) for value in items.values()) else items
+            members = []
+            for key, texts in entries.items():
+                topic = Topic(
+                    key,
+                    category,
+                    len(self.topics),
+                    _interned(texts),
+                    tuple(pack.aliases.get(key, ())),
+                    _interned(pack.place_labels.get(key, {}))
+                )
+                self.topics[key] = topic
+                members.append(topic)
+            self.categories[category] = tuple(members)
+
+        # Earlier topics keep a name they share with a later one, as in the message matcher
+        for topic in self.topics.values():
+            for name in topic.names():
+                self._names.setdefault(name, topic)
+            for label in topic.labels.values():
+                self._names.setdefault(label.lower(), topic)
+
+        for key, parts in COMPOSED_MESSAGES.items():
+            if all(part in self.messages for part in parts):
+                self.messages[key] = {
+                    sys.intern(lang): "\n\n".join(_localized(self.messages[part], lang) for part in parts)
+                    for lang in SUPPORTED_LANGUAGES
+                }
+
+        # Rendered here, off the event loop, so a reply only makes a dict probe
+        self._follow_ups: Dict[Tuple[str, str], Optional[str]] = {
+            (key, lang): self._render_follow_up(key, lang) for key in self.topics for lang in SUPPORTED_LANGUAGES
+        }
+
+    def topic(self, key: str) -> Optional[Topic]:
+        """Returns the topic with this key, or None."""
+        return self.topics.get(key)
+
+    def category_of(self, key: str) -> Optional[str]:
+        """Returns the category a topic is listed under, or None if there is no such topic."""
+        topic = self.topics.get(key)
+        return topic.category if topic else None
+
+    def siblings(self, key: str, limit: Optional[int] = None) -> List[Topic]:
+        """
+        Other topics in the same category.
+
+        Args:
+            key (str): Topic key
+            limit (int, optional): Return at most this many
+
+        Returns:
+            List[Topic]: Siblings in content order (empty for an unknown topic)
+        """
+        topic = self.topics.get(key)
+        if topic is None:
+            return []
+        others: Iterator[Topic] = (other for other in self.categories[topic.category] if other is not topic)
+        return list(islice(others, limit))
+
+    def lookup(self, name: str) -> Optional[Topic]:
+        """
+        Returns:
+            Optional[Topic]: The topic whose key, alias or menu label is exactly name (lowercase), or None
+        """
+        return self._names.get(name)
+
+    def message(self, key: str, lang: str, default: str = NOT_AVAILABLE) -> str:
+        """Returns a message in lang (falling back to the default language), or default if it does not exist."""
+        texts = self.messages.get(key)
+        return _localized(texts, lang) if texts else default
+
+    def text(self, key: str, category: Optional[str], lang: str) -> Optional[str]:
+        """
+        Look up a topic description or a message.
+
+        Args:
+            key (str): Topic or message key
+            category (str, optional): 'messages' for messages; anything else for topics
+            lang (str): Language code
+
+        Returns:
+            Optional[str]: The text, or None if the key does not exist
+        """
+        if category in NON_TOPIC_CATEGORIES:
+            texts = self.messages.get(key)
+            return _localized(texts, lang) if texts else None
+        topic = self.topics.get(key)
+        return topic.text(lang) if topic else None
+
+    def follow_up(self, key: str, lang: str) -> Optional[str]:
+        """
+        The follow-up suggestion for a topic: a few related topics and a closing question.
+
+        Returns:
+            Optional[str]: The suggestion, or None if the topic's category has none
+        """
+        try:
+            return self._follow_ups[key, lang]
+        except KeyError:
+            # Unknown topic or a language outside SUPPORTED_LANGUAGES
+            return self._render_follow_up(key, lang)
+
+    def _render_follow_up(self, key: str, lang: str) -> Optional[str]:
+        """Build the follow-up suggestion for a topic from its category's templates."""
+        topic = self.topics.get(key)
+        templates = FOLLOW_UP_TEMPLATES.get(topic.category) if topic else None
+        if templates is None:
+            return None
+        siblings_template, closing_template = templates
+        parts = []
+        if siblings_template in self.messages:
+            siblings = [sibling.title(lang) for sibling in self.siblings(key, FOLLOW_UP_MAX_SIBLINGS)]
+            if siblings:
+                parts.append(self.message(siblings_template, lang).format(items=', '.join(siblings)))
+        if closing_template in self.messages:
+            parts.append(self.message(closing_template, lang))
+        return ".\n\n".join(parts) if parts else None
+
+    def replace(self, other: 'KnowledgeBase') -> None:
+        """Adopt another knowledge base's indexes in place, so every reference to this one sees them."""
+        self.version, self.topics, self.categories = other.version, other.topics, other.categories
+        self.messages, self._names, self._follow_ups = other.messages, other._names, other._follow_ups
+
+# The pack most recently indexed and its knowledge base, shared by every structure derived from that pack
+_last_built: Tuple[Optional[ContentPack], Optional[KnowledgeBase]] = (None, None)
+
+def knowledge_for(pack: ContentPack) -> KnowledgeBase:
+    """
+    Returns the knowledge base of a content pack, building it only once however many subscribers ask.
+
+    Content subscribers all build from the same pack on the content thread, so
+    the matcher, search index and menus index the topics parsed here.
+    """
+    global _last_built
+    built_pack, knowledge = _last_built
+    if built_pack is not pack or knowledge is None:
+        knowledge = KnowledgeBase(pack)
+        _last_built = (pack, knowledge)
+    return knowledge
+
+# Shared knowledge base, updated in place off the event loop when the content pack is reloaded
+knowledge_base = knowledge_for(content_store.pack)
+content_store.subscribe(knowledge_for, knowledge_base.replace)
@@ -1,42 +1,191 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+from config import (
+    LOG_FILE,
+    LOG_ASYNC,
+    LOG_QUEUE_SIZE,
+    LOG_QUEUE_POLICY,
+    LOG_JSON,
+    LOG_SAMPLE_RATES,
+    LOKI_URL
+)
 
-def setup_logger(name: str) -> logging.Logger:
+try:
+    import logging_loki
+except ImportError:  # optional dependency
+    logging_loki = None
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
     """
-    Set up a logger with both file and console handlers.
-    
-    Args:
-        name (str): Name of the logger
-        
-    Returns:
-        logging.Logger: Configured logger instance
+    Keeps only a fraction of INFO-and-below records for selected loggers.
+
+    Warnings and errors are never sampled out.
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_formatter = logging.Formatter(
-        '%(levelname)s - %(message)s'
-    )
-    
+
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Args:
+            rates (Dict[str, float]): Logger name -> fraction of records to keep (0.0 to 1.0)
+        """
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler with a drop-or-block policy for a full queue.
+
+    With the 'drop' policy the record is discarded and counted, so logging can
+    never stall the event loop; with 'block' the caller waits for space.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: str = 'drop'):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# Handlers shared by every logger set up through setup_logger
+_handlers: Optional[List[logging.Handler]] = None
+_listener: Optional[QueueListener] = None
+
+def _build_output_handlers() -> List[logging.Handler]:
+    """Create the handlers that actually write records (file, console, optional Loki)."""
+    if LOG_JSON:
+        file_formatter = console_formatter = JsonFormatter()
+    else:
+        file_formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        console_formatter = logging.Formatter(
+            '%(levelname)s - %(message)s'
+        )
+
     # File handler (rotating log file)
     file_handler = RotatingFileHandler(
-        'bot.log',
+        LOG_FILE,
         maxBytes=1024 * 1024,  # 1MB
         backupCount=5
     )
     file_handler.setFormatter(file_formatter)
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(console_formatter)
-    
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger 
\ No newline at end of file
+
+    handlers = [file_handler, console_handler]
+
+    # Optional Loki sink; it pushes over HTTP on every record, so it is only
+    # attached behind the listener thread in async mode
+    if LOKI_URL and LOG_ASYNC and logging_loki is not None:
+        handlers.append(logging_loki.LokiHandler(
+            url=LOKI_URL,
+            tags={'application': 'danang_bot'},
+            version='1'
+        ))
+    return handlers
+
+def _report_skipped_loki(handlers: List[logging.Handler]) -> None:
+    """Warn through the regular handlers when LOKI_URL is set but the Loki sink was not attached."""
+    if not LOKI_URL:
+        return
+    if logging_loki is None:
+        reason = "python-logging-loki is not installed"
+    elif not LOG_ASYNC:
+        reason = "LOG_ASYNC is off and Loki pushes would block the logging caller"
+    else:
+        return
+    logger = logging.getLogger(__name__)
+    for handler in handlers:
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+    logger.warning("LOKI_URL is set but logs are not sent to Loki: %s", reason)
+
+def _get_handlers() -> List[logging.Handler]:
+    """Create the shared handlers on first use."""
+    global _handlers, _listener
+    if _handlers is None:
+        output_handlers = _build_output_handlers()
+        if LOG_ASYNC:
+            # Records are queued on the caller's thread and written by a background listener
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            queue_handler = BoundedQueueHandler(log_queue, policy=LOG_QUEUE_POLICY)
+            _listener = QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_logging)
+            _handlers = [queue_handler]
+        else:
+            _handlers = output_handlers
+        if LOG_SAMPLE_RATES:
+            sampling_filter = SamplingFilter(LOG_SAMPLE_RATES)
+            for handler in _handlers:
+                handler.addFilter(sampling_filter)
+        _report_skipped_loki(_handlers)
+    return _handlers
+
+def dropped_records() -> int:
+    """Return how many records were dropped because the log queue was full."""
+    return sum(getattr(handler, 'dropped', 0) for handler in _handlers or ())
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background listener, if running."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logger(name: str) -> logging.Logger:
+    """
+    Set up a logger with both file and console handlers.
+
+    When LOG_ASYNC is enabled the logger only enqueues records, and a background
+    listener thread formats and writes them.
+
+    Args:
+        name (str): Name of the logger
+
+    Returns:
+        logging.Logger: Configured logger instance
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+
+    # Add handlers (shared, so they are only created once)
+    for handler in _get_handlers():
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+
+    return logger
@@ -0,0 +1,235 @@
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from config import (
+    GREETING_PHRASES,
+    THANK_YOU_PHRASES,
+    DANANG_KEYWORDS,
+    FOLLOW_UP_PHRASES,
+    NEARBY_PHRASES
+)
+from utils.content import content_store
+from utils.knowledge import KnowledgeBase, knowledge_base, knowledge_for
+
+# Match kinds
+GREETING = 'greeting'
+THANKS = 'thanks'
+DANANG_KEYWORD = 'danang_keyword'
+FOLLOW_UP = 'follow_up'
+NEARBY = 'nearby'
+TOPIC = 'topic'
+
+class Match(NamedTuple):
+    """A pattern occurrence in the scanned text; end is exclusive."""
+    start: int
+    end: int
+    kind: str
+    value: Hashable
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a set of phrases.
+
+    The automaton is compiled once into a deterministic transition table, so
+    finding every occurrence of every phrase costs a single pass over the text
+    regardless of how many phrases are registered.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._pattern_outputs: List[List[Tuple[int, str, Hashable]]] = [[]]
+        self._outputs: List[List[Tuple[int, str, Hashable]]] = []
+        self._delta: Optional[List[Dict[str, int]]] = None
+        self.pattern_count = 0
+
+    def add(self, phrase: str, kind: str, value: Hashable = None) -> None:
+        """
+        Register a phrase. Must be called before build().
+
+        Args:
+            phrase (str): Lowercase text to match
+            kind (str): Match kind reported for this phrase
+            value (Hashable, optional): Payload reported for this phrase
+        """
+        if not phrase:
+            return
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._pattern_outputs.append([])
+            state = next_state
+        self._pattern_outputs[state].append((len(phrase), kind, value))
+        self._delta = None
+        self.pattern_count += 1
+
+    def build(self) -> 'KeywordMatcher':
+        """
+        Compute failure links and the full transition table.
+
+        Returns:
+            KeywordMatcher: self, for chaining
+        """
+        delta: List[Dict[str, int]] = [{} for _ in self._goto]
+        outputs = [list(output) for output in self._pattern_outputs]
+        fail = [0] * len(self._goto)
+        delta[0] = dict(self._goto[0])
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # Inherit the failure state's transitions, then override with our own edges
+            delta[state] = dict(delta[fail[state]])
+            for char, child in self._goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0)
+                delta[state][char] = child
+                queue.append(child)
+            outputs[state].extend(outputs[fail[state]])
+        self._outputs = outputs
+        self._delta = delta
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Match]:
+        """
+        Yield every occurrence of every registered phrase in text.
+
+        Args:
+            text (str): Lowercase text to scan
+
+        Yields:
+            Match: Occurrences in order of their end position
+        """
+        if self._delta is None:
+            self.build()
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                end = index + 1
+                for length, kind, value in outputs[state]:
+                    yield Match(end - length, end, kind, value)
+
+    def find_all(self, text: str) -> List[Match]:
+        """Return iter_matches(text) as a list."""
+        return list(self.iter_matches(text))
+
+def on_word_boundaries(text: str, match: Match) -> bool:
+    """
+    Whether a match is a whole word or phrase of the text rather than part of a longer word,
+    so 'hue' is not found in "hues" nor 'my son' in "my song".
+
+    Intent keywords may take an English plural ('beaches', 'places'); topic names may not.
+    """
+    if match.start > 0 and text[match.start - 1].isalnum():
+        return False
+    end = match.end
+    if match.kind != TOPIC:
+        if text.startswith('es', end):
+            end += 2
+        elif text.startswith('s', end):
+            end += 1
+    return end >= len(text) or not text[end].isalnum()
+
+class MessageScan:
+    """Everything the message matcher found in one pass over a query."""
+
+    __slots__ = ('matches', 'greeting', 'thanks', 'danang_keyword', 'follow_up', 'nearby', 'topic')
+
+    def __init__(self, matches: List[Match], topic_rank: Dict[Tuple[str, str], int]):
+        self.matches = matches
+        self.greeting = False
+        self.thanks = False
+        self.danang_keyword = False
+        self.follow_up = False
+        self.nearby = False
+        self.topic: Optional[Tuple[str, str]] = None
+        best_rank = None
+        for match in matches:
+            kind = match.kind
+            if kind == TOPIC:
+                rank = topic_rank[match.value]
+                if best_rank is None or rank < best_rank:
+                    best_rank = rank
+                    self.topic = match.value
+            elif kind == GREETING:
+                # Greetings only count at the very start of the message
+                if match.start == 0:
+                    self.greeting = True
+            elif kind == THANKS:
+                self.thanks = True
+            elif kind == DANANG_KEYWORD:
+                self.danang_keyword = True
+            elif kind == FOLLOW_UP:
+                self.follow_up = True
+            elif kind == NEARBY:
+                self.nearby = True
+
+    @property
+    def topics(self) -> List[Tuple[str, str]]:
+        """All distinct (key, category) topics found, in order of appearance."""
+        seen = []
+        for match in self.matches:
+            if match.kind == TOPIC and match.value not in seen:
+                seen.append(match.value)
+        return seen
+
+class MessageMatcher:
+    """
+    Compiled index of the knowledge base topics, their aliases and the intent
+    keyword tables, used to classify a message in a single scan.
+    """
+
+    def __init__(
+        self,
+        knowledge: Optional[KnowledgeBase] = None,
+        greetings: Iterable[str] = GREETING_PHRASES,
+        thanks: Iterable[str] = THANK_YOU_PHRASES,
+        danang_keywords: Iterable[str] = DANANG_KEYWORDS,
+        follow_ups: Iterable[str] = FOLLOW_UP_PHRASES,
+        nearby: Iterable[str] = NEARBY_PHRASES
+    ):
+        if knowledge is None:
+            knowledge = knowledge_base
+        self.automaton = KeywordMatcher()
+        # Topics are ranked in knowledge base order so the first-listed topic
+        # wins when a query mentions several
+        self.topic_rank: Dict[Tuple[str, str], int] = {}
+        for topic in knowledge.topics.values():
+            self.topic_rank[topic.ref] = topic.rank
+            for phrase in topic.names():
+                self.automaton.add(phrase, TOPIC, topic.ref)
+        for phrase in greetings:
+            self.automaton.add(phrase, GREETING)
+        for phrase in thanks:
+            self.automaton.add(phrase, THANKS)
+        for phrase in danang_keywords:
+            self.automaton.add(phrase, DANANG_KEYWORD)
+        for phrase in follow_ups:
+            self.automaton.add(phrase, FOLLOW_UP)
+        for phrase in nearby:
+            self.automaton.add(phrase, NEARBY)
+        self.automaton.build()
+
+    def scan(self, query: str) -> MessageScan:
+        """
+        Classify a lowercase query.
+
+        Args:
+            query (str): Lowercased message text
+
+        Returns:
+            MessageScan: Intent flags, best topic and every match on word boundaries
+        """
+        matches = [match for match in self.automaton.iter_matches(query) if on_word_boundaries(query, match)]
+        return MessageScan(matches, self.topic_rank)
+
+    def replace(self, other: 'MessageMatcher') -> None:
+        """Adopt another matcher's compiled tables in place, so every reference to this one sees them."""
+        self.automaton, self.topic_rank = other.automaton, other.topic_rank
+
+# Shared matcher built from the knowledge base, rebuilt off the event loop when the content pack is reloaded
+message_matcher = MessageMatcher()
+content_store.subscribe(lambda pack: MessageMatcher(knowledge_for(pack)), message_matcher.replace)
@@ -0,0 +1,206 @@
+import bisect
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+class Metric:
+    """Base class for a named metric with optional labels."""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f'{self.name}{_format_labels(self.label_names, key)} {value}'
+
+class Gauge(Metric):
+    """Point-in-time value, read from a callback at scrape time."""
+
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def samples(self) -> Iterator[str]:
+        try:
+            yield f'{self.name} {float(self.callback())}'
+        except Exception as e:
+            logger.error("Error reading gauge %s: %s", self.name, e)
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe the duration of the with-block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                le_label = f'le="{le}"'
+                yield f'{self.name}_bucket{_format_labels(self.label_names, key, le_label)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.label_names, key)} {total}'
+            yield f'{self.name}_count{_format_labels(self.label_names, key)} {count}'
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, documentation, callback))
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: All metrics in the Prometheus text exposition format
+        """
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+# Process-wide registry and the metrics shared across modules
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'danang_bot_stage_seconds',
+    'Time spent in each message handling stage',
+    ('handler', 'stage')
+)
+PLACE_LOOKUP_SECONDS = registry.histogram(
+    'danang_bot_place_lookup_seconds',
+    'get_place_info latency by where the result came from',
+    ('source',)
+)
+PLACE_CACHE_LOOKUPS = registry.counter(
+    'danang_bot_place_cache_lookups_total',
+    'Place lookups by cache result (hit, stale or miss)',
+    ('result',)
+)
+DISCORD_SEND_SECONDS = registry.histogram(
+    'danang_bot_discord_send_seconds',
+    'Latency of Discord message sends',
+    ('handler',)
+)
+
+class MetricsServer:
+    """Opt-in local HTTP server exposing /metrics for Prometheus."""
+
+    def __init__(self, host: str, port: int, metrics_registry: Registry = registry):
+        self.host = host
+        self.port = port
+        self.registry = metrics_registry
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
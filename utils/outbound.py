@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, Tuple
+import discord
+from utils.rate_limit import TokenBucket
+from utils.metrics import registry
+from config import OUTBOUND_RATE_LIMITS, OUTBOUND_MAX_QUEUE
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_ACTIONS = registry.counter(
+    'danang_bot_outbound_actions_total',
+    'Deferred Discord actions by route and result',
+    ('route', 'result')
+)
+OUTBOUND_WAIT_SECONDS = registry.histogram(
+    'danang_bot_outbound_rate_limit_wait_seconds',
+    'Time deferred Discord actions waited for their rate-limit bucket',
+    ('route',)
+)
+
+BucketKey = Tuple[str, int]
+
+class OutboundScheduler:
+    """
+    Runs follow-up Discord actions (reactions, secondary sends, edits) off the response path.
+
+    Actions are queued per (route, channel) bucket and paced with a token bucket
+    matching Discord's per-route limits, so they are spread out instead of
+    bursting into 429s. Each bucket is drained by its own short-lived worker, so
+    a slow channel never holds up another one.
+    """
+
+    def __init__(self, rate_limits: Dict[str, Tuple[float, float]] = OUTBOUND_RATE_LIMITS, max_queue: int = OUTBOUND_MAX_QUEUE):
+        """
+        Args:
+            rate_limits (Dict[str, Tuple[float, float]]): Route -> (requests, per seconds)
+            max_queue (int): Maximum queued actions per bucket; extra actions are dropped
+        """
+        self.rate_limits = rate_limits
+        self.max_queue = max_queue
+        self._queues: Dict[BucketKey, Deque[Tuple[float, Callable[[], Awaitable]]]] = {}
+        self._buckets: Dict[BucketKey, TokenBucket] = {}
+        self._workers: Dict[BucketKey, asyncio.Task] = {}
+        registry.gauge(
+            'danang_bot_outbound_queue_depth',
+            'Deferred Discord actions waiting to run',
+            lambda: self.queue_depth
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _bucket(self, key: BucketKey) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            requests, per = self.rate_limits.get(key[0], (1, 1.0))
+            bucket = self._buckets[key] = TokenBucket(rate=requests / per, capacity=requests)
+        return bucket
+
+    def submit(self, route: str, channel_id: int, action: Callable[[], Awaitable]) -> bool:
+        """
+        Queue an action to run when its rate-limit bucket allows.
+
+        Args:
+            route (str): Route name, e.g. 'reaction', 'send' or 'edit'
+            channel_id (int): Channel the action targets (Discord buckets are per channel)
+            action (Callable[[], Awaitable]): Zero-argument coroutine function performing the request
+
+        Returns:
+            bool: False if the bucket's queue was full and the action was dropped
+        """
+        key = (route, channel_id)
+        queue = self._queues.setdefault(key, deque())
+        if len(queue) >= self.max_queue:
+            OUTBOUND_ACTIONS.inc(route=route, result='dropped')
+            logger.warning("Outbound queue for %s in channel %s is full, dropping action", route, channel_id)
+            return False
+        queue.append((time.monotonic(), action))
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = asyncio.ensure_future(self._drain(key))
+        return True
+
+    def schedule_reactions(self, message: discord.Message, emojis: Iterable[str]) -> None:
+        """Queue reactions on a message without waiting for them."""
+        for emoji in emojis:
+            self.submit('reaction', message.channel.id, lambda emoji=emoji: message.add_reaction(emoji))
+
+    def schedule_send(self, channel: discord.abc.Messageable, *args, **kwargs) -> None:
+        """Queue a secondary message for a channel without waiting for it."""
+        self.submit('send', channel.id, lambda: channel.send(*args, **kwargs))
+
+    def schedule_edit(
+        self,
+        message: discord.Message,
+        on_edited: Optional[Callable[[discord.Message], None]] = None,
+        **kwargs
+    ) -> None:
+        """Queue an edit of a message without waiting for it; on_edited receives the edited message."""
+        async def edit():
+            edited = await message.edit(**kwargs)
+            if on_edited is not None:
+                on_edited(edited)
+
+        self.submit('edit', message.channel.id, edit)
+
+    async def _drain(self, key: BucketKey) -> None:
+        route = key[0]
+        queue = self._queues[key]
+        bucket = self._bucket(key)
+        while queue:
+            delay = bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            queued_at, action = queue.popleft()
+            bucket.try_acquire()
+            OUTBOUND_WAIT_SECONDS.observe(time.monotonic() - queued_at, route=route)
+            try:
+                await action()
+                OUTBOUND_ACTIONS.inc(route=route, result='ok')
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    # Back off the whole bucket and retry the action once it reopens
+                    retry_after = getattr(e, 'retry_after', None) or 1.0
+                    logger.warning("Rate limited on %s in channel %s, pausing %.2fs", route, key[1], retry_after)
+                    bucket.pause(retry_after)
+                    queue.appendleft((queued_at, action))
+                    OUTBOUND_ACTIONS.inc(route=route, result='rate_limited')
+                else:
+                    logger.error("Deferred %s failed in channel %s: %s", route, key[1], e)
+                    OUTBOUND_ACTIONS.inc(route=route, result='error')
+            except Exception as e:
+                logger.error("Deferred %s failed in channel %s: %s", route, key[1], e)
+                OUTBOUND_ACTIONS.inc(route=route, result='error')
+        # Idle bucket: release its state
+        self._queues.pop(key, None)
+        self._workers.pop(key, None)
+        if bucket.delay() == 0:
+            self._buckets.pop(key, None)
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Give queued actions up to `timeout` seconds to finish, then cancel the rest."""
+        workers = [worker for worker in self._workers.values() if not worker.done()]
+        if not workers:
+            return
+        done, pending = await asyncio.wait(workers, timeout=timeout)
+        for worker in pending:
+            worker.cancel()
+
+# Shared scheduler for all handlers
+outbound_scheduler = OutboundScheduler()
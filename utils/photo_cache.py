@@ -0,0 +1,323 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import discord
+from cachetools import TTLCache
+from utils.places import get_session
+from utils.metrics import registry
+from config import (
+    GOOGLE_API_KEY,
+    GOOGLE_PLACES_PHOTO_URL,
+    PHOTO_CACHE_DIR,
+    PHOTO_CACHE_MAX_BYTES,
+    PHOTO_MAX_WIDTH,
+    PHOTO_MAX_DOWNLOAD_BYTES,
+    PHOTO_CDN_URL_MARGIN,
+    NEGATIVE_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+PHOTO_REQUESTS = registry.counter(
+    'danang_bot_photo_requests_total',
+    'Place photos attached to replies, by where they came from (cdn, disk, download, error)',
+    ('source',)
+)
+
+_EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+
+def photo_reference(place_info: Optional[Dict]) -> Optional[str]:
+    """
+    Get the Places photo reference from place information.
+
+    Entries cached before photos were stored by reference only have a photo URL,
+    so the reference is read back out of it.
+    """
+    if not place_info:
+        return None
+    reference = place_info.get('photo_reference')
+    if reference:
+        return reference
+    legacy_url = place_info.get('photo_url')
+    if legacy_url:
+        return parse_qs(urlparse(legacy_url).query).get('photoreference', [None])[0]
+    return None
+
+def _cdn_expiry(url: str) -> Optional[float]:
+    """Expiry of a signed Discord CDN URL (hex 'ex' parameter), or None if it does not expire."""
+    expires = parse_qs(urlparse(url).query).get('ex')
+    if not expires:
+        return None
+    try:
+        return float(int(expires[0], 16))
+    except ValueError:
+        return None
+
+class PhotoCache:
+    """
+    Content-addressed, size-bounded on-disk cache of place photos.
+
+    Each photo is downloaded from the Places photo endpoint once, at a fixed
+    width, and stored under the SHA-256 of its bytes, so the API key never
+    reaches Discord and the same image is never stored twice. Replies attach
+    the file; once Discord has it, the attachment's CDN URL is remembered and
+    later embeds link to it without uploading again. When the directory grows
+    past max_bytes, the least recently used files are deleted.
+
+    The index lives in memory and is written back in the background, so a
+    lookup never touches the disk; file work runs on a single background thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_width: int = PHOTO_MAX_WIDTH):
+        """
+        Args:
+            directory (str): Directory holding the photos and their index
+            max_bytes (int): Maximum total size of cached photos
+            max_width (int): Width requested from the Places photo endpoint
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_width = max_width
+        self._index_path = os.path.join(directory, 'index.json')
+        # photo reference -> {'file': name, 'cdn_url': url or None, 'cdn_expires': timestamp or None}
+        self._refs: Dict[str, Dict] = {}
+        # file name -> [size in bytes, last used timestamp]
+        self._files: Dict[str, List[float]] = {}
+        self._loading: Optional[asyncio.Future] = None
+        self._save_pending = False
+        self._dirty = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='photo-cache')
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # References whose download failed recently; not retried until the entry expires
+        self._failed = TTLCache(maxsize=100, ttl=NEGATIVE_CACHE_TTL)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for size, _ in self._files.values())
+
+    def _load_sync(self) -> Tuple[Dict[str, Dict], Dict[str, List[float]]]:
+        """Read the index and the sizes of the files actually on disk."""
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as handle:
+                index = json.load(handle)
+        except (OSError, ValueError):
+            index = {}
+        last_used = index.get('files', {})
+        files = {}
+        for name in os.listdir(self.directory):
+            if name == 'index.json' or name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.directory, name)
+            files[name] = [os.path.getsize(path), last_used.get(name, os.path.getmtime(path))]
+        # Drop references to files that no longer exist
+        refs = {ref: entry for ref, entry in index.get('refs', {}).items() if entry.get('file') in files}
+        return refs, files
+
+    async def _load(self) -> None:
+        try:
+            self._refs, self._files = await self._run(self._load_sync)
+        except OSError as e:
+            logger.error("Error loading photo cache from %s: %s", self.directory, e)
+
+    async def _ensure_loaded(self) -> None:
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+        await asyncio.shield(self._loading)
+
+    def _write_sync(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            return
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as handle:
+            handle.write(data)
+        os.replace(temp_path, path)
+
+    def _delete_sync(self, names: List[str]) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _save_sync(self, snapshot: Dict) -> None:
+        temp_path = f"{self._index_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(snapshot, handle)
+        os.replace(temp_path, self._index_path)
+
+    def _snapshot(self) -> Dict:
+        return {
+            'refs': {ref: dict(entry) for ref, entry in self._refs.items()},
+            'files': {name: last_used for name, (_, last_used) in self._files.items()}
+        }
+
+    def _schedule_save(self) -> None:
+        """Write the index back soon, batching changes that arrive together."""
+        self._dirty = True
+        if not self._save_pending:
+            self._save_pending = True
+            asyncio.ensure_future(self._save())
+
+    async def _save(self) -> None:
+        await asyncio.sleep(1)
+        self._save_pending = False
+        if not self._dirty:
+            # Already written by close()
+            return
+        self._dirty = False
+        try:
+            await self._run(self._save_sync, self._snapshot())
+        except Exception as e:
+            logger.error("Error saving photo cache index: %s", e)
+
+    def _evict(self, keep: str) -> None:
+        """Forget the least recently used files until the cache fits in max_bytes, and delete them."""
+        total = self.total_bytes
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for name, (size, _) in sorted(self._files.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            del self._files[name]
+            total -= size
+            evicted.append(name)
+        if evicted:
+            evicted_set = set(evicted)
+            self._refs = {ref: entry for ref, entry in self._refs.items() if entry['file'] not in evicted_set}
+            asyncio.ensure_future(self._run(self._delete_sync, evicted))
+            logger.info("Evicted %s photo(s) from the cache", len(evicted))
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _download(self, reference: str) -> Optional[str]:
+        """Download a photo once, however many callers ask for it at the same time."""
+        future = self._inflight.get(reference)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(reference))
+            self._inflight[reference] = future
+            future.add_done_callback(lambda _: self._inflight.pop(reference, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, reference: str) -> Optional[str]:
+        session = await get_session()
+        params = {'maxwidth': self.max_width, 'photoreference': reference, 'key': GOOGLE_API_KEY}
+        try:
+            async with session.get(GOOGLE_PLACES_PHOTO_URL, params=params) as response:
+                if response.status != 200:
+                    logger.error("Photo request failed with status %s", response.status)
+                    return None
+                if (response.content_length or 0) > PHOTO_MAX_DOWNLOAD_BYTES:
+                    logger.error("Photo is too large (%s bytes)", response.content_length)
+                    return None
+                chunks = []
+                size = 0
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    size += len(chunk)
+                    if size > PHOTO_MAX_DOWNLOAD_BYTES:
+                        logger.error("Photo is larger than %s bytes", PHOTO_MAX_DOWNLOAD_BYTES)
+                        return None
+                    chunks.append(chunk)
+                data = b''.join(chunks)
+                content_type = response.content_type
+        except Exception as e:
+            logger.error("Error downloading photo: %s", e)
+            return None
+        name = f"{hashlib.sha256(data).hexdigest()}.{_EXTENSIONS.get(content_type, 'jpg')}"
+        try:
+            await self._run(self._write_sync, name, data)
+        except OSError as e:
+            logger.error("Error writing photo to the cache: %s", e)
+            return None
+        self._files[name] = [len(data), time.time()]
+        self._refs[reference] = {'file': name, 'cdn_url': None, 'cdn_expires': None}
+        self._evict(keep=name)
+        self._schedule_save()
+        return name
+
+    async def attach(self, embed: discord.Embed, place_info: Optional[Dict]) -> List[discord.File]:
+        """
+        Point the embed's image at the place photo.
+
+        Args:
+            embed (discord.Embed): Embed to set the image on
+            place_info (Dict, optional): Place information from get_place_info
+
+        Returns:
+            List[discord.File]: Files to send with the embed (empty if the photo is
+            already on Discord's CDN or there is no photo)
+        """
+        reference = photo_reference(place_info)
+        if not reference:
+            return []
+        try:
+            await self._ensure_loaded()
+            entry = self._refs.get(reference)
+            if entry is not None:
+                if self._cdn_url_fresh(entry):
+                    PHOTO_REQUESTS.inc(source='cdn')
+                    embed.set_image(url=entry['cdn_url'])
+                    return []
+                name = entry['file']
+                self._files[name][1] = time.time()
+                PHOTO_REQUESTS.inc(source='disk')
+            elif reference in self._failed:
+                return []
+            else:
+                name = await self._download(reference)
+                if name is None:
+                    self._failed[reference] = True
+                    PHOTO_REQUESTS.inc(source='error')
+                    return []
+                PHOTO_REQUESTS.inc(source='download')
+        except Exception as e:
+            logger.error("Error preparing photo: %s", e)
+            PHOTO_REQUESTS.inc(source='error')
+            return []
+        embed.set_image(url=f"attachment://{name}")
+        return [discord.File(os.path.join(self.directory, name), filename=name)]
+
+    @staticmethod
+    def _cdn_url_fresh(entry: Dict) -> bool:
+        expires = entry.get('cdn_expires')
+        return bool(entry.get('cdn_url')) and (expires is None or expires - time.time() > PHOTO_CDN_URL_MARGIN)
+
+    def remember_upload(self, place_info: Optional[Dict], message: Optional[discord.Message]) -> None:
+        """Remember the CDN URL Discord gave an attached photo, so later embeds can link to it."""
+        reference = photo_reference(place_info)
+        embeds = getattr(message, 'embeds', None)
+        if not reference or not embeds:
+            return
+        url = embeds[0].image.url
+        entry = self._refs.get(reference)
+        if not url or url.startswith('attachment://') or entry is None or self._cdn_url_fresh(entry):
+            return
+        entry['cdn_url'] = url
+        entry['cdn_expires'] = _cdn_expiry(url)
+        self._schedule_save()
+
+    def close(self) -> None:
+        """Write back unsaved index changes and stop the worker thread."""
+        self._executor.shutdown(wait=True)
+        if self._dirty:
+            try:
+                self._save_sync(self._snapshot())
+            except OSError as e:
+                logger.error("Error saving photo cache index: %s", e)
+            self._dirty = False
+
+# Shared photo cache for all handlers
+photo_cache = PhotoCache(PHOTO_CACHE_DIR, PHOTO_CACHE_MAX_BYTES)
+registry.gauge('danang_bot_photo_cache_bytes', 'Total size of the on-disk photo cache', lambda: photo_cache.total_bytes)
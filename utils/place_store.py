@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class PlaceStore:
+    """
+    Persistent place cache tier backed by a local SQLite file.
+
+    Entries are stored as JSON together with the time they were fetched, so the
+    caller can decide whether an entry is fresh, stale or expired. All database
+    work runs on a single background thread to keep the event loop free.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Location of the SQLite database file
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='place-store')
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use and create the schema if needed."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS places ('
+                ' cache_key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' fetched_at REAL NOT NULL)'
+            )
+            conn.commit()
+            self._conn = conn
+            logger.info("Opened persistent place cache at %s", self.path)
+        return self._conn
+
+    def get_sync(self, cache_key: str) -> Optional[Tuple[Dict, float]]:
+        """
+        Read an entry.
+
+        Args:
+            cache_key (str): Cache key to look up
+
+        Returns:
+            Optional[Tuple[Dict, float]]: The stored value and its fetch timestamp, or None
+        """
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT value, fetched_at FROM places WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put_sync(self, cache_key: str, value: Dict, fetched_at: Optional[float] = None) -> None:
+        """
+        Insert or replace an entry.
+
+        Args:
+            cache_key (str): Cache key to store under
+            value (Dict): JSON-serializable place information
+            fetched_at (float, optional): Fetch timestamp, defaults to now
+        """
+        if fetched_at is None:
+            fetched_at = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO places (cache_key, value, fetched_at) VALUES (?, ?, ?)',
+                (cache_key, json.dumps(value), fetched_at)
+            )
+            conn.commit()
+
+    def purge_sync(self, max_age: float) -> int:
+        """
+        Delete entries older than max_age seconds.
+
+        Returns:
+            int: Number of deleted entries
+        """
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute('DELETE FROM places WHERE fetched_at < ?', (time.time() - max_age,))
+            conn.commit()
+        return cursor.rowcount
+
+    async def get(self, cache_key: str) -> Optional[Tuple[Dict, float]]:
+        """Async wrapper around get_sync that runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get_sync, cache_key)
+
+    async def put(self, cache_key: str, value: Dict, fetched_at: Optional[float] = None) -> None:
+        """Async wrapper around put_sync that runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.put_sync, cache_key, value, fetched_at)
+
+    async def purge(self, max_age: float) -> int:
+        """Async wrapper around purge_sync that runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.purge_sync, max_age)
+
+    def close(self) -> None:
+        """Close the database connection and stop the worker thread."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._executor.shutdown(wait=False)
@@ -1,20 +1,139 @@
 import aiohttp
 import asyncio
 from cachetools import TTLCache
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 import logging
+import time
+from utils.place_store import PlaceStore
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import registry, PLACE_LOOKUP_SECONDS, PLACE_CACHE_LOOKUPS
+from utils.knowledge import knowledge_base
+from utils.geo import observe_location
 from config import (
     GOOGLE_API_KEY,
     GOOGLE_PLACES_API_URL,
-    GOOGLE_PLACES_PHOTO_URL,
+    GOOGLE_PLACES_DETAILS_URL,
+    PLACE_DETAILS_FIELDS,
+    DETAILS_CONCURRENCY,
+    ENRICHMENT_MAX_ATTEMPTS,
     CACHE_TTL,
-    DA_NANG_INFO
+    CACHE_STALE_TTL,
+    PLACE_CACHE_DB_PATH,
+    NEGATIVE_CACHE_TTL,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RECOVERY_TIMEOUT,
+    HTTP_CONNECTION_LIMIT,
+    HTTP_CONNECTION_LIMIT_PER_HOST,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_REQUEST_TIMEOUT,
+    DEFAULT_LANGUAGE
 )
 
 logger = logging.getLogger(__name__)
 
-# Initialize cache
+# Initialize cache: in-memory TTL tier in front of a persistent SQLite tier.
+# Memory entries are (value, fetched_at), so a record copied from the persistent
+# tier expires CACHE_TTL after its fetch rather than after the copy.
 place_cache = TTLCache(maxsize=100, ttl=CACHE_TTL)
+place_store = PlaceStore(PLACE_CACHE_DB_PATH)
+
+# Short-lived cache of failed or empty lookups (cache key -> API status)
+negative_cache = TTLCache(maxsize=100, ttl=NEGATIVE_CACHE_TTL)
+
+# Trips after repeated upstream failures so replies fall back to static data immediately
+places_breaker = CircuitBreaker(
+    'places_api',
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=BREAKER_RECOVERY_TIMEOUT
+)
+
+# Background refresh tasks for stale entries (kept referenced until done)
+_refresh_tasks = set()
+
+# In-flight upstream lookups keyed by cache key, shared by concurrent callers
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Places waiting for Place Details enrichment, and the task enriching them
+_pending_enrichment: Set[str] = set()
+_enrichment_task: Optional[asyncio.Task] = None
+
+# Enrichments queued per cache key since the last successful one; reset when it expires
+_enrichment_attempts = TTLCache(maxsize=100, ttl=CACHE_TTL)
+
+# Place IDs Place Details answered NOT_FOUND for (cache key -> place_id); they are not sent again
+_rejected_place_ids = TTLCache(maxsize=100, ttl=CACHE_STALE_TTL)
+
+# Upstream fetches started vs. callers that joined one, and breaker trips
+PLACES_UPSTREAM_FETCHES = registry.counter('danang_bot_places_upstream_fetches_total', 'Upstream Places lookups started')
+PLACES_COALESCED_LOOKUPS = registry.counter(
+    'danang_bot_places_coalesced_lookups_total',
+    'Place lookups that joined an in-flight upstream request'
+)
+PLACES_BREAKER_TRIPS = registry.counter(
+    'danang_bot_places_breaker_trips_total',
+    'Times the Places API circuit breaker has opened'
+)
+# Exported as 0 before the first increment
+for _counter in (PLACES_UPSTREAM_FETCHES, PLACES_COALESCED_LOOKUPS, PLACES_BREAKER_TRIPS):
+    _counter.inc(0)
+
+# Breaker state, read at scrape time
+_BREAKER_STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+registry.gauge(
+    'danang_bot_places_breaker_state',
+    'Places API circuit breaker state (0 closed, 1 half-open, 2 open)',
+    lambda: _BREAKER_STATE_VALUES[places_breaker.state]
+)
+
+# Shared HTTP session, opened by the bot's setup hook and reused by every lookup
+_session: Optional[aiohttp.ClientSession] = None
+
+async def start_session() -> aiohttp.ClientSession:
+    """
+    Open the shared, pooled HTTP session used for all Places API requests.
+    
+    Safe to call more than once; an already open session is returned as is.
+    
+    Returns:
+        aiohttp.ClientSession: The shared session
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTION_LIMIT,
+            limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=HTTP_REQUEST_TIMEOUT,
+            connect=HTTP_CONNECT_TIMEOUT
+        )
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        logger.info("Opened shared Places HTTP session")
+    return _session
+
+async def close_session() -> None:
+    """Close the shared HTTP session if it is open."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Closed shared Places HTTP session")
+    _session = None
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Get the shared HTTP session, opening it lazily if the setup hook has not run
+    (for example when the module is used from a script).
+    
+    Returns:
+        aiohttp.ClientSession: The shared session
+    """
+    if _session is None or _session.closed:
+        return await start_session()
+    return _session
 
 async def get_place_info(place_name: str) -> Dict:
     """
@@ -24,57 +143,390 @@ async def get_place_info(place_name: str) -> Dict:
         place_name (str): Name of the place to look up
         
     Returns:
-        Dict: Place information including name, description, and photo URL
+        Dict: Place information including name, description, and photo reference
+    """
+    started = time.perf_counter()
+    result, source = await _lookup(place_name)
+    PLACE_LOOKUP_SECONDS.observe(time.perf_counter() - started, source=source)
+    # Keep the nearby-attractions index in step with the coordinates Places reports
+    observe_location(place_name, result.get('location'))
+    return result
+
+async def _lookup(place_name: str) -> Tuple[Dict, str]:
+    """
+    Resolve a place through the cache tiers, fetching upstream only on a miss.
+    
+    Returns:
+        Tuple[Dict, str]: Place information and where it came from
     """
     # Check cache first
     cache_key = f"place_{place_name}"
-    if cache_key in place_cache:
-        logger.info(f"Cache hit for {place_name}")
-        return place_cache[cache_key]
+    cached = place_cache.get(cache_key)
+    if cached is not None and time.time() - cached[1] < CACHE_TTL:
+        logger.info("Cache hit for %s", place_name)
+        PLACE_CACHE_LOOKUPS.inc(result='hit')
+        return cached[0], 'memory'
     
+    # Fall back to the persistent tier; it is checked before the negative cache
+    # because a stale record is a better answer than static data during an outage
     try:
-        async with aiohttp.ClientSession() as session:
-            # Search for the place
-            params = {
-                'query': f"{place_name} Da Nang Vietnam",
-                'key': GOOGLE_API_KEY
-            }
-            
-            async with session.get(GOOGLE_PLACES_API_URL, params=params) as response:
-                if response.status != 200:
-                    logger.error(f"API request failed with status {response.status}")
-                    return get_fallback_info(place_name)
-                
-                data = await response.json()
-                
-                if data['status'] != 'OK' or not data['results']:
-                    logger.warning(f"No results found for {place_name}")
-                    return get_fallback_info(place_name)
-                
-                place = data['results'][0]
-                
-                # Get photo if available
-                photo_url = None
-                if 'photos' in place:
-                    photo_reference = place['photos'][0]['photo_reference']
-                    photo_url = f"{GOOGLE_PLACES_PHOTO_URL}?maxwidth=400&photoreference={photo_reference}&key={GOOGLE_API_KEY}"
-                
-                result = {
-                    'name': place['name'],
-                    'description': place.get('formatted_address', 'No description available'),
-                    'maps_url': f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
-                    'photo_url': photo_url,
-                    'rating': place.get('rating'),
-                    'user_ratings_total': place.get('user_ratings_total')
-                }
-                
-                # Cache the result
-                place_cache[cache_key] = result
+        stored = await place_store.get(cache_key)
+    except Exception as e:
+        logger.error("Error reading persistent cache for %s: %s", place_name, e)
+        stored = None
+    
+    if stored is not None:
+        value, fetched_at = stored
+        age = time.time() - fetched_at
+        if age < CACHE_TTL:
+            logger.info("Persistent cache hit for %s", place_name)
+            PLACE_CACHE_LOOKUPS.inc(result='hit')
+            place_cache[cache_key] = (value, fetched_at)
+            return value, 'persistent'
+        if age < CACHE_STALE_TTL:
+            PLACE_CACHE_LOOKUPS.inc(result='stale')
+            # A refresh that just failed is not retried until its negative cache entry expires
+            if cache_key in negative_cache:
+                logger.debug("Serving stale entry for %s (last refresh failed: %s)", place_name, negative_cache[cache_key])
+            else:
+                logger.info("Serving stale entry for %s while refreshing", place_name)
+                schedule_refresh(place_name)
+            return value, 'stale'
+    
+    if cache_key in negative_cache:
+        logger.debug("Negative cache hit for %s (%s)", place_name, negative_cache[cache_key])
+        PLACE_CACHE_LOOKUPS.inc(result='negative')
+        return get_fallback_info(place_name), 'negative'
+    
+    PLACE_CACHE_LOOKUPS.inc(result='miss')
+    return await _fetch_coalesced(cache_key, place_name)
+
+async def refresh_place_info(place_name: str) -> Dict:
+    """
+    Fetch a place from the API regardless of what is cached, updating both tiers.
+    
+    Args:
+        place_name (str): Name of the place to refresh
+        
+    Returns:
+        Dict: Place information
+    """
+    result, _ = await _fetch_coalesced(f"place_{place_name}", place_name)
+    return result
+
+async def place_fetched_at(place_name: str) -> Optional[float]:
+    """
+    When the cached record for a place was fetched, read from the persistent tier
+    (which also holds records written before a restart).
+    
+    Args:
+        place_name (str): Name of the place
+        
+    Returns:
+        Optional[float]: Unix timestamp of the fetch, or None if nothing is cached
+    """
+    try:
+        stored = await place_store.get(f"place_{place_name}")
+    except Exception as e:
+        logger.error("Error reading persistent cache for %s: %s", place_name, e)
+        return None
+    return stored[1] if stored else None
+
+async def purge_expired_places() -> int:
+    """
+    Delete persisted records too old to be served, even as stale entries.
+    
+    Returns:
+        int: Number of deleted records (0 if the store cannot be written)
+    """
+    try:
+        deleted = await place_store.purge(CACHE_STALE_TTL)
+    except Exception as e:
+        logger.error("Error purging persistent cache: %s", e)
+        return 0
+    if deleted:
+        logger.info("Purged %d expired place record(s) from the persistent cache", deleted)
+    return deleted
+
+def schedule_refresh(place_name: str) -> None:
+    """
+    Refresh a place from the API in the background.
+    
+    Joins an in-flight lookup for the same place instead of starting another one.
+    
+    Args:
+        place_name (str): Name of the place to refresh
+    """
+    cache_key = f"place_{place_name}"
+    if cache_key in _inflight:
+        return
+    task = asyncio.ensure_future(_fetch_coalesced(cache_key, place_name))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+async def _fetch_coalesced(cache_key: str, place_name: str) -> Tuple[Dict, str]:
+    """
+    Fetch a place while deduplicating concurrent requests for the same cache key.
+    
+    The first caller starts the upstream request; every caller that arrives while
+    it is still running awaits the same future instead of issuing its own.
+    
+    Args:
+        cache_key (str): Cache key identifying the lookup
+        place_name (str): Name of the place to look up
+        
+    Returns:
+        Tuple[Dict, str]: Place information and whether it was 'coalesced',
+        fetched 'upstream' or skipped because the breaker is open ('breaker_open')
+    """
+    future = _inflight.get(cache_key)
+    if future is not None:
+        PLACES_COALESCED_LOOKUPS.inc()
+        logger.debug("Coalesced lookup for %s", place_name)
+        # Shield so one cancelled waiter does not cancel the shared fetch
+        return await asyncio.shield(future), 'coalesced'
+    
+    if not places_breaker.allow_request():
+        logger.debug("Places API circuit open, using static data for %s", place_name)
+        return get_fallback_info(place_name), 'breaker_open'
+    
+    PLACES_UPSTREAM_FETCHES.inc()
+    future = asyncio.ensure_future(_fetch_place_info(cache_key, place_name))
+    _inflight[cache_key] = future
+    future.add_done_callback(lambda _: _inflight.pop(cache_key, None))
+    return await asyncio.shield(future), 'upstream'
+
+async def _known_place_id(cache_key: str) -> Optional[str]:
+    """Return the place_id remembered for a cache key, from memory or the persistent tier (even if stale)."""
+    cached = place_cache.get(cache_key)
+    if cached and cached[0].get('place_id'):
+        place_id = cached[0]['place_id']
+    else:
+        try:
+            stored = await place_store.get(cache_key)
+        except Exception as e:
+            logger.error("Error reading persistent cache for %s: %s", cache_key, e)
+            return None
+        place_id = stored[0].get('place_id') if stored else None
+    return None if place_id == _rejected_place_ids.get(cache_key) else place_id
+
+def _compact_record(place: Dict, enriched: bool) -> Dict:
+    """
+    Reduce a Text Search or Place Details result to the fields the bot shows.
+    
+    Args:
+        place (Dict): Result object from the Places API
+        enriched (bool): Whether it came from Place Details (hours, phone and website present)
+        
+    Returns:
+        Dict: Compact place information
+    """
+    location = (place.get('geometry') or {}).get('location')
+    photos = place.get('photos')
+    return {
+        'name': place['name'],
+        'description': place.get('formatted_address', 'No description available'),
+        'maps_url': f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
+        # Keep only the photo reference; utils.photo_cache downloads the image (the photo URL needs the API key)
+        'photo_reference': photos[0]['photo_reference'] if photos else None,
+        'rating': place.get('rating'),
+        'user_ratings_total': place.get('user_ratings_total'),
+        'place_id': place['place_id'],
+        'location': [location['lat'], location['lng']] if location else None,
+        'phone': place.get('formatted_phone_number'),
+        'website': place.get('website'),
+        'opening_hours': (place.get('opening_hours') or {}).get('weekday_text'),
+        'enriched': enriched
+    }
+
+async def _store_result(cache_key: str, place_name: str, result: Dict) -> None:
+    """Cache a result in memory and persist it."""
+    fetched_at = time.time()
+    place_cache[cache_key] = (result, fetched_at)
+    try:
+        await place_store.put(cache_key, result, fetched_at)
+    except Exception as e:
+        logger.error("Error writing persistent cache for %s: %s", place_name, e)
+
+async def _fetch_place_info(cache_key: str, place_name: str) -> Dict:
+    """
+    Query the Places API for a place and cache a successful result.
+    
+    A place whose place_id is already known is fetched with one field-masked
+    Place Details request. Otherwise Text Search finds it, the basic result is
+    returned right away and Place Details enrichment is scheduled in the
+    background, so a lookup never waits on more than one round trip.
+    
+    Args:
+        cache_key (str): Cache key to store the result under
+        place_name (str): Name of the place to look up
+        
+    Returns:
+        Dict: Place information, or fallback information on failure
+    """
+    try:
+        session = await get_session()
+        
+        place_id = await _known_place_id(cache_key)
+        if place_id:
+            result = await _fetch_details(session, cache_key, place_name, place_id)
+            if result is not None:
                 return result
+        
+        # Search for the place
+        params = {
+            'query': f"{place_name} Da Nang Vietnam",
+            'key': GOOGLE_API_KEY
+        }
+        
+        async with session.get(GOOGLE_PLACES_API_URL, params=params) as response:
+            if response.status != 200:
+                logger.error("API request failed with status %s", response.status)
+                _record_failure(cache_key, f"HTTP {response.status}")
+                return get_fallback_info(place_name)
+            
+            data = await response.json()
+            
+            if data['status'] == 'ZERO_RESULTS' or (data['status'] == 'OK' and not data['results']):
+                # The API is healthy, there is just nothing to show for this query
+                logger.warning("No results found for %s", place_name)
+                places_breaker.record_success()
+                negative_cache[cache_key] = 'ZERO_RESULTS'
+                return get_fallback_info(place_name)
+            
+            if data['status'] != 'OK':
+                logger.error("API returned status %s for %s", data['status'], place_name)
+                _record_failure(cache_key, data['status'])
+                return get_fallback_info(place_name)
+            
+            places_breaker.record_success()
+            result = _compact_record(data['results'][0], enriched=False)
+        
+        await _store_result(cache_key, place_name, result)
+        if result['place_id'] == _rejected_place_ids.get(cache_key):
+            # Text Search still returns the place_id Place Details rejected: keep the basic record
+            logger.warning("Not enriching %s: Place Details rejected place_id %s", place_name, result['place_id'])
+        else:
+            schedule_enrichment(place_name)
+        return result
                 
     except Exception as e:
-        logger.error(f"Error fetching place info for {place_name}: {str(e)}")
+        logger.error("Error fetching place info for %s: %s", place_name, e)
+        _record_failure(cache_key, type(e).__name__)
+        return get_fallback_info(place_name)
+
+async def _fetch_details(session: aiohttp.ClientSession, cache_key: str, place_name: str, place_id: str) -> Optional[Dict]:
+    """
+    Fetch a place by place_id with Place Details, asking only for PLACE_DETAILS_FIELDS.
+    
+    Returns:
+        Optional[Dict]: Place information (fallback information on failure), or
+        None if the place_id is no longer valid and the place must be searched again
+    """
+    params = {
+        'place_id': place_id,
+        'fields': ','.join(PLACE_DETAILS_FIELDS),
+        'key': GOOGLE_API_KEY
+    }
+    async with session.get(GOOGLE_PLACES_DETAILS_URL, params=params) as response:
+        if response.status != 200:
+            logger.error("Place Details request failed with status %s", response.status)
+            _record_failure(cache_key, f"HTTP {response.status}")
+            return get_fallback_info(place_name)
+        data = await response.json()
+    
+    if data['status'] == 'NOT_FOUND':
+        # Place IDs can expire; forget this one and look the place up by name instead
+        logger.warning("Place ID for %s is no longer valid (%s)", place_name, data['status'])
+        places_breaker.record_success()
+        _rejected_place_ids[cache_key] = place_id
+        return None
+    
+    if data['status'] != 'OK':
+        logger.error("Place Details returned status %s for %s", data['status'], place_name)
+        _record_failure(cache_key, data['status'])
         return get_fallback_info(place_name)
+    
+    places_breaker.record_success()
+    _enrichment_attempts.pop(cache_key, None)
+    result = _compact_record(data['result'], enriched=True)
+    await _store_result(cache_key, place_name, result)
+    return result
+
+def schedule_enrichment(place_name: str) -> None:
+    """
+    Queue a place for Place Details enrichment in the background.
+    
+    Places queued while a batch is being prepared are enriched together. A place
+    is queued at most ENRICHMENT_MAX_ATTEMPTS times until an enrichment succeeds
+    or CACHE_TTL passes, so a place Place Details keeps rejecting cannot loop.
+    
+    Args:
+        place_name (str): Name of the place to enrich
+    """
+    global _enrichment_task
+    cache_key = f"place_{place_name}"
+    attempts = _enrichment_attempts.get(cache_key, 0)
+    if attempts >= ENRICHMENT_MAX_ATTEMPTS:
+        logger.warning("Not enriching %s: %d attempts without success", place_name, attempts)
+        return
+    _enrichment_attempts[cache_key] = attempts + 1
+    _pending_enrichment.add(place_name)
+    if _enrichment_task is None or _enrichment_task.done():
+        _enrichment_task = asyncio.ensure_future(_run_enrichment())
+
+async def _run_enrichment() -> None:
+    # Yield once so lookups finishing in the same tick join the batch
+    await asyncio.sleep(0)
+    while _pending_enrichment:
+        batch = sorted(_pending_enrichment)
+        _pending_enrichment.clear()
+        await enrich_places(batch)
+
+async def enrich_places(place_names: Iterable[str], concurrency: int = DETAILS_CONCURRENCY) -> List[Dict]:
+    """
+    Fetch Place Details for several places concurrently.
+    
+    Places already enriched in memory are returned as they are.
+    
+    Args:
+        place_names (Iterable[str]): Names of the places to enrich
+        concurrency (int): Maximum number of concurrent requests
+        
+    Returns:
+        List[Dict]: Place information, in the same order as place_names
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def enrich(place_name: str) -> Dict:
+        cache_key = f"place_{place_name}"
+        async with semaphore:
+            cached = place_cache.get(cache_key)
+            if cached and cached[0].get('enriched') and time.time() - cached[1] < CACHE_TTL:
+                return cached[0]
+            # Let a lookup that is still running (e.g. the Text Search that queued us) finish first
+            pending = _inflight.get(cache_key)
+            if pending is not None:
+                await asyncio.shield(pending)
+            result, _ = await _fetch_coalesced(cache_key, place_name)
+            return result
+    
+    return await asyncio.gather(*(enrich(name) for name in place_names))
+
+def _record_failure(cache_key: str, reason: str) -> None:
+    """
+    Count an upstream failure against the breaker and negatively cache the key.
+
+    Cached records are left in place: _lookup keeps serving a stale record for
+    the key and only falls back to static data when there is none.
+    """
+    trips = places_breaker.trip_count
+    places_breaker.record_failure()
+    if places_breaker.trip_count > trips:
+        PLACES_BREAKER_TRIPS.inc()
+    negative_cache[cache_key] = reason
+    if places_breaker.state == CircuitBreaker.OPEN:
+        logger.warning("Places API breaker open: %s", places_breaker.stats())
 
 def get_fallback_info(place_name: str) -> Dict:
     """
@@ -86,11 +538,18 @@ def get_fallback_info(place_name: str) -> Dict:
     Returns:
         Dict: Basic place information
     """
+    topic = knowledge_base.topic(place_name)
     return {
         'name': place_name.replace('_', ' ').title(),
-        'description': DA_NANG_INFO['places'].get(place_name, 'No description available'),
+        'description': topic.text(DEFAULT_LANGUAGE) if topic else 'No description available',
         'maps_url': None,
-        'photo_url': None,
+        'photo_reference': None,
         'rating': None,
-        'user_ratings_total': None
+        'user_ratings_total': None,
+        'place_id': None,
+        'location': None,
+        'phone': None,
+        'website': None,
+        'opening_hours': None,
+        'enriched': False
     } 
\ No newline at end of file
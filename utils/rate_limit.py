@@ -0,0 +1,122 @@
+import time
+from typing import Optional, Tuple
+from cachetools import TTLCache
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled at `rate` tokens per second.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum number of tokens (burst size)
+            now (float, optional): Current monotonic time, defaults to time.monotonic()
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def try_acquire(self, amount: float = 1, now: Optional[float] = None) -> bool:
+        """
+        Take tokens if available.
+
+        Returns:
+            bool: True if the tokens were taken
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def delay(self, amount: float = 1, now: Optional[float] = None) -> float:
+        """
+        Returns:
+            float: Seconds until `amount` tokens will be available (0 if available now)
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def pause(self, seconds: float, now: Optional[float] = None) -> None:
+        """Drain the bucket so no tokens are available for `seconds` (e.g. after a 429)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens = -seconds * self.rate
+        self.updated = now
+
+class LoadShedder:
+    """
+    Per-user, per-channel and per-guild token buckets for unsolicited replies.
+
+    A reply is allowed only if every applicable bucket has a token; tokens are
+    taken from all of them at once, so a rejected message does not use up a
+    user's budget. Identical messages in the same channel within a short
+    window are coalesced into the first one. Bucket state lives in bounded TTL
+    caches, so memory stays flat however many users and channels are seen.
+    """
+
+    def __init__(
+        self,
+        user_rate: Tuple[float, float],
+        channel_rate: Tuple[float, float],
+        guild_rate: Tuple[float, float],
+        duplicate_window: float,
+        max_keys: int = 10000
+    ):
+        """
+        Args:
+            user_rate (Tuple[float, float]): (replies, per seconds) for each user
+            channel_rate (Tuple[float, float]): (replies, per seconds) for each channel
+            guild_rate (Tuple[float, float]): (replies, per seconds) for each guild
+            duplicate_window (float): Seconds during which identical messages in a channel are coalesced
+            max_keys (int): Maximum tracked keys per scope
+        """
+        self._scopes = []
+        for rate in (user_rate, channel_rate, guild_rate):
+            replies, per = rate
+            # An idle bucket refills completely within `per` seconds, so it can be forgotten after that
+            self._scopes.append((replies / per, replies, TTLCache(maxsize=max_keys, ttl=per)))
+        self._recent = TTLCache(maxsize=max_keys, ttl=duplicate_window) if duplicate_window > 0 else None
+
+    def check(self, user_id: int, channel_id: int, guild_id: Optional[int], content: str = '') -> str:
+        """
+        Decide whether to handle a message.
+
+        Returns:
+            str: 'allowed', 'coalesced' (duplicate of a recent message) or 'limited'
+        """
+        if self._recent is not None and content:
+            duplicate_key = (channel_id, content)
+            if duplicate_key in self._recent:
+                return 'coalesced'
+        now = time.monotonic()
+        buckets = []
+        for key, (rate, capacity, cache) in zip((user_id, channel_id, guild_id), self._scopes):
+            if key is None:
+                continue
+            bucket = cache.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, capacity, now)
+            if bucket.delay(now=now) > 0:
+                return 'limited'
+            buckets.append((cache, key, bucket))
+        for cache, key, bucket in buckets:
+            bucket.try_acquire(now=now)
+            # Re-insert so the entry expires only once the bucket has been idle long enough to refill
+            cache[key] = bucket
+        if self._recent is not None and content:
+            self._recent[duplicate_key] = True
+        return 'allowed'
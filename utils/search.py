@@ -0,0 +1,247 @@
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from config import SEARCH_TOP_K, SEARCH_MIN_SCORE, SEARCH_MIN_IDF_SHARE, SEARCH_MAX_POSTINGS
+from utils.content import ContentPack, content_store
+from utils.knowledge import knowledge_for
+
+_TOKEN = re.compile(r'\w+')
+
+# English function words (the usual stopword list) plus the verbs and words every question uses
+ENGLISH_STOPWORDS = frozenset((
+    'a', 'about', 'above', 'after', 'again', 'against', 'all', 'also', 'am', 'an', 'and', 'any', 'are', 'as',
+    'at', 'be', 'because', 'been', 'before', 'being', 'below', 'between', 'both', 'but', 'by', 'can', 'could',
+    'did', 'do', 'does', 'doing', 'down', 'during', 'each', 'few', 'for', 'from', 'further', 'get', 'got',
+    'had', 'has', 'have', 'having', 'he', 'her', 'here', 'hers', 'herself', 'him', 'himself', 'his', 'how',
+    'i', 'if', 'in', 'into', 'is', 'it', 'its', 'itself', 'just', 'let', 'like', 'me', 'might', 'more', 'most',
+    'much', 'must', 'my', 'myself', 'no', 'nor', 'not', 'now', 'of', 'off', 'on', 'once', 'only', 'or',
+    'other', 'our', 'ours', 'ourselves', 'out', 'over', 'own', 'please', 'really', 's', 'same', 'she',
+    'should', 'so', 'some', 'such', 't', 'tell', 'than', 'that', 'the', 'their', 'theirs', 'them',
+    'themselves', 'then', 'there', 'these', 'they', 'this', 'those', 'through', 'to', 'too', 'under', 'until',
+    'up', 'us', 'very', 'was', 'we', 'were', 'what', 'when', 'where', 'which', 'while', 'who', 'whom', 'why',
+    'will', 'with', 'would', 'you', 'your', 'yours', 'yourself', 'yourselves',
+    'find', 'give', 'go', 'going', 'know', 'need', 'recommend', 'see', 'show', 'suggest', 'take', 'try', 'want'
+))
+
+# Question words that name a topic's subject or category without appearing in its text ("where can I eat noodles")
+SYNONYMS = {
+    'eat': 'food', 'eating': 'food', 'ate': 'food', 'dish': 'food', 'dishes': 'food', 'restaurant': 'food',
+    'restaurants': 'food', 'near': 'surroundings', 'nearby': 'surroundings'
+}
+
+# Vietnamese function words, folded (no diacritics). Syllables that fold onto place names or food,
+# such as 'da' (Đà Nẵng), 'hoi' (Hội An), 'ba' (Bà Nà) or 'nha' (nhà hàng), are left out.
+VIETNAMESE_STOPWORDS = frozenset((
+    'ai', 'bao', 'ban', 'biet', 'cac', 'chi', 'cho', 'co', 'cua', 'dang', 'day', 'dau', 'den', 'di', 'do',
+    'duoc', 'gi', 'hay', 'khong', 'kia', 'la', 'lam', 'ma', 'minh', 'mot', 'muon', 'nao', 'nay', 'nen',
+    'nhieu', 'nhu', 'nhung', 'o', 'rat', 'roi', 'sao', 'se', 'ta', 'tai', 'thi', 'toi', 'trong', 'tu', 've',
+    'va', 'voi', 'xin'
+))
+
+# Words too common in questions to say anything about the topic
+STOPWORDS = ENGLISH_STOPWORDS | VIETNAMESE_STOPWORDS
+
+def fold(text: str) -> str:
+    """
+    Lowercase and strip diacritics, so 'Cầu Rồng' and 'cau rong' compare equal.
+
+    Args:
+        text (str): Text in any supported language
+
+    Returns:
+        str: Folded text
+    """
+    decomposed = unicodedata.normalize('NFD', text.lower().replace('đ', 'd').replace('Đ', 'd'))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def _stem(token: str) -> str:
+    """Strip English plural endings ('noodles' -> 'noodle', 'festivities' -> 'festivity')."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+@lru_cache(maxsize=65536)
+def _term(word: str) -> Optional[str]:
+    """Search term for one lowercase word, or None for a stopword; words repeat a lot, so this is cached."""
+    folded = fold(word)
+    if folded in STOPWORDS:
+        return None
+    return _stem(SYNONYMS.get(folded, folded))
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into folded, stemmed search terms, dropping stopwords.
+
+    Args:
+        text (str): Document or query text
+
+    Returns:
+        List[str]: Terms in order of appearance
+    """
+    # NFC first: decomposed input would otherwise split words at their combining marks
+    words = _TOKEN.findall(unicodedata.normalize('NFC', text).lower())
+    return [term for term in map(_term, words) if term is not None]
+
+class SearchIndex:
+    """
+    Inverted index ranked with Okapi BM25.
+
+    Documents are static between rebuilds, so each posting stores its final
+    BM25 term weight rather than a raw term frequency: a query is a sum over
+    the postings of its terms, followed by a top-k selection.
+
+    Each term keeps only its max_postings highest-weighted postings (a
+    "champion list"), so the cost of a query is bounded by its number of
+    terms however many documents contain them. Documents that fall off a
+    list lose that term's contribution; they rank too low to reach the top
+    few results anyway.
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[Tuple[Hashable, str]],
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_postings: int = SEARCH_MAX_POSTINGS
+    ):
+        """
+        Args:
+            documents (Iterable[Tuple[Hashable, str]]): (document id, text) pairs
+            k1 (float): Term frequency saturation
+            b (float): Document length normalization
+            max_postings (int): Postings kept per term, highest weights first
+        """
+        self.doc_ids: List[Hashable] = []
+        term_counts: List[Counter] = []
+        lengths: List[int] = []
+        for doc_id, text in documents:
+            terms = tokenize(text)
+            self.doc_ids.append(doc_id)
+            term_counts.append(Counter(terms))
+            lengths.append(len(terms))
+        count = len(self.doc_ids)
+        average_length = (sum(lengths) / count) if count else 0.0
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc, counts in enumerate(term_counts):
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append((doc, frequency))
+
+        # Length normalization depends only on the document
+        norms = [k1 * (1 - b + b * length / average_length) if average_length else k1 for length in lengths]
+        boost = k1 + 1
+
+        # term -> [(document index, BM25 weight)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        # term -> inverse document frequency; a term no document contains is rarer than any that one does
+        self.idf: Dict[str, float] = {}
+        self.unknown_idf = math.log(1 + (count + 0.5) / 0.5)
+        for term, entries in postings.items():
+            idf = math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            self.idf[term] = idf
+            weights = [(doc, idf * frequency * boost / (frequency + norms[doc])) for doc, frequency in entries]
+            if len(weights) > max_postings:
+                weights = heapq.nlargest(max_postings, weights, key=lambda posting: posting[1])
+            self.postings[term] = weights
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(
+        self,
+        query: str,
+        k: int = SEARCH_TOP_K,
+        min_score: float = 0.0,
+        min_match: float = 0.0
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Rank documents against a query.
+
+        Args:
+            query (str): Free-form question in any supported language
+            k (int): Maximum number of results
+            min_score (float): Results scoring below this are dropped
+            min_match (float): Results whose terms carry less than this share of the query's total
+                inverse document frequency are dropped. Terms no document contains count as the
+                rarest, so one shared word does not answer a question about something else
+                ("lady gaga"), while common words such as 'da nang' barely count
+
+        Returns:
+            List[Tuple[Hashable, float]]: (document id, score), best first
+        """
+        terms = set(tokenize(query))
+        scores: Dict[int, float] = {}
+        get = scores.get
+        if len(terms) > 1 and min_match > 0:
+            idfs = {term: self.idf.get(term, self.unknown_idf) for term in terms}
+            need = min_match * sum(idfs.values()) - 1e-9
+            # Summed idf of the query terms each document contains
+            matched: Dict[int, float] = {}
+            get_matched = matched.get
+            for term in terms:
+                idf = idfs[term]
+                for doc, weight in self.postings.get(term, ()):
+                    scores[doc] = get(doc, 0.0) + weight
+                    matched[doc] = get_matched(doc, 0.0) + idf
+            candidates: Iterable[Tuple[int, float]] = [
+                (doc, score) for doc, score in scores.items() if matched[doc] >= need
+            ]
+        else:
+            for term in terms:
+                for doc, weight in self.postings.get(term, ()):
+                    scores[doc] = get(doc, 0.0) + weight
+            candidates = scores.items()
+        best = heapq.nlargest(k, candidates, key=itemgetter(1))
+        return [(self.doc_ids[doc], score) for doc, score in best if score >= min_score]
+
+def topic_documents(pack: ContentPack) -> List[Tuple[Tuple[str, str], str]]:
+    """
+    One document per topic: its key, category, aliases, menu labels and text in every language.
+
+    Returns:
+        List[Tuple[Tuple[str, str], str]]: ((key, category), text) pairs
+    """
+    documents = []
+    for topic in knowledge_for(pack).topics.values():
+        # The category names what kind of topic it is ("what are the local traditions")
+        parts = [topic.key.replace('_', ' '), topic.category.replace('_', ' ')]
+        parts.extend(topic.aliases)
+        parts.extend(topic.labels.values())
+        parts.extend(topic.texts.values())
+        documents.append((topic.ref, ' '.join(parts)))
+    return documents
+
+def build_topic_index(pack: ContentPack) -> SearchIndex:
+    """Build the search index over every topic in a content pack."""
+    return SearchIndex(topic_documents(pack))
+
+topic_index = build_topic_index(content_store.pack)
+
+def install_topic_index(index: SearchIndex) -> None:
+    """Swap in a topic index built by build_topic_index."""
+    global topic_index
+    topic_index = index
+
+# Rebuilt off the event loop whenever the content pack is reloaded
+content_store.subscribe(build_topic_index, install_topic_index)
+
+def search_topics(query: str, k: int = SEARCH_TOP_K) -> List[Tuple[Tuple[str, str], float]]:
+    """
+    Find the topics that best answer a free-form question.
+
+    Args:
+        query (str): Question in any supported language
+        k (int): Maximum number of results
+
+    Returns:
+        List[Tuple[Tuple[str, str], float]]: ((key, category), score), best first;
+        only results scoring at least SEARCH_MIN_SCORE and matching SEARCH_MIN_IDF_SHARE of the query's idf
+    """
+    return topic_index.search(query, k, SEARCH_MIN_SCORE, SEARCH_MIN_IDF_SHARE)
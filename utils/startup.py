@@ -0,0 +1,47 @@
+import logging
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class StartupTimer:
+    """
+    Records how long each startup phase took, measured from process start.
+
+    The clock starts when this module is first imported, so bot.py imports it
+    before anything else. Each phase is recorded only the first time it is
+    reached, which keeps reconnects from overwriting the cold-start numbers.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> bool:
+        """
+        Record the time since start for a phase, unless it was already recorded.
+
+        Returns:
+            bool: True if this call recorded the phase
+        """
+        if phase in self.phases:
+            return False
+        self.phases[phase] = time.perf_counter() - self.started
+        return True
+
+    def get(self, phase: str) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: Seconds from start to the phase, or None if not reached yet
+        """
+        return self.phases.get(phase)
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: One line listing every recorded phase in the order it was reached
+        """
+        return ', '.join(f"{phase} {seconds * 1e3:.0f} ms" for phase, seconds in self.phases.items())
+
+# Process-wide timer; started on first import
+startup_timer = StartupTimer()
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class UserState:
+    """In-memory state for one user."""
+
+    __slots__ = ('language', 'last_topic', 'last_seen')
+
+    def __init__(self, language: Optional[str] = None):
+        self.language = language
+        self.last_topic: Optional[str] = None
+        self.last_seen = time.monotonic()
+
+class UserStore:
+    """
+    Bounded per-user state with persistent language preferences.
+
+    Recently active users are kept in an LRU of at most max_users entries, and
+    users idle for longer than idle_ttl are evicted. Language preferences are
+    stored in a local SQLite file; writes are queued and flushed in batches on
+    a background thread, so the event loop never waits on disk I/O. The last
+    topic is conversational state and is kept in memory only.
+    """
+
+    def __init__(self, path: str, max_users: int, idle_ttl: float, flush_interval: float):
+        """
+        Args:
+            path (str): Location of the SQLite database file
+            max_users (int): Maximum number of users kept in memory
+            idle_ttl (float): Seconds of inactivity after which a user is evicted
+            flush_interval (float): Seconds between write-behind flushes
+        """
+        self.path = path
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+        self._users: 'OrderedDict[int, UserState]' = OrderedDict()
+        self._pending: Dict[int, Optional[str]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='user-store')
+        self._flush_task: Optional[asyncio.Task] = None
+
+    # --- Database (runs on the worker thread) ---
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS users ('
+                ' user_id INTEGER PRIMARY KEY,'
+                ' language TEXT,'
+                ' updated_at REAL NOT NULL)'
+            )
+            conn.commit()
+            self._conn = conn
+            logger.info("Opened user store at %s", self.path)
+        return self._conn
+
+    def _load_sync(self, user_id: int) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT language FROM users WHERE user_id = ?', (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write_sync(self, rows: List[Tuple[int, Optional[str]]]) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                'INSERT OR REPLACE INTO users (user_id, language, updated_at) VALUES (?, ?, ?)',
+                [(user_id, language, now) for user_id, language in rows]
+            )
+            conn.commit()
+
+    # --- In-memory LRU ---
+
+    def _touch(self, user_id: int) -> Optional[UserState]:
+        state = self._users.get(user_id)
+        if state is not None:
+            state.last_seen = time.monotonic()
+            self._users.move_to_end(user_id)
+        return state
+
+    def _insert(self, user_id: int, state: UserState) -> UserState:
+        self._users[user_id] = state
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return state
+
+    def evict_idle(self) -> int:
+        """
+        Drop users that have been idle for longer than idle_ttl.
+
+        Returns:
+            int: Number of evicted users
+        """
+        cutoff = time.monotonic() - self.idle_ttl
+        evicted = 0
+        # The LRU is ordered by last access, so idle users are at the front
+        while self._users:
+            user_id, state = next(iter(self._users.items()))
+            if state.last_seen >= cutoff:
+                break
+            self._users.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    async def ensure_loaded(self, user_id: int) -> None:
+        """
+        Make sure a user's state is in memory, loading it from disk if needed.
+
+        Call this before the synchronous getters when handling a user's message.
+        """
+        if self._touch(user_id) is not None:
+            return
+        if user_id in self._pending:
+            language = self._pending[user_id]
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                language = await loop.run_in_executor(self._executor, self._load_sync, user_id)
+            except Exception as e:
+                logger.error("Error loading user %s from user store: %s", user_id, e)
+                language = None
+        # Another task may have loaded the user while we were waiting
+        if self._touch(user_id) is None:
+            self._insert(user_id, UserState(language))
+
+    def _state(self, user_id: int) -> UserState:
+        state = self._touch(user_id)
+        if state is None:
+            state = self._insert(user_id, UserState(self._pending.get(user_id)))
+        return state
+
+    def get_language(self, user_id: int, default: str) -> str:
+        """Return the user's language preference, or default if none is set."""
+        return self._state(user_id).language or default
+
+    def set_language(self, user_id: int, language: str) -> None:
+        """Set the user's language preference and queue it for persistence."""
+        self._state(user_id).language = language
+        self._pending[user_id] = language
+
+    def get_last_topic(self, user_id: int) -> Optional[str]:
+        """Return the last topic the user asked about, if any."""
+        return self._state(user_id).last_topic
+
+    def set_last_topic(self, user_id: int, topic: Optional[str]) -> None:
+        """Remember (or clear, with None) the last topic the user asked about."""
+        self._state(user_id).last_topic = topic
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    # --- Write-behind ---
+
+    async def flush(self) -> int:
+        """
+        Persist all queued writes in one batch.
+
+        Returns:
+            int: Number of written users
+        """
+        if not self._pending:
+            return 0
+        rows = list(self._pending.items())
+        self._pending = {}
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write_sync, rows)
+        except Exception as e:
+            logger.error("Error flushing %d user(s) to user store: %s", len(rows), e)
+            # Re-queue, keeping any newer value written in the meantime
+            for user_id, language in rows:
+                self._pending.setdefault(user_id, language)
+            return 0
+        return len(rows)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            self.evict_idle()
+
+    def start(self) -> None:
+        """Start the periodic flush and idle-eviction task."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the background task, flush remaining writes and close the database."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from utils.places import get_place_info, refresh_place_info, place_fetched_at, purge_expired_places
+from config import (
+    CACHE_TTL,
+    PLACE_CACHE_PURGE_INTERVAL,
+    WARMUP_CONCURRENCY,
+    REFRESH_MARGIN,
+    REFRESH_JITTER,
+    REFRESH_RETRY_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+class PlaceWarmer:
+    """
+    Background scheduler that prefetches known places and keeps them fresh.
+
+    On start it warms the cache for every place with bounded concurrency, then
+    refreshes each entry shortly before CACHE_TTL expires, counted from when the
+    cached record was actually fetched, so records loaded from disk after a
+    restart come due at their real age. A place with no fresh record after a
+    lookup (the refresh failed or fell back to static data) is retried after
+    REFRESH_RETRY_DELAY instead. Refresh times are jittered so entries do not
+    all expire and refresh in the same instant. Every PLACE_CACHE_PURGE_INTERVAL,
+    starting after warm-up, records too old to serve are purged from disk.
+    """
+
+    def __init__(self, place_names: Iterable[str], concurrency: int = WARMUP_CONCURRENCY):
+        """
+        Args:
+            place_names (Iterable[str]): Place keys to keep warm
+            concurrency (int): Maximum number of concurrent lookups
+        """
+        self.place_names: List[str] = list(place_names)
+        self.concurrency = concurrency
+        self.warmup_duration: Optional[float] = None
+        self._next_refresh: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Warm-ups for places added by update_places (kept referenced until done)
+        self._warm_tasks: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Start warm-up and the refresh loop in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background tasks and wait for them to finish."""
+        for task in list(self._warm_tasks):
+            task.cancel()
+        if self._warm_tasks:
+            await asyncio.gather(*self._warm_tasks, return_exceptions=True)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def update_places(self, place_names: Iterable[str]) -> None:
+        """
+        Replace the set of places to keep warm, e.g. after the knowledge base was reloaded.
+        Places no longer listed stop being refreshed; new places are warmed right away.
+        """
+        self.place_names = list(place_names)
+        known = set(self.place_names)
+        for name in [name for name in self._next_refresh if name not in known]:
+            del self._next_refresh[name]
+        added = [name for name in self.place_names if name not in self._next_refresh]
+        if added and self._task is not None and not self._task.done():
+            task = asyncio.ensure_future(self._gather_bounded(added, get_place_info))
+            self._warm_tasks.add(task)
+            task.add_done_callback(self._warm_tasks.discard)
+
+    def _schedule(self, place_name: str, fetched_at: Optional[float]) -> None:
+        """
+        Set the next refresh time for a place, just before its cached record's TTL expires.
+
+        Args:
+            place_name (str): Place key
+            fetched_at (float, optional): Unix time the cached record was fetched, or None if there is none
+        """
+        if place_name not in self.place_names:
+            # Removed while its lookup was in flight
+            return
+        if fetched_at is None:
+            delay = 0.0
+        else:
+            age = time.time() - fetched_at
+            delay = CACHE_TTL * (1 - REFRESH_MARGIN) - age - random.uniform(0, REFRESH_JITTER)
+        if delay <= 0:
+            # Nothing cached, or the record was not renewed: retry soon rather than an hour from now
+            delay = REFRESH_RETRY_DELAY + random.uniform(0, REFRESH_RETRY_DELAY / 2)
+        self._next_refresh[place_name] = time.monotonic() + delay
+
+    async def _refresh(self, place_name: str) -> None:
+        """Refresh a place from the API unless its record was renewed since it was scheduled."""
+        fetched_at = await place_fetched_at(place_name)
+        if fetched_at is not None and time.time() - fetched_at < CACHE_TTL * (1 - REFRESH_MARGIN):
+            # A stale-while-revalidate lookup already refreshed it
+            return
+        await refresh_place_info(place_name)
+
+    async def _gather_bounded(self, place_names: List[str], fetch) -> None:
+        """Run fetch for every place with at most self.concurrency in flight."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(place_name: str):
+            async with semaphore:
+                try:
+                    await fetch(place_name)
+                except Exception as e:
+                    logger.error("Error warming place %s: %s", place_name, e)
+                self._schedule(place_name, await place_fetched_at(place_name))
+
+        await asyncio.gather(*(run(name) for name in place_names))
+
+    async def warm_up(self) -> float:
+        """
+        Prefetch every known place.
+
+        Returns:
+            float: Warm-up duration in seconds
+        """
+        started = time.perf_counter()
+        await self._gather_bounded(self.place_names, get_place_info)
+        self.warmup_duration = time.perf_counter() - started
+        logger.info("Warmed %d places in %.2fs", len(self.place_names), self.warmup_duration)
+        return self.warmup_duration
+
+    async def _run(self) -> None:
+        """Warm up, then refresh entries as they come due and purge expired records periodically."""
+        await self.warm_up()
+        await purge_expired_places()
+        next_purge = time.monotonic() + PLACE_CACHE_PURGE_INTERVAL
+        while True:
+            now = time.monotonic()
+            next_due = min(self._next_refresh.values(), default=now + CACHE_TTL)
+            await asyncio.sleep(max(min(next_due, next_purge) - now, 0))
+            now = time.monotonic()
+            if now >= next_purge:
+                await purge_expired_places()
+                next_purge = now + PLACE_CACHE_PURGE_INTERVAL
+            due = [name for name, at in self._next_refresh.items() if at <= now]
+            if due:
+                logger.info("Refreshing %d place(s) before cache expiry", len(due))
+                await self._gather_bounded(due, self._refresh)
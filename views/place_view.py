@@ -1,90 +1,200 @@
 import discord
 from discord import ui
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
 from utils.places import get_place_info
+from utils.outbound import outbound_scheduler
+from utils.photo_cache import photo_cache
+from utils.knowledge import KnowledgeBase, knowledge_base, knowledge_for
+from utils.user_store import UserStore
+from utils.content import ContentPack, content_store
+from config import REACTION_EMOJIS, SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE
 
 logger = logging.getLogger(__name__)
 
+# Stable per-language custom_id, so menus posted before a restart still dispatch
+PLACE_SELECT_CUSTOM_ID = 'danang:place_select:{lang}'
+# Discord limits: 25 options per select, 100 characters per label/description
+MAX_OPTIONS = 25
+MAX_OPTION_TEXT = 100
+
+def _message(key: str, lang: str) -> str:
+    return knowledge_base.message(key, lang)
+
+def _truncate(text: str, limit: int = MAX_OPTION_TEXT) -> str:
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+def build_place_options(lang: str, knowledge: Optional[KnowledgeBase] = None) -> List[discord.SelectOption]:
+    """
+    Build the select options for every known place in one language.
+
+    Takes the knowledge base explicitly, so options for a newly loaded pack
+    can be built before that pack is installed.
+
+    Args:
+        lang (str): Language code for labels and descriptions
+        knowledge (KnowledgeBase, optional): Content to build from; defaults to the current knowledge base
+
+    Returns:
+        List[discord.SelectOption]: At most MAX_OPTIONS options
+    """
+    knowledge = knowledge or knowledge_base
+    return [
+        discord.SelectOption(
+            label=_truncate(topic.label(lang)),
+            value=topic.key,
+            description=_truncate(topic.title(lang))
+        )
+        for topic in knowledge.categories.get('places', ())[:MAX_OPTIONS]
+    ]
+
+def add_place_fields(embed: discord.Embed, place_info: Optional[Dict], lang: str) -> None:
+    """
+    Add the location, rating, opening hours, phone, website and coordinates fields
+    that are available for a place.
+
+    Args:
+        embed (discord.Embed): Embed to add the fields to
+        place_info (Dict, optional): Place information from get_place_info
+        lang (str): Language of the field names
+    """
+    if not place_info:
+        return
+
+    if place_info.get('maps_url'):
+        embed.add_field(
+            name=_message('location_field', lang),
+            value=f"[View on Google Maps]({place_info['maps_url']})",
+            inline=False
+        )
+
+    if place_info.get('rating') is not None:
+        rating = f"⭐ {place_info['rating']}"
+        if place_info.get('user_ratings_total') is not None:
+            rating += f" ({place_info['user_ratings_total']} {_message('reviews_text', lang)})"
+        embed.add_field(name=_message('rating_field', lang), value=rating, inline=True)
+
+    if place_info.get('phone'):
+        embed.add_field(name=_message('phone_field', lang), value=place_info['phone'], inline=True)
+
+    if place_info.get('website'):
+        embed.add_field(name=_message('website_field', lang), value=place_info['website'], inline=True)
+
+    if place_info.get('location'):
+        lat, lng = place_info['location']
+        embed.add_field(name=_message('coordinates_field', lang), value=f"{lat:.5f}, {lng:.5f}", inline=True)
+
+    if place_info.get('opening_hours'):
+        # Discord field values are limited to 1024 characters
+        embed.add_field(
+            name=_message('hours_field', lang),
+            value='\n'.join(place_info['opening_hours'])[:1024],
+            inline=False
+        )
+
 class PlaceSelect(ui.Select):
-    def __init__(self):
-        options = [
-            discord.SelectOption(
-                label="Marble Mountains",
-                value="marble_mountains",
-                description="Five limestone hills with caves and temples"
-            ),
-            discord.SelectOption(
-                label="Dragon Bridge",
-                value="dragon_bridge",
-                description="Modern architectural marvel"
-            ),
-            discord.SelectOption(
-                label="My Khe Beach",
-                value="my_khe_beach",
-                description="One of Vietnam's most beautiful beaches"
-            ),
-            discord.SelectOption(
-                label="Lady Buddha",
-                value="lady_buddha",
-                description="Tallest Buddha statue in Vietnam"
-            ),
-            discord.SelectOption(
-                label="Han Market",
-                value="han_market",
-                description="Traditional market in Da Nang"
-            )
-        ]
+    """Place menu for one language; a single instance serves every message it was posted on."""
+
+    def __init__(self, lang: str, user_store: UserStore):
+        """
+        Args:
+            lang (str): Language of the menu's labels
+            user_store (UserStore): Store used to answer in the selecting user's language
+        """
+        self.user_store = user_store
         super().__init__(
-            placeholder="Choose a place in Da Nang...",
-            options=options
+            custom_id=PLACE_SELECT_CUSTOM_ID.format(lang=lang),
+            placeholder=_message('select_place_placeholder', lang),
+            options=build_place_options(lang)
         )
 
     async def callback(self, interaction: discord.Interaction):
+        lang = DEFAULT_LANGUAGE
         try:
             await interaction.response.defer()
-            
+
+            # Answer in the selecting user's language, not the language of whoever posted the menu
+            await self.user_store.ensure_loaded(interaction.user.id)
+            lang = self.user_store.get_language(interaction.user.id, DEFAULT_LANGUAGE)
+
             place_name = self.values[0]
             place_info = await get_place_info(place_name)
-            
+
             embed = discord.Embed(
                 title=place_info['name'],
                 description=place_info['description'],
                 color=discord.Color.blue()
             )
-            
-            if place_info['photo_url']:
-                embed.set_image(url=place_info['photo_url'])
-            
-            if place_info['maps_url']:
-                embed.add_field(
-                    name="Location",
-                    value=f"[View on Google Maps]({place_info['maps_url']})",
-                    inline=False
-                )
-            
-            if place_info['rating']:
-                embed.add_field(
-                    name="Rating",
-                    value=f"⭐ {place_info['rating']} ({place_info['user_ratings_total']} reviews)",
-                    inline=True
-                )
-            
-            await interaction.followup.send(embed=embed)
-            
-            # Add reactions
-            message = await interaction.original_response()
-            for emoji in ["🔥", "❤️", "😋"]:
-                await message.add_reaction(emoji)
-                
+
+            files = await photo_cache.attach(embed, place_info)
+            add_place_fields(embed, place_info, lang)
+
+            message = await interaction.followup.send(embed=embed, files=files, wait=True)
+            photo_cache.remember_upload(place_info, message)
+
+            # Add reactions in the background, paced by the outbound scheduler
+            outbound_scheduler.schedule_reactions(message, REACTION_EMOJIS)
+
         except Exception as e:
-            logger.error(f"Error in PlaceSelect callback: {str(e)}")
-            await interaction.followup.send(
-                "Sorry, there was an error processing your request. Please try again later.",
-                ephemeral=True
-            )
+            logger.error("Error in PlaceSelect callback: %s", e)
+            await interaction.followup.send(_message('generic_error', lang), ephemeral=True)
 
 class PlaceView(ui.View):
-    def __init__(self):
-        super().__init__()
-        self.add_item(PlaceSelect()) 
\ No newline at end of file
+    """Persistent (never timing out) view holding the place menu for one language."""
+
+    def __init__(self, lang: str, user_store: UserStore):
+        super().__init__(timeout=None)
+        self.add_item(PlaceSelect(lang, user_store))
+
+class PlaceMenus:
+    """
+    The shared place menus, one per supported language.
+
+    For each language one view is registered with the bot and handles every
+    interaction with that menu's custom_id, whichever message it is on. Messages
+    are sent with a second, stopped copy of the view: discord.py does not track
+    finished views per message, so posting thousands of menus adds no state.
+    Views need a running event loop, so build this in setup_hook.
+    """
+
+    def __init__(self, user_store: UserStore, languages: Iterable[str] = SUPPORTED_LANGUAGES):
+        """
+        Args:
+            user_store (UserStore): Store used to answer in each user's language
+            languages (Iterable[str]): Languages to build menus for
+        """
+        self.registered: Dict[str, PlaceView] = {}
+        self._display: Dict[str, PlaceView] = {}
+        for lang in languages:
+            self.registered[lang] = PlaceView(lang, user_store)
+            display = PlaceView(lang, user_store)
+            display.stop()
+            self._display[lang] = display
+        content_store.subscribe(self._build_options, self._install_options)
+
+    def _build_options(self, pack: ContentPack) -> Dict[str, Tuple[str, List[discord.SelectOption]]]:
+        knowledge = knowledge_for(pack)
+        return {
+            lang: (knowledge.message('select_place_placeholder', lang), build_place_options(lang, knowledge))
+            for lang in self.registered
+        }
+
+    def _install_options(self, menus: Dict[str, Tuple[str, List[discord.SelectOption]]]) -> None:
+        """Swap new placeholders and options into every view; the registered custom_ids are unchanged."""
+        for lang, (placeholder, options) in menus.items():
+            for view in (self.registered[lang], self._display[lang]):
+                select = view.children[0]
+                select.placeholder = placeholder
+                select.options = options
+
+    def register(self, client: discord.Client) -> None:
+        """Register the persistent views so their menus dispatch, including on messages from before a restart."""
+        for view in self.registered.values():
+            client.add_view(view)
+
+    def view(self, lang: str) -> PlaceView:
+        """
+        Returns:
+            PlaceView: The view to attach when posting the menu in lang
+        """
+        return self._display.get(lang) or self._display[DEFAULT_LANGUAGE]